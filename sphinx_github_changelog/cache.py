@@ -0,0 +1,454 @@
+"""
+Persistent cache for the releases of GitHub repositories.
+
+Each repository is stored as a gzipped JSON file holding the (trimmed) REST
+payloads of its releases and the time they were fetched. The cache can be filled
+ahead of the documentation build with ``sphinx-github-changelog fetch``.
+
+Access to a repository's file is serialized with a file lock, so that when
+several processes need the same releases (e.g. parallel ``sphinx-build -j``
+readers), only the first one downloads them and the others reuse its result.
+
+Entries older than the cache's ``ttl`` are still used, but refreshed in the
+background for the next build; entries older than its ``max_staleness`` are
+ignored, so that they're downloaded again before being used.
+
+For repositories with a very large number of releases, `SQLiteReleaseCache`
+stores one indexed row per release instead, and applies release filters in
+SQL.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import datetime
+import gzip
+import json
+import os
+import pathlib
+import re
+import sys
+import zlib
+from collections.abc import Iterator
+from typing import IO, TYPE_CHECKING, Any
+
+from . import exceptions, urls
+
+if TYPE_CHECKING:
+    import sqlite3
+
+    from .github_releases import ReleaseFilter
+
+BACKENDS = ("json", "sqlite")
+
+if sys.platform == "win32":  # coverage: exclude
+    import errno
+    import msvcrt
+
+    def _lock_file(file: IO) -> None:
+        file.seek(0)
+        # LK_LOCK gives up after 10 attempts, one second apart, while another
+        # process may still be downloading the releases: keep waiting.
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            except OSError as exc:
+                if exc.errno != errno.EDEADLOCK:
+                    raise
+            else:
+                return
+
+    def _unlock_file(file: IO) -> None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_file(file: IO) -> None:
+        fcntl.flock(file, fcntl.LOCK_EX)
+
+    def _unlock_file(file: IO) -> None:
+        fcntl.flock(file, fcntl.LOCK_UN)
+
+
+@dataclasses.dataclass
+class CacheEntry:
+    fetched_at: datetime.datetime
+    payloads: list[dict]
+
+    def to_json(self) -> dict[str, Any]:
+        return {"fetched_at": self.fetched_at.isoformat(), "payloads": self.payloads}
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> CacheEntry:
+        return cls(
+            fetched_at=datetime.datetime.fromisoformat(data["fetched_at"]),
+            payloads=data["payloads"],
+        )
+
+
+@dataclasses.dataclass
+class ReleaseCache:
+    directory: pathlib.Path
+    # Entries fetched before this time are ignored.
+    fresh_since: datetime.datetime | None = None
+    # Entries older than this should be refreshed, but may still be used.
+    ttl: datetime.timedelta | None = None
+    # Entries older than this are ignored.
+    max_staleness: datetime.timedelta | None = None
+
+    def path(self, github_params: urls.GitHubParams) -> pathlib.Path:
+        return (
+            self.directory
+            / github_params.hostname
+            / github_params.owner
+            / f"{github_params.repo}.json.gz"
+        )
+
+    def lock_path(self, github_params: urls.GitHubParams) -> pathlib.Path:
+        return (
+            self.directory
+            / github_params.hostname
+            / github_params.owner
+            / f"{github_params.repo}.lock"
+        )
+
+    @contextlib.contextmanager
+    def lock(self, github_params: urls.GitHubParams) -> Iterator[None]:
+        """Hold an exclusive, inter-process lock on the repository's entry."""
+        path = self.lock_path(github_params)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a") as file:
+            _lock_file(file)
+            try:
+                yield
+            finally:
+                _unlock_file(file)
+
+    def load(
+        self,
+        github_params: urls.GitHubParams,
+        release_filter: ReleaseFilter | None = None,
+    ) -> CacheEntry | None:
+        """Return the cached releases of the repository, if any.
+
+        Backends may use the filter to skip releases early, but callers still
+        need to apply it to the returned payloads.
+        """
+        path = self.path(github_params)
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            entry = CacheEntry.from_json(json.loads(gzip.decompress(content)))
+        except (OSError, EOFError, ValueError, KeyError, TypeError) as exc:
+            raise exceptions.ChangelogError(
+                f"Invalid release cache file {path}, please delete it: {exc}"
+            ) from exc
+        if not self.is_usable(entry.fetched_at):
+            return None
+        return entry
+
+    def last_known_good(
+        self,
+        github_params: urls.GitHubParams,
+        release_filter: ReleaseFilter | None = None,
+    ) -> CacheEntry | None:
+        """Return the cached releases of the repository regardless of their age,
+        as a fallback when they can't be downloaded.
+        """
+        return dataclasses.replace(self, fresh_since=None, max_staleness=None).load(
+            github_params, release_filter=release_filter
+        )
+
+    def is_usable(self, fetched_at: datetime.datetime) -> bool:
+        if self.fresh_since and fetched_at < self.fresh_since:
+            return False
+        return not (self.max_staleness and _age(fetched_at) > self.max_staleness)
+
+    def is_stale(self, entry: CacheEntry) -> bool:
+        """Whether the entry should be refreshed for the next builds."""
+        return bool(self.ttl and _age(entry.fetched_at) > self.ttl)
+
+    def save(
+        self,
+        github_params: urls.GitHubParams,
+        payloads: list[dict],
+        fetched_at: datetime.datetime | None = None,
+    ) -> CacheEntry:
+        entry = CacheEntry(
+            fetched_at=fetched_at or datetime.datetime.now(tz=datetime.UTC),
+            payloads=payloads,
+        )
+        path = self.path(github_params)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomically(path, gzip.compress(json.dumps(entry.to_json()).encode()))
+        return entry
+
+    def update_release(
+        self,
+        github_params: urls.GitHubParams,
+        payload: dict,
+        deleted: bool = False,
+        previous_tag_name: str | None = None,
+    ) -> bool:
+        """Add, replace or (if ``deleted``) remove a release in the cached
+        releases of the repository, e.g. from a webhook (see `webhook`), without
+        changing their fetch time. Releases are matched by tag name.
+
+        Return False if the repository isn't cached: the next build downloads
+        all its releases anyway.
+        """
+        tag_names = {payload["tag_name"], previous_tag_name} - {None}
+        with self.lock(github_params):
+            entry = self.last_known_good(github_params)
+            if entry is None:
+                return False
+            payloads = [p for p in entry.payloads if p.get("tag_name") not in tag_names]
+            if not deleted:
+                payloads.insert(0, payload)
+            self.save(github_params, payloads, fetched_at=entry.fetched_at)
+        return True
+
+    def references_path(self, github_params: urls.GitHubParams) -> pathlib.Path:
+        return (
+            self.directory
+            / github_params.hostname
+            / github_params.owner
+            / f"{github_params.repo}.references.json.gz"
+        )
+
+    def load_references(self, github_params: urls.GitHubParams) -> dict[str, Any]:
+        """Return the resolved issue, pull request and user references of the
+        repository (see `enrichment`). They're kept regardless of their age.
+        """
+        path = self.references_path(github_params)
+        try:
+            return json.loads(gzip.decompress(path.read_bytes()))
+        except FileNotFoundError:
+            return {}
+        except (OSError, EOFError, ValueError) as exc:
+            raise exceptions.ChangelogError(
+                f"Invalid release cache file {path}, please delete it: {exc}"
+            ) from exc
+
+    def save_references(
+        self, github_params: urls.GitHubParams, references: dict[str, Any]
+    ) -> None:
+        path = self.references_path(github_params)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomically(path, gzip.compress(json.dumps(references).encode()))
+
+
+def _write_atomically(path: pathlib.Path, content: bytes) -> None:
+    # Write to a temporary file first, so that readers never see a partial
+    # file.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(content)
+    tmp_path.replace(path)
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repositories (
+    repository TEXT PRIMARY KEY,
+    fetched_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS releases (
+    repository TEXT NOT NULL,
+    tag_name TEXT NOT NULL,
+    published_at TEXT NOT NULL,
+    is_draft INTEGER NOT NULL,
+    is_prerelease INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (repository, tag_name)
+);
+CREATE INDEX IF NOT EXISTS releases_published_at
+    ON releases (repository, published_at);
+CREATE INDEX IF NOT EXISTS releases_prerelease
+    ON releases (repository, is_prerelease, published_at);
+"""
+
+
+def _age(fetched_at: datetime.datetime) -> datetime.timedelta:
+    return datetime.datetime.now(tz=datetime.UTC) - fetched_at
+
+
+def _regexp(pattern: str, value: str) -> bool:
+    return re.search(pattern, value) is not None
+
+
+@dataclasses.dataclass
+class SQLiteReleaseCache(ReleaseCache):
+    """Release cache storing one row per release in a SQLite database.
+
+    Payloads are stored as zlib-compressed JSON.
+    """
+
+    def path(self, github_params: urls.GitHubParams) -> pathlib.Path:
+        return self.directory / "releases.sqlite3"
+
+    @contextlib.contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        import sqlite3
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.directory / "releases.sqlite3", timeout=60)
+        try:
+            # WAL lets readers proceed while another process writes.
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SQLITE_SCHEMA)
+            connection.create_function("regexp", 2, _regexp, deterministic=True)
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def load(
+        self,
+        github_params: urls.GitHubParams,
+        release_filter: ReleaseFilter | None = None,
+    ) -> CacheEntry | None:
+        repository = github_params.repo_url
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT fetched_at FROM repositories WHERE repository = ?",
+                (repository,),
+            ).fetchone()
+            if row is None:
+                return None
+            fetched_at = datetime.datetime.fromisoformat(row[0])
+            if not self.is_usable(fetched_at):
+                return None
+
+            where, params = ["repository = ?"], [repository]
+            if release_filter is not None:
+                if not release_filter.include_drafts:
+                    where.append("NOT is_draft")
+                if not release_filter.include_prereleases:
+                    where.append("NOT is_prerelease")
+                if release_filter.include_tags:
+                    where.append("regexp(?, tag_name)")
+                    params.append(release_filter.include_tags.pattern)
+                if release_filter.exclude_tags:
+                    where.append("NOT regexp(?, tag_name)")
+                    params.append(release_filter.exclude_tags.pattern)
+                if release_filter.published_since:
+                    where.append("published_at >= ?")
+                    params.append(release_filter.published_since.isoformat())
+            # Releases are sorted by extract_releases(), which breaks ties on
+            # the version, so they're returned in no particular order.
+            rows = connection.execute(
+                f"SELECT payload FROM releases WHERE {' AND '.join(where)}", params
+            )
+            payloads = [json.loads(zlib.decompress(payload)) for (payload,) in rows]
+        return CacheEntry(fetched_at=fetched_at, payloads=payloads)
+
+    def save(
+        self,
+        github_params: urls.GitHubParams,
+        payloads: list[dict],
+        fetched_at: datetime.datetime | None = None,
+    ) -> CacheEntry:
+        entry = CacheEntry(
+            fetched_at=fetched_at or datetime.datetime.now(tz=datetime.UTC),
+            payloads=payloads,
+        )
+        repository = github_params.repo_url
+        with self.connect() as connection:
+            connection.execute(
+                "DELETE FROM releases WHERE repository = ?", (repository,)
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO releases VALUES (?, ?, ?, ?, ?, ?)",
+                (_release_row(repository, payload) for payload in payloads),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO repositories VALUES (?, ?)",
+                (repository, entry.fetched_at.isoformat()),
+            )
+        return entry
+
+    def update_release(
+        self,
+        github_params: urls.GitHubParams,
+        payload: dict,
+        deleted: bool = False,
+        previous_tag_name: str | None = None,
+    ) -> bool:
+        # Only the release's row changes.
+        repository = github_params.repo_url
+        tag_names = {payload["tag_name"], previous_tag_name} - {None}
+        with self.connect() as connection:
+            if (
+                connection.execute(
+                    "SELECT 1 FROM repositories WHERE repository = ?", (repository,)
+                ).fetchone()
+                is None
+            ):
+                return False
+            connection.executemany(
+                "DELETE FROM releases WHERE repository = ? AND tag_name = ?",
+                ((repository, tag_name) for tag_name in tag_names),
+            )
+            if not deleted:
+                connection.execute(
+                    "INSERT INTO releases VALUES (?, ?, ?, ?, ?, ?)",
+                    _release_row(repository, payload),
+                )
+        return True
+
+
+def _release_row(repository: str, payload: dict) -> tuple:
+    return (
+        repository,
+        payload.get("tag_name"),
+        (payload.get("published_at") or payload.get("created_at") or "")[:10],
+        bool(payload.get("draft")),
+        bool(payload.get("prerelease")),
+        zlib.compress(json.dumps(payload).encode()),
+    )
+
+
+# Cache used when no cache directory is configured. Only releases downloaded
+# during the current build are read from it, which lets the processes of a
+# parallel build share them. Releases of previous builds are only used when
+# GitHub can't be reached.
+build_cache: ReleaseCache | None = None
+
+
+def on_builder_inited(app) -> None:
+    global build_cache
+    build_cache = ReleaseCache(
+        directory=pathlib.Path(app.doctreedir) / "sphinx_github_changelog",
+        fresh_since=datetime.datetime.now(tz=datetime.UTC),
+    )
+
+
+def from_config(
+    cache_dir: str | None,
+    backend: str = "json",
+    ttl: int = 0,
+    max_staleness: int = 0,
+) -> ReleaseCache | None:
+    """Return the cache configured by the user, if any.
+
+    ``ttl`` and ``max_staleness`` are in seconds, 0 meaning no limit.
+    """
+    if not cache_dir:
+        return build_cache
+    if backend not in BACKENDS:
+        raise exceptions.ChangelogError(
+            f"Unknown cache backend: {backend!r} (expected one of: "
+            f"{', '.join(BACKENDS)})"
+        )
+    cache_class = SQLiteReleaseCache if backend == "sqlite" else ReleaseCache
+    return cache_class(
+        directory=pathlib.Path(cache_dir),
+        ttl=datetime.timedelta(seconds=ttl) if ttl else None,
+        max_staleness=datetime.timedelta(seconds=max_staleness)
+        if max_staleness
+        else None,
+    )
@@ -1,13 +1,42 @@
 from __future__ import annotations
 
+import copy
+import dataclasses
+import datetime
+import functools
+import importlib
+import re
+import string
+from collections.abc import Callable, Sequence
+
 from docutils import nodes
-from docutils.frontend import get_default_settings
 from docutils.parsers.rst import Directive, directives
-from docutils.utils import new_document
-from myst_parser.parsers.docutils_ import Parser
+from sphinx.util import logging
 
+from . import cache as cache_module
 from . import config as config_module
-from . import credentials, exceptions, github_releases, urls
+from . import (
+    credentials,
+    deferred,
+    enrichment,
+    exceptions,
+    export,
+    github_releases,
+    profiling,
+    tags,
+    urls,
+)
+
+RELEASE_OBJECT_TYPE = "changelog-release"
+
+logger = logging.getLogger(__name__)
+
+
+def version_list(argument: str | None) -> list[str]:
+    """Directive option conversion for a comma- or space-separated list."""
+    if argument is None:
+        raise ValueError("argument required but none supplied")
+    return argument.replace(",", " ").split()
 
 
 class ChangelogDirective(Directive):
@@ -20,17 +49,52 @@ class ChangelogDirective(Directive):
         "changelog-url": directives.unchanged,
         "github": directives.unchanged,
         "pypi": directives.unchanged,
+        "inline-releases": directives.nonnegative_int,
+        "tag-pattern": directives.unchanged,
+        "only": version_list,
     }
     has_content = False
     add_index = False
 
     def run(self) -> list[nodes.Node]:
         options = config_module.ChangelogDirectiveOptions.from_options(self.options)
-        config = config_module.ChangelogConfig.from_sphinx_env_config(
-            self.state.document.settings.env.config
-        )
+        env = self.state.document.settings.env
+        config = config_module.ChangelogConfig.from_sphinx_env_config(env.config)
+        std_domain = env.get_domain("std")
+
+        def note_release(name: str, section_id: str) -> None:
+            # The same release may be rendered by several directives (e.g. two
+            # repositories with a 1.0.0): the first one gets the name.
+            if (RELEASE_OBJECT_TYPE, name) in std_domain.objects:
+                return
+            std_domain.note_object(
+                RELEASE_OBJECT_TYPE,
+                name,
+                section_id,
+                location=(env.docname, self.lineno),
+            )
+
+        def warn(message: str) -> None:
+            logger.warning(message, location=(env.docname, self.lineno))
+
+        def collect_releases(
+            repo_url: str, releases: list[export.ExportedRelease]
+        ) -> None:
+            export.note_releases(env, env.docname, repo_url, releases)
+
         try:
-            return compute_changelog(options=options, config=config)
+            with profiling.profiled(config.profile_dir, env.docname, self.lineno):
+                return compute_changelog(
+                    options=options,
+                    config=config,
+                    note_release=note_release,
+                    warn=warn,
+                    # Releases are only kept in the environment when they're
+                    # exported or written to a feed.
+                    collect_releases=collect_releases
+                    if config.export or config.feed
+                    else None,
+                )
         except exceptions.ChangelogError as exc:
             raise self.error(str(exc))
 
@@ -38,6 +102,9 @@ class ChangelogDirective(Directive):
 def compute_changelog(
     options: config_module.ChangelogDirectiveOptions,
     config: config_module.ChangelogConfig,
+    note_release: Callable[[str, str], None] | None = None,
+    warn: Callable[[str], None] | None = None,
+    collect_releases: Callable[[str, list[export.ExportedRelease]], None] | None = None,
 ) -> list[nodes.Node]:
     try:
         github_params = urls.extract_github_params(options=options, config=config)
@@ -49,36 +116,171 @@ def compute_changelog(
         ) from exc
 
     # If token is not provided, try to get it from helpers.
-    # Missing credentials are tolerated: public repositories can still be
-    # queried anonymously via the GitHub REST API.
-    token = config.token
-    if not token:
-        try:
-            token = credentials.get_github_token(host=github_params.hostname)
-        except exceptions.CouldNotExtract:
-            token = None
+    token = credentials.resolve_config_token(config, github_params)
+
+    fetch_settings = FetchSettings.from_config(config)
+
+    tag_pattern = (
+        tags.TagPattern.from_option(options.tag_pattern)
+        if options.tag_pattern
+        else None
+    )
 
     try:
-        releases = github_releases.extract_releases(
+        release_index = github_releases.get_release_index(
             github_params=github_params,
             token=token,
             retries=config.retries,
+            release_filter=fetch_settings.release_filter,
+            cache=fetch_settings.cache,
+            retry_policy=fetch_settings.retry_policy,
         )
     except exceptions.GitHubAPIError:
         if token is None:
             return no_token(changelog_url=options.changelog_url)
         raise
 
+    result: list[nodes.Node] = []
+    if release_index.as_of:
+        if warn:
+            warn(
+                f"Using releases of {github_params.repo_url} cached on "
+                f"{release_index.as_of:%Y-%m-%d %H:%M} UTC: "
+                f"{release_index.fetch_error}"
+            )
+        result.append(outdated_releases_note(as_of=release_index.as_of))
+
     pypi_name = extract_pypi_package_name(url=options.pypi)
+    header = compile_header_template(config.header)
+    renderer = get_renderer(config.renderer)
+
+    if options.only:
+        lookup = release_index.lookup(tag_pattern)
+        missing = [name for name in options.only if name not in lookup]
+        if missing:
+            raise exceptions.ChangelogError(
+                f"Release(s) not found in {github_params.repo_url}: {', '.join(missing)}"
+            )
+        releases = [lookup[name] for name in options.only]
+    else:
+        releases = release_index.for_package(tag_pattern, order=config.order)
+
+    if config.enrich_references:
+        try:
+            references = enrichment.resolve_references(
+                github_params=github_params,
+                token=token,
+                descriptions=[release.description for _, release in releases],
+                retries=config.retries,
+                cache=fetch_settings.cache,
+                retry_policy=fetch_settings.retry_policy,
+            )
+        except exceptions.GitHubAPIError as exc:
+            if warn:
+                warn(f"Could not resolve references of {github_params.repo_url}: {exc}")
+        else:
+            renderer = enrichment.enriching_renderer(renderer, references)
+
+    release_nodes = []
+    exported = []
+    for version, release in releases:
+        # Packages sharing a repository may have the same versions, but not the
+        # same tags.
+        section_id = release_section_id(release.tag_name if tag_pattern else version)
+        node = node_for_release(
+            release=release,
+            pypi_name=pypi_name,
+            version=version,
+            header=header,
+            renderer=renderer,
+            show_assets=config.show_assets,
+            section_id=section_id,
+        )
+        release_nodes.append(node)
+        # Excerpts don't register targets: the full changelog already does.
+        if note_release and not options.only:
+            names = [release.tag_name]
+            if tag_pattern is None and version != release.tag_name:
+                names.append(version)
+            for name in names:
+                note_release(name, section_id)
+                note_release(
+                    f"{github_params.owner}/{github_params.repo}@{name}", section_id
+                )
+        exported.append(
+            export.ExportedRelease(
+                version=version,
+                title=get_release_title(
+                    title=release.name, tag=release.tag_name, version=version
+                ),
+                release=release,
+                pypi_url=pypi_release_url(pypi_name, version),
+                # The section holds the title, the header, then the body
+                # (description and assets).
+                # Copies are detached from the doctree, which isn't pickled
+                # along with them.
+                body=[child.deepcopy() for child in node.children[2:]]
+                if config.feed
+                else [],
+            )
+        )
 
-    if not config.include_prereleases:
-        releases = [r for r in releases if not r.is_prerelease]
+    if collect_releases and not options.only:
+        collect_releases(github_params.repo_url, exported)
+
+    inline = options.inline_releases
+    if inline is None or len(release_nodes) <= inline:
+        return [*result, *release_nodes]
+
+    older = deferred.deferred_releases()
+    older += release_nodes[inline:]
+    return [*result, *release_nodes[:inline], older]
+
+
+@dataclasses.dataclass(frozen=True)
+class FetchSettings:
+    """How to get the releases of a repository, according to the configuration."""
+
+    release_filter: github_releases.ReleaseFilter
+    cache: cache_module.ReleaseCache | None
+    retry_policy: github_releases.RetryPolicy
+
+    @classmethod
+    def from_config(cls, config: config_module.ChangelogConfig) -> FetchSettings:
+        if config.order not in tags.ORDERS:
+            raise exceptions.ChangelogError(
+                f"Unknown {config.prefix}_order: {config.order!r} "
+                f"(expected one of: {', '.join(tags.ORDERS)})"
+            )
+        return cls(
+            release_filter=github_releases.ReleaseFilter(
+                include_drafts=config.include_drafts,
+                include_prereleases=config.include_prereleases,
+                include_tags=compile_tag_regex(
+                    config.include_tags, option="include_tags"
+                ),
+                exclude_tags=compile_tag_regex(
+                    config.exclude_tags, option="exclude_tags"
+                ),
+                published_since=parse_since(config.since),
+            ),
+            cache=cache_module.from_config(
+                config.cache_dir,
+                backend=config.cache_backend,
+                ttl=config.cache_ttl,
+                max_staleness=config.cache_max_staleness,
+            ),
+            retry_policy=github_releases.RetryPolicy.from_config(config),
+        )
 
-    result_nodes = (
-        node_for_release(release=release, pypi_name=pypi_name) for release in releases
-    )
 
-    return [n for n in result_nodes if n is not None]
+def outdated_releases_note(as_of: datetime.datetime) -> nodes.Node:
+    par = nodes.paragraph()
+    par += nodes.Text(
+        "GitHub could not be reached: this changelog shows the releases as of "
+        f"{as_of:%Y-%m-%d %H:%M} UTC."
+    )
+    return nodes.note("", par)
 
 
 def no_token(changelog_url: str | None) -> list[nodes.Node]:
@@ -108,6 +310,30 @@ def no_token(changelog_url: str | None) -> list[nodes.Node]:
     return result
 
 
+def compile_tag_regex(value: str | None, option: str) -> re.Pattern | None:
+    if not value:
+        return None
+    try:
+        return re.compile(value)
+    except re.error as exc:
+        raise exceptions.ChangelogError(
+            f"Invalid regular expression for {config_module.ChangelogConfig.prefix}_"
+            f"{option}: {value!r} ({exc})"
+        ) from exc
+
+
+def parse_since(value: str | None) -> datetime.date | None:
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError as exc:
+        raise exceptions.ChangelogError(
+            f"Invalid date for {config_module.ChangelogConfig.prefix}_since: "
+            f"{value!r} (expected YYYY-MM-DD)"
+        ) from exc
+
+
 def extract_pypi_package_name(url: str | None) -> str | None:
     if not url:
         return None
@@ -123,65 +349,276 @@ def extract_pypi_package_name(url: str | None) -> str | None:
     return stripped_url[len(prefix) :]
 
 
-def get_release_title(title: str | None, tag: str):
-    version = tag.removeprefix("v")
+def pypi_release_url(pypi_name: str | None, version: str) -> str | None:
+    if not pypi_name:
+        return None
+    return f"https://pypi.org/project/{pypi_name}/{version}/"
+
+
+def get_release_title(title: str | None, tag: str, version: str | None = None):
+    version = version or tags.default_version(tag)
     if not title:
         return version
     return title if version in title else f"{version}: {title}"
 
 
+def release_section_id(version: str) -> str:
+    return nodes.make_id("release-" + version)
+
+
 def node_for_release(
     release: github_releases.Release,
     pypi_name: str | None = None,
-) -> nodes.Node | None:
-    if release.is_draft:
-        return None  # For now, draft releases are excluded
-
+    version: str | None = None,
+    header: HeaderTemplate | None = None,
+    renderer: Renderer | None = None,
+    show_assets: bool = False,
+    section_id: str | None = None,
+) -> nodes.Node:
     tag = release.tag_name
-    version = tag.removeprefix("v")
+    version = version or tags.default_version(tag)
     title = release.name
-    date = release.published_at.isoformat()
-    title = get_release_title(title=title, tag=tag)
+    title = get_release_title(title=title, tag=tag, version=version)
 
     # Section
-    id_section = nodes.make_id("release-" + version)
-    section = nodes.section(ids=[id_section])
+    section = nodes.section(ids=[section_id or release_section_id(version)])
 
     section += nodes.title(text=title)
 
-    subtitle = nodes.emphasis()
-    subtitle += nodes.Text(f"Released on {date} - ")
+    header = header or compile_header_template(DEFAULT_HEADER)
+    section += header.render(release=release, version=version, pypi_name=pypi_name)
 
-    # Links
-    subtitle += nodes.reference("", "GitHub", refuri=release.url)
-    if pypi_name:
-        subtitle += nodes.Text(" - ")
-        url = f"https://pypi.org/project/{pypi_name}/{version}/"
-        subtitle += nodes.reference("", "PyPI", refuri=url)
+    section += (renderer or render_description)(release.description)
+    if show_assets and release.assets:
+        section += assets_list(release.assets)
+    return section
 
-    subtitle_paragraph = nodes.paragraph()
-    subtitle_paragraph += subtitle
-    section += subtitle_paragraph
 
-    section += convert_markdown_to_nodes(release.description)
-    return section
+def assets_list(assets: Sequence[github_releases.Asset]) -> nodes.Node:
+    bullet_list = nodes.bullet_list(classes=["changelog-assets"])
+    for asset in assets:
+        downloads = f"{asset.download_count} download" + (
+            "" if asset.download_count == 1 else "s"
+        )
+        par = nodes.paragraph()
+        par += nodes.reference("", asset.name, refuri=asset.url)
+        par += nodes.Text(f" ({format_size(asset.size)}, {downloads})")
+        bullet_list += nodes.list_item("", par)
+    return bullet_list
 
 
-def convert_markdown_to_nodes(markdown: str | None) -> list[nodes.Node]:
+def format_size(size: int) -> str:
+    if size < 1000:
+        return f"{size} B"
+    value = size / 1000
+    for unit in ("kB", "MB"):
+        if value < 1000:
+            return f"{value:.1f} {unit}"
+        value /= 1000
+    return f"{value:.1f} GB"
+
+
+DEFAULT_HEADER = "Released on {date} - {links}"
+HEADER_LINKS = ("github", "pypi")
+HEADER_FIELDS = ("date", "version", "tag", "links", *HEADER_LINKS)
+
+
+@dataclasses.dataclass(frozen=True)
+class HeaderTemplate:
+    """Subtitle of each release, e.g. ``Released on {date:%B %d, %Y} - {github}``.
+
+    ``{links}`` stands for all the available links (GitHub, and PyPI if the
+    directive has a ``:pypi:`` URL), separated by `` - ``.
     """
-    Convert markdown to docutils nodes
+
+    # (literal text, field name, format spec), as parsed by string.Formatter
+    parts: tuple[tuple[str, str | None, str], ...]
+
+    def render(
+        self, release: github_releases.Release, version: str, pypi_name: str | None
+    ) -> nodes.Node:
+        links = {"github": ("GitHub", release.url)}
+        if pypi_url := pypi_release_url(pypi_name, version):
+            links["pypi"] = ("PyPI", pypi_url)
+        values = {
+            "date": release.published_at,
+            "version": version,
+            "tag": release.tag_name,
+        }
+
+        subtitle = nodes.emphasis()
+        # Consecutive bits of text are merged into a single node.
+        text = ""
+        for literal, field, spec in self.parts:
+            text += literal
+            if field in values:
+                text += format(values[field], spec)
+                continue
+            if field == "links":
+                references = list(links.values())
+            elif field in links:
+                references = [links[field]]
+            else:
+                continue
+            for i, (name, url) in enumerate(references):
+                if i:
+                    text += " - "
+                if text:
+                    subtitle += nodes.Text(text)
+                    text = ""
+                subtitle += nodes.reference("", name, refuri=url)
+        if text:
+            subtitle += nodes.Text(text)
+
+        paragraph = nodes.paragraph()
+        paragraph += subtitle
+        return paragraph
+
+
+@functools.cache
+def compile_header_template(template: str) -> HeaderTemplate:
+    option = f"{config_module.ChangelogConfig.prefix}_header"
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError as exc:
+        raise exceptions.ChangelogError(
+            f"Invalid {option}: {template!r} ({exc})"
+        ) from exc
+    # Format specs are tried on these, so that invalid ones fail here rather
+    # than for each release.
+    samples = {"date": datetime.date(2000, 1, 1), "version": "1.0", "tag": "1.0"}
+    for _, field, spec, conversion in parsed:
+        if field is None:
+            continue
+        if field not in HEADER_FIELDS:
+            raise exceptions.ChangelogError(
+                f"Invalid {option}: unknown field {{{field}}} (expected one of: "
+                f"{', '.join(HEADER_FIELDS)})"
+            )
+        if conversion:
+            raise exceptions.ChangelogError(
+                f"Invalid {option}: conversions such as {{{field}!{conversion}}} "
+                "are not supported"
+            )
+        if field not in samples:
+            if spec:
+                raise exceptions.ChangelogError(
+                    f"Invalid {option}: {{{field}}} doesn't take a format spec"
+                )
+            continue
+        try:
+            format(samples[field], spec or "")
+        except ValueError as exc:
+            raise exceptions.ChangelogError(
+                f"Invalid {option}: {{{field}:{spec}}} ({exc})"
+            ) from exc
+    return HeaderTemplate(
+        parts=tuple((literal, field, spec or "") for literal, field, spec, _ in parsed)
+    )
+
+
+Renderer = Callable[[str | None], list[nodes.Node]]
+
+# Anything that could be markdown syntax: inline markup, HTML, entities,
+# tables, code blocks, lists, headings, hard line breaks and autolinks (including
+# email addresses, but not @mentions).
+MARKDOWN_SYNTAX_RE = re.compile(
+    r"[\\`*_\[\]<>#|~!&]|^(\t| {4})|^\s*([-+=]|\d+[.)])| {2,}$|://|www\.|[\w.+-]@",
+    flags=re.MULTILINE,
+)
+PARAGRAPH_SEPARATOR_RE = re.compile(r"\n\s*\n")
+
+
+def convert_plain_text_to_nodes(text: str) -> list[nodes.Node] | None:
+    """Fast path for bodies without any markdown syntax: return their paragraphs
+    the way MyST would, or None if the text may need MyST.
     """
+    text = text.replace("\r\n", "\n")
+    if MARKDOWN_SYNTAX_RE.search(text):
+        return None
+    return [
+        nodes.paragraph("", "\n".join(line.strip() for line in paragraph.split("\n")))
+        for paragraph in PARAGRAPH_SEPARATOR_RE.split(text.strip())
+    ]
+
+
+def render_description(markdown: str | None) -> list[nodes.Node]:
+    """Default renderer: plain text is converted directly, the rest with MyST."""
     if not markdown or not markdown.strip():
         return []
-    parser = Parser()
-    settings = get_default_settings(parser)
+    result = convert_plain_text_to_nodes(markdown)
+    if result is None:
+        result = convert_markdown_to_nodes(markdown)
+    return result
+
+
+def get_renderer(name: str) -> Renderer:
+    """Return the renderer of release descriptions: ``auto`` (the default),
+    ``myst``, or the import path of a function with the same signature as
+    `convert_markdown_to_nodes`.
+    """
+    if name == "auto":
+        return render_description
+    if name == "myst":
+        return convert_markdown_to_nodes
+    module_name, _, attribute = name.rpartition(".")
+    try:
+        return getattr(importlib.import_module(module_name), attribute)
+    except (ImportError, AttributeError, ValueError) as exc:
+        raise exceptions.ChangelogError(
+            f"Invalid {config_module.ChangelogConfig.prefix}_renderer: {name!r} "
+            "(expected auto, myst, or the import path of a function)"
+        ) from exc
+
+
+@functools.cache
+def _markdown_settings():
+    # Building the settings parses the options of docutils and MyST, which
+    # would cost more than parsing most descriptions.
+    from docutils.frontend import get_default_settings
+    from myst_parser.parsers.docutils_ import Parser
+
+    settings = get_default_settings(Parser())
 
     settings.myst_gfm_only = True
 
     settings.myst_heading_anchors = 3
 
+    return settings
+
+
+def convert_markdown_to_nodes(markdown: str | None) -> list[nodes.Node]:
+    """
+    Convert markdown to docutils nodes
+    """
+    if not markdown or not markdown.strip():
+        return []
+    # Imported here: MyST is slow to import, and plain text descriptions
+    # don't need it.
+    from docutils.utils import new_document
+    from myst_parser.parsers.docutils_ import Parser
+
+    # Copied, as the parser fills in the settings it reads.
+    settings = copy.copy(_markdown_settings())
+
     document = new_document("changelog_text", settings=settings)
 
-    parser.parse(markdown, document)
+    Parser().parse(markdown, document)
+
+    return detach_children(document)
+
 
-    return document.children
+def detach_children(document: nodes.document) -> list[nodes.Node]:
+    """
+    Take the children out of their parse document, so that the document (with
+    its settings, reporter and indexes) is freed as soon as they're grafted
+    elsewhere, instead of living as long as any of the nodes does.
+    """
+    for node in document.findall(include_self=False):
+        # docutils accepts None (the default), its type stubs don't.
+        node.document = None  # pyright: ignore[reportAttributeAccessIssue]
+    children = document.children
+    document.children = []
+    for child in children:
+        child.parent = None
+    return children
@@ -0,0 +1,87 @@
+"""
+Circuit breaker for GitHub hosts.
+
+When a host (e.g. a GitHub Enterprise Server instance) keeps failing, every
+directive of the build would otherwise go through the whole retry cycle
+before giving up. After ``threshold`` consecutive failures, the breaker of the
+host opens: calls fail right away, so that the changelog falls back to cached
+releases (or fails) without waiting. Once ``cooldown`` seconds have passed, a
+single call is let through to probe the host: if it succeeds the breaker
+closes, otherwise it opens again. A ``threshold`` of 0 disables the breaker.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import threading
+import time
+from collections.abc import Callable
+
+from . import exceptions
+
+
+class CircuitOpenError(exceptions.GitHubAPIError):
+    pass
+
+
+@dataclasses.dataclass
+class CircuitBreaker:
+    hostname: str
+    threshold: int = 3
+    cooldown: float = 60
+    clock: Callable[[], float] = time.monotonic
+
+    failures: int = 0
+    opened_at: float | None = None
+    probing: bool = False
+    lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def before_call(self) -> None:
+        """Raise `CircuitOpenError` if the host shouldn't be called now."""
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.cooldown - self.clock()
+            if remaining <= 0 and not self.probing:
+                self.probing = True
+                return
+            raise CircuitOpenError(
+                f"Not calling GitHub API on {self.hostname} after "
+                f"{self.failures} consecutive failures, retrying in "
+                f"{max(remaining, 0):.0f}s."
+            )
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.threshold and (self.probing or self.failures >= self.threshold):
+                self.opened_at = self.clock()
+            self.probing = False
+
+
+_circuit_breakers: dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(
+    hostname: str, threshold: int = 3, cooldown: float = 60
+) -> CircuitBreaker:
+    with _circuit_breakers_lock:
+        if hostname not in _circuit_breakers:
+            _circuit_breakers[hostname] = CircuitBreaker(
+                hostname=hostname, threshold=threshold, cooldown=cooldown
+            )
+        return _circuit_breakers[hostname]
+
+
+def reset_circuit_breakers(*args) -> None:
+    """Give every host a new chance at the start of a build (``builder-inited``)."""
+    _circuit_breakers.clear()
@@ -0,0 +1,282 @@
+"""
+Command line interface for sphinx-github-changelog.
+
+``sphinx-github-changelog fetch`` downloads the releases of one or more
+repositories into the release cache, so that documentation builds using the
+same ``sphinx_github_changelog_cache_dir`` don't need to call GitHub.
+
+``sphinx-github-changelog export`` writes the changelog of a repository as
+JSON, Markdown or plain text, without running Sphinx.
+
+``sphinx-github-changelog webhook`` serves the `webhook` application, which
+updates the release cache from GitHub's release events.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import pathlib
+import sys
+from collections.abc import Sequence
+
+from . import cache as cache_module
+from . import (
+    changelog,
+    credentials,
+    exceptions,
+    export,
+    github_releases,
+    tags,
+    urls,
+    webhook,
+)
+from . import config as config_module
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="sphinx-github-changelog",
+        description="Build a sphinx changelog from GitHub Releases",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch = subparsers.add_parser(
+        "fetch",
+        help="Download releases into the release cache",
+        description=(
+            "Download the releases of GitHub repositories into the release cache, "
+            "ahead of the documentation build."
+        ),
+    )
+    fetch.add_argument(
+        "--github",
+        action="append",
+        help=(
+            "URL to the releases page of the repository (can be repeated). "
+            "Defaults to the repository of the git remotes of the current directory."
+        ),
+    )
+    add_common_arguments(fetch)
+
+    export_parser = subparsers.add_parser(
+        "export",
+        help="Write the changelog as JSON, Markdown or text",
+        description=(
+            "Write the changelog of a GitHub repository as JSON, Markdown or plain "
+            "text, using the sphinx_github_changelog_* environment variables as "
+            "configuration."
+        ),
+    )
+    export_parser.add_argument(
+        "--format",
+        choices=export.FORMATS,
+        default="json",
+        help="Output format (default: json).",
+    )
+    export_parser.add_argument(
+        "--github",
+        help=(
+            "URL to the releases page of the repository. Defaults to the "
+            "repository of the git remotes of the current directory."
+        ),
+    )
+    export_parser.add_argument(
+        "--pypi",
+        help="URL to the PyPI project page, to link each release to PyPI.",
+    )
+    export_parser.add_argument(
+        "--tag-pattern",
+        help="Only export the releases whose tag matches this pattern.",
+    )
+    export_parser.add_argument(
+        "--output",
+        "-o",
+        type=pathlib.Path,
+        help="File to write to. Defaults to the standard output.",
+    )
+    add_common_arguments(export_parser)
+
+    webhook_parser = subparsers.add_parser(
+        "webhook",
+        help="Update the release cache from GitHub webhooks",
+        description=(
+            "Serve an endpoint for the release webhooks of GitHub repositories, "
+            "which updates their releases in the release cache. Webhooks are "
+            f"authenticated with the secret in the {webhook.SECRET_ENV_VAR} "
+            "environment variable."
+        ),
+    )
+    webhook_parser.add_argument(
+        "--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)."
+    )
+    webhook_parser.add_argument(
+        "--port", type=int, default=8000, help="Port to listen on (default: 8000)."
+    )
+    add_cache_arguments(webhook_parser)
+    return parser
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--cache-dir",
+        help=(
+            "Directory of the release cache. Defaults to the "
+            "SPHINX_GITHUB_CHANGELOG_CACHE_DIR environment variable."
+        ),
+    )
+    parser.add_argument(
+        "--cache-backend",
+        choices=cache_module.BACKENDS,
+        help=(
+            "Storage of the release cache. Defaults to the "
+            "SPHINX_GITHUB_CHANGELOG_CACHE_BACKEND environment variable, or json."
+        ),
+    )
+
+
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    add_cache_arguments(parser)
+    parser.add_argument(
+        "--token",
+        help=(
+            "GitHub API token, or tokens separated by commas. Defaults to the "
+            "same sources as the Sphinx extension."
+        ),
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        help="Number of retries after failed calls to GitHub API.",
+    )
+
+
+def get_cache(config: config_module.ChangelogConfig) -> cache_module.ReleaseCache:
+    cache = cache_module.from_config(config.cache_dir, backend=config.cache_backend)
+    if cache is None:
+        raise exceptions.ChangelogError(
+            "No cache directory: use --cache-dir or the "
+            "SPHINX_GITHUB_CHANGELOG_CACHE_DIR environment variable"
+        )
+    return cache
+
+
+def fetch(
+    config: config_module.ChangelogConfig, github_urls: Sequence[str | None]
+) -> None:
+    cache = get_cache(config)
+
+    for github_url in github_urls:
+        options = config_module.ChangelogDirectiveOptions(github=github_url)
+        try:
+            github_params = urls.extract_github_params(options=options, config=config)
+        except exceptions.CouldNotExtract as exc:
+            raise exceptions.ChangelogError(
+                "No --github release URL provided and unable to determine it from "
+                "git remotes."
+            ) from exc
+
+        token = credentials.resolve_config_token(config, github_params)
+        releases = github_releases.extract_releases(
+            github_params=github_params,
+            token=token,
+            retries=config.retries,
+            cache=cache,
+            refresh=True,
+            retry_policy=github_releases.RetryPolicy.from_config(config),
+        )
+        stats = github_releases.transfer_stats[github_params.repo_url]
+        print(
+            f"Fetched {len(releases)} releases of {github_params.repo_url} "
+            f"into {cache.path(github_params)} ({stats.downloaded_bytes} bytes "
+            f"downloaded, compression ratio {stats.compression_ratio:.1f})"
+        )
+
+
+def export_changelog(
+    config: config_module.ChangelogConfig,
+    options: config_module.ChangelogDirectiveOptions,
+    format: str,
+) -> str:
+    try:
+        github_params = urls.extract_github_params(options=options, config=config)
+    except exceptions.CouldNotExtract as exc:
+        raise exceptions.ChangelogError(
+            "No --github release URL provided and unable to determine it from "
+            "git remotes."
+        ) from exc
+
+    fetch_settings = changelog.FetchSettings.from_config(config)
+    release_index = github_releases.get_release_index(
+        github_params=github_params,
+        token=credentials.resolve_config_token(config, github_params),
+        retries=config.retries,
+        release_filter=fetch_settings.release_filter,
+        cache=fetch_settings.cache,
+        retry_policy=fetch_settings.retry_policy,
+    )
+    tag_pattern = (
+        tags.TagPattern.from_option(options.tag_pattern)
+        if options.tag_pattern
+        else None
+    )
+    pypi_name = changelog.extract_pypi_package_name(url=options.pypi)
+    return export.export(
+        [
+            export.ExportedRelease(
+                version=version,
+                title=changelog.get_release_title(
+                    title=release.name, tag=release.tag_name, version=version
+                ),
+                release=release,
+                pypi_url=changelog.pypi_release_url(pypi_name, version),
+            )
+            for version, release in release_index.for_package(
+                tag_pattern, order=config.order
+            )
+        ],
+        format=format,
+    )
+
+
+def serve_webhook(config: config_module.ChangelogConfig, host: str, port: int) -> None:
+    from wsgiref.simple_server import make_server
+
+    application = webhook.make_app(
+        cache=get_cache(config), secret=os.environ.get(webhook.SECRET_ENV_VAR, "")
+    )
+    with make_server(host, port, application) as server:
+        print(f"Listening for GitHub webhooks on http://{host}:{port}/")
+        server.serve_forever()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = get_parser().parse_args(argv)
+    config = config_module.ChangelogConfig.from_env()
+    for name in ("cache_dir", "cache_backend", "token", "retries"):
+        if (value := getattr(args, name, None)) is not None:
+            setattr(config, name, value)
+
+    try:
+        if args.command == "export":
+            content = export_changelog(
+                config=config,
+                options=config_module.ChangelogDirectiveOptions(
+                    github=args.github,
+                    pypi=args.pypi,
+                    tag_pattern=args.tag_pattern,
+                ),
+                format=args.format,
+            )
+            if args.output:
+                args.output.write_text(content, encoding="utf-8")
+            else:
+                sys.stdout.write(content)
+        elif args.command == "webhook":
+            serve_webhook(config=config, host=args.host, port=args.port)
+        else:
+            fetch(config=config, github_urls=args.github or [None])
+    except exceptions.ChangelogError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    return 0
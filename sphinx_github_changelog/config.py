@@ -11,54 +11,134 @@ class ChangelogDirectiveOptions:
     changelog_url: str | None = None
     github: str | None = None
     pypi: str | None = None
+    inline_releases: int | None = None
+    tag_pattern: str | None = None
+    only: list[str] | None = None
 
     @classmethod
-    def from_options(cls, options: dict[str, str]):
+    def from_options(cls, options: dict[str, Any]):
         return cls(
             changelog_url=options.get("changelog-url"),
             github=options.get("github"),
             pypi=options.get("pypi"),
+            inline_releases=options.get("inline-releases"),
+            tag_pattern=options.get("tag-pattern"),
+            only=options.get("only"),
         )
 
 
 @dataclasses.dataclass
 class ChangelogConfig:
     token: str | None = None
+    app_id: str | None = None
+    app_private_key: str | None = None
+    app_installation_id: str | None = None
     root_repo: str | None = None
+    include_drafts: bool = False
     include_prereleases: bool = True
+    include_tags: str | None = None
+    exclude_tags: str | None = None
+    since: str | None = None
+    order: str = "date"
+    header: str = "Released on {date} - {links}"
+    renderer: str = "auto"
+    show_assets: bool = False
+    enrich_references: bool = False
     retries: int = 3
+    connect_timeout: float = 10
+    read_timeout: float = 30
+    total_timeout: float = 120
+    retry_statuses: str = "429,502,503,504"
+    retry_transport_errors: bool = True
+    circuit_breaker_threshold: int = 3
+    circuit_breaker_cooldown: int = 60
+    cache_dir: str | None = None
+    cache_backend: str = "json"
+    cache_ttl: int = 0
+    cache_max_staleness: int = 0
+    export: str = ""
+    feed: str = ""
+    feed_limit: int = 20
+    profile_dir: str | None = None
 
     prefix: ClassVar[str] = "sphinx_github_changelog"
 
     @classmethod
-    def get_config_defaults(cls) -> Iterator[tuple[str, str | bool | int | None]]:
+    def get_config_defaults(
+        cls,
+    ) -> Iterator[tuple[str, str | bool | int | float | None]]:
         for field in dataclasses.fields(cls):
             option_name = f"{cls.prefix}_{field.name}"
             env_value = os.environ.get(option_name.upper())
             if field.type == "bool":
-                default: str | bool | int | None = (
+                default: str | bool | int | float | None = (
                     env_value.lower() not in ("0", "false", "no")
                     if env_value
                     else bool(field.default)
                 )
-            elif field.type == "int":
+            elif field.type in ("int", "float"):
+                convert = int if field.type == "int" else float
                 if env_value is not None:
-                    default = int(env_value)
-                elif isinstance(field.default, int):
-                    default = field.default
+                    default = convert(env_value)
+                elif isinstance(field.default, int | float):
+                    default = convert(field.default)
                 else:
                     raise TypeError(
                         f"Unexpected default type for {field.name}: {field.default!r}"
                     )
-            else:
+            elif env_value is not None:
                 default = env_value
+            elif isinstance(field.default, str):
+                default = field.default
+            else:
+                default = None
             yield option_name, default
 
     @classmethod
     def from_sphinx_env_config(cls, sphinx_config: Any):
         return cls(
             token=sphinx_config.sphinx_github_changelog_token,
+            app_id=sphinx_config.sphinx_github_changelog_app_id,
+            app_private_key=sphinx_config.sphinx_github_changelog_app_private_key,
+            app_installation_id=sphinx_config.sphinx_github_changelog_app_installation_id,
             root_repo=sphinx_config.sphinx_github_changelog_root_repo,
+            include_drafts=sphinx_config.sphinx_github_changelog_include_drafts,
             include_prereleases=sphinx_config.sphinx_github_changelog_include_prereleases,
+            include_tags=sphinx_config.sphinx_github_changelog_include_tags,
+            exclude_tags=sphinx_config.sphinx_github_changelog_exclude_tags,
+            since=sphinx_config.sphinx_github_changelog_since,
+            order=sphinx_config.sphinx_github_changelog_order,
+            header=sphinx_config.sphinx_github_changelog_header,
+            renderer=sphinx_config.sphinx_github_changelog_renderer,
+            show_assets=sphinx_config.sphinx_github_changelog_show_assets,
+            enrich_references=sphinx_config.sphinx_github_changelog_enrich_references,
             retries=sphinx_config.sphinx_github_changelog_retries,
+            connect_timeout=sphinx_config.sphinx_github_changelog_connect_timeout,
+            read_timeout=sphinx_config.sphinx_github_changelog_read_timeout,
+            total_timeout=sphinx_config.sphinx_github_changelog_total_timeout,
+            retry_statuses=sphinx_config.sphinx_github_changelog_retry_statuses,
+            retry_transport_errors=sphinx_config.sphinx_github_changelog_retry_transport_errors,
+            circuit_breaker_threshold=sphinx_config.sphinx_github_changelog_circuit_breaker_threshold,
+            circuit_breaker_cooldown=sphinx_config.sphinx_github_changelog_circuit_breaker_cooldown,
+            cache_dir=sphinx_config.sphinx_github_changelog_cache_dir,
+            cache_backend=sphinx_config.sphinx_github_changelog_cache_backend,
+            cache_ttl=sphinx_config.sphinx_github_changelog_cache_ttl,
+            cache_max_staleness=sphinx_config.sphinx_github_changelog_cache_max_staleness,
+            export=sphinx_config.sphinx_github_changelog_export,
+            feed=sphinx_config.sphinx_github_changelog_feed,
+            feed_limit=sphinx_config.sphinx_github_changelog_feed_limit,
+            profile_dir=sphinx_config.sphinx_github_changelog_profile_dir,
         )
+
+    @classmethod
+    def from_env(cls):
+        """Build the configuration from the environment variables only, for use
+        outside of Sphinx.
+        """
+        prefix = f"{cls.prefix}_"
+        # get_config_defaults() already converts each value to its field's type.
+        values: dict[str, Any] = {
+            option_name.removeprefix(prefix): value
+            for option_name, value in cls.get_config_defaults()
+        }
+        return cls(**values)
@@ -2,16 +2,16 @@
 Credential helpers for sphinx-github-changelog.
 
 Provides functions to obtain a GitHub token using environment variables,
-git credential helpers, or the GitHub CLI.
+git credential helpers, the GitHub CLI, or a GitHub App (see `github_app`).
 """
 
 from __future__ import annotations
 
 import os
-import subprocess
 from contextlib import suppress
 
-from . import exceptions
+from . import config as config_module
+from . import exceptions, github_app, github_releases, urls
 
 
 def get_token_from_env() -> str | None:
@@ -46,6 +46,8 @@ def get_token_from_git_credential(host: str) -> str | None:
     >>> token is None or isinstance(token, str)
     True
     """
+    import subprocess
+
     with suppress(subprocess.CalledProcessError, FileNotFoundError):
         resp = subprocess.check_output(
             ["git", "credential", "fill"],
@@ -61,6 +63,8 @@ def get_token_from_git_credential(host: str) -> str | None:
 
 def get_token_from_gh_cli(host: str) -> str | None:
     """Get a GitHub token using the GitHub CLI (gh auth token)."""
+    import subprocess
+
     with suppress(subprocess.CalledProcessError, FileNotFoundError):
         token = subprocess.check_output(
             ["gh", "auth", "token", f"--hostname={host}"], text=True
@@ -88,3 +92,48 @@ def get_github_token(host: str) -> str:
     if not token:
         raise exceptions.CouldNotExtract("No GitHub token found")
     return token
+
+
+def resolve_token(token: str | None, host: str) -> str | None:
+    """
+    Return the configured token, or else the one found by `get_github_token`.
+
+    Missing credentials are tolerated: public repositories can still be
+    queried anonymously via the GitHub REST API. The result may hold several
+    tokens (see `token_pool`).
+    """
+    if token:
+        return token
+    try:
+        return get_github_token(host=host)
+    except exceptions.CouldNotExtract:
+        return None
+
+
+def resolve_config_token(
+    config: config_module.ChangelogConfig, github_params: urls.GitHubParams
+) -> github_releases.Token:
+    """
+    Return the token(s) to call GitHub with for the repository: the
+    installation token of the configured GitHub App if any, pooled with the
+    token found by `resolve_token` (see `token_pool`).
+
+    With a GitHub App, this is a function minting the installation token (see
+    `github_releases.Token`), so that builds reading their releases from the
+    cache don't need GitHub at all.
+    """
+    token = resolve_token(config.token, host=github_params.hostname)
+    app = github_app.App.from_config(config)
+    if app is None:
+        return token
+
+    def with_app_token() -> str:
+        app_token = github_app.get_installation_token(
+            app,
+            github_params=github_params,
+            retries=config.retries,
+            cache_dir=config.cache_dir,
+        )
+        return ",".join(filter(None, [app_token, token]))
+
+    return with_app_token
@@ -0,0 +1,70 @@
+"""
+Lazy-loading of older releases for HTML builders.
+
+Releases past the directive's ``:inline-releases:`` limit are wrapped in a
+``deferred_releases`` node. HTML builders render them as usual, but the
+resulting markup is moved into a JSON file next to the page, and replaced by
+a placeholder that the bundled script fetches on demand. Other builders render
+the releases inline.
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib
+from html import escape
+from typing import Any
+
+from docutils import nodes
+from sphinx.util.osutil import relative_uri
+
+STATIC_DIR = pathlib.Path(__file__).parent / "static"
+SCRIPT = "sphinx_github_changelog.js"
+FRAGMENTS_DIR = "_changelog"
+DEFERRING_BUILDERS = ("html", "dirhtml")
+
+
+class deferred_releases(nodes.General, nodes.Element):
+    """Container for release sections that HTML builders load on demand."""
+
+
+def on_config_inited(app, config) -> None:
+    config.html_static_path.append(str(STATIC_DIR))
+
+
+def on_doctree_resolved(app, doctree: nodes.document, docname: str) -> None:
+    for index, node in enumerate(list(doctree.findall(deferred_releases))):
+        if app.builder.name not in DEFERRING_BUILDERS:
+            node.replace_self(node.children)
+            continue
+        node["src"] = f"{FRAGMENTS_DIR}/{docname}/{index}.json"
+
+
+def on_html_page_context(
+    app, pagename: str, templatename: str, context: dict, doctree: Any
+) -> None:
+    if doctree is not None and next(doctree.findall(deferred_releases), None):
+        app.add_js_file(SCRIPT, loading_method="defer")
+
+
+def visit_deferred_releases_html(self, node: deferred_releases) -> None:
+    node["body_start"] = len(self.body)
+
+
+def depart_deferred_releases_html(self, node: deferred_releases) -> None:
+    start = node["body_start"]
+    fragment = "".join(self.body[start:])
+    del self.body[start:]
+
+    path = pathlib.Path(self.builder.outdir, node["src"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"html": fragment}), encoding="utf-8")
+
+    src = relative_uri(
+        self.builder.get_target_uri(self.builder.current_docname), node["src"]
+    )
+    self.body.append(
+        f'<div class="changelog-deferred" data-src="{escape(src)}">'
+        '<button type="button">Show older releases</button>'
+        "</div>\n"
+    )
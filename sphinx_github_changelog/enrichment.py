@@ -0,0 +1,213 @@
+"""
+Enrichment of issue, pull request and user references in release descriptions.
+
+``#123`` references link to the issue or pull request (with its title as a
+tooltip), and ``@user`` references to the user's profile (with their avatar in
+HTML output). References of all the releases of a changelog are extracted and
+de-duplicated first, then the ones that aren't in the release cache yet are
+resolved by batches of `BATCH_SIZE` with GitHub's GraphQL API, so a changelog
+costs a handful of API calls at most, and none once its references are cached.
+"""
+
+from __future__ import annotations
+
+import html
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any
+
+from docutils import nodes
+
+from . import github_releases, urls
+
+if TYPE_CHECKING:
+    from .cache import ReleaseCache
+
+# Number of aliases (references) per GraphQL query.
+BATCH_SIZE = 100
+
+REFERENCE_RE = re.compile(
+    # Not part of a word, an HTML entity or a URL fragment.
+    r"(?<![\w&/#])#(?P<number>\d+)\b"
+    # Not part of an email address. Logins are made of alphanumeric characters
+    # and single hyphens, up to 39 characters.
+    r"|(?<![\w.@/`-])@(?P<login>[A-Za-z0-9](?:[A-Za-z0-9]|-(?=[A-Za-z0-9])){0,38})\b"
+)
+
+# Issue and pull request numbers are GraphQL Ints (32-bit): a larger one would
+# make the whole query fail.
+MAX_NUMBER = 2**31 - 1
+
+# Nodes whose text is left alone.
+SKIPPED_NODES = (nodes.FixedTextElement, nodes.literal, nodes.reference)
+
+
+def reference_key(match: re.Match) -> str:
+    if match["number"]:
+        return f"#{int(match['number'])}"
+    return f"@{match['login'].lower()}"
+
+
+def extract_references(descriptions: Iterable[str | None]) -> set[str]:
+    """Return the keys (``#123`` or ``@user``) of the references found in the
+    descriptions.
+    """
+    return {
+        reference_key(match)
+        for description in descriptions
+        if description
+        for match in REFERENCE_RE.finditer(description)
+        if not match["number"] or int(match["number"]) <= MAX_NUMBER
+    }
+
+
+def build_query(github_params: urls.GitHubParams, keys: Iterable[str]) -> str:
+    numbers, users = [], []
+    for i, key in enumerate(keys):
+        if key.startswith("#"):
+            numbers.append(
+                f"n{key[1:]}: issueOrPullRequest(number: {key[1:]}) "
+                "{ __typename ... on Issue { title url } "
+                "... on PullRequest { title url } }"
+            )
+        else:
+            users.append(
+                f"u{i}: user(login: {json.dumps(key[1:])}) "
+                "{ login url avatarUrl(size: 40) }"
+            )
+    repository = (
+        f"repository(owner: {json.dumps(github_params.owner)}, "
+        f"name: {json.dumps(github_params.repo)}) {{ {' '.join(numbers)} }}"
+    )
+    return f"query {{ {repository if numbers else ''} {' '.join(users)} }}"
+
+
+def parse_response(keys: Iterable[str], data: dict[str, Any]) -> dict[str, Any]:
+    """Map each key to the resolved reference, or None if it doesn't exist."""
+    repository = data.get("repository") or {}
+    result: dict[str, Any] = {}
+    for i, key in enumerate(keys):
+        if key.startswith("#"):
+            item = repository.get(f"n{key[1:]}")
+            result[key] = item and {
+                "type": item["__typename"],
+                "title": item["title"],
+                "url": item["url"],
+            }
+        else:
+            user = data.get(f"u{i}")
+            result[key] = user and {
+                "login": user["login"],
+                "url": user["url"],
+                "avatar_url": user["avatarUrl"],
+            }
+    return result
+
+
+def _batches(keys: list[str]) -> Iterator[list[str]]:
+    for start in range(0, len(keys), BATCH_SIZE):
+        yield keys[start : start + BATCH_SIZE]
+
+
+def resolve_references(
+    github_params: urls.GitHubParams,
+    token: github_releases.Token,
+    descriptions: Iterable[str | None],
+    retries: int,
+    cache: ReleaseCache | None = None,
+    retry_policy: github_releases.RetryPolicy | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Return the existing references of the descriptions, by key."""
+    wanted = extract_references(descriptions)
+    known = cache.load_references(github_params) if cache else {}
+    missing = sorted(wanted - known.keys())
+    resolved_token = github_releases.resolve_lazy_token(token) if missing else None
+    for keys in _batches(missing):
+        data = github_releases.graphql_call(
+            url=github_params.graphql_api_url,
+            token=resolved_token,
+            query=build_query(github_params, keys),
+            retries=retries,
+            retry_policy=retry_policy,
+        )
+        known.update(parse_response(keys, data))
+    if missing and cache:
+        cache.save_references(github_params, known)
+    return {key: known[key] for key in wanted if known.get(key)}
+
+
+def reference_node(text: str, reference: dict[str, Any]) -> list[nodes.Node]:
+    if "login" in reference:
+        # The avatar is only shown in HTML: other builders would download it.
+        src = html.escape(reference["avatar_url"])
+        avatar = nodes.raw(
+            "",
+            f'<img class="changelog-avatar" src="{src}" alt="" width="20" height="20" /> ',
+            format="html",
+        )
+        link = nodes.reference(
+            "", text, refuri=reference["url"], classes=["changelog-user"]
+        )
+        return [avatar, link]
+    kind = "pull-request" if reference["type"] == "PullRequest" else "issue"
+    return [
+        nodes.reference(
+            "",
+            text,
+            refuri=reference["url"],
+            reftitle=reference["title"],
+            classes=[f"changelog-{kind}"],
+        )
+    ]
+
+
+def enrich_nodes(
+    node_list: Iterable[nodes.Node], references: dict[str, dict[str, Any]]
+) -> None:
+    """Replace the resolved references in the text of the nodes, in place."""
+    for node in node_list:
+        for text in list(node.findall(nodes.Text)):
+            parent = text.parent
+            if parent is None or any(
+                isinstance(ancestor, SKIPPED_NODES) for ancestor in _ancestors(parent)
+            ):
+                continue
+            value = text.astext()
+            new_nodes: list[nodes.Node] = []
+            position = 0
+            for match in REFERENCE_RE.finditer(value):
+                reference = references.get(reference_key(match))
+                if reference is None:
+                    continue
+                if match.start() > position:
+                    new_nodes.append(nodes.Text(value[position : match.start()]))
+                new_nodes.extend(reference_node(match[0], reference))
+                position = match.end()
+            if not new_nodes:
+                continue
+            if position < len(value):
+                new_nodes.append(nodes.Text(value[position:]))
+            parent.replace(text, new_nodes)
+
+
+def _ancestors(node: nodes.Node | None) -> Iterator[nodes.Node]:
+    while node is not None:
+        yield node
+        node = node.parent
+
+
+def enriching_renderer(
+    renderer: Callable[[str | None], list[nodes.Node]],
+    references: dict[str, dict[str, Any]],
+) -> Callable[[str | None], list[nodes.Node]]:
+    """Wrap a renderer of release descriptions to enrich its output."""
+    if not references:
+        return renderer
+
+    def render(markdown: str | None) -> list[nodes.Node]:
+        result = renderer(markdown)
+        enrich_nodes(result, references)
+        return result
+
+    return render
@@ -0,0 +1,189 @@
+"""
+Export of releases to JSON, Markdown or plain text.
+
+Exports are built straight from the fetched releases, without going through
+docutils: descriptions are kept as the markdown written on GitHub. They're
+available from the command line (``sphinx-github-changelog export``), and
+Sphinx builds can write them next to their output with the
+``sphinx_github_changelog_export`` option.
+
+Releases rendered by the ``changelog`` directives are collected in the build
+environment, so that they're available when the build finishes, even in
+parallel builds and for unchanged documents.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import itertools
+import json
+import pathlib
+from collections.abc import Callable, Iterable, Sequence
+
+from docutils import nodes
+
+from . import exceptions, github_releases
+
+EXPORT_DIR = "_changelog"
+
+
+@dataclasses.dataclass
+class ExportedRelease:
+    version: str
+    title: str
+    release: github_releases.Release
+    pypi_url: str | None = None
+    # Rendered description, only kept when feeds are enabled (see `feed`).
+    body: list[nodes.Node] = dataclasses.field(
+        default_factory=list, repr=False, compare=False
+    )
+
+    def to_json(self) -> dict:
+        return {
+            "version": self.version,
+            "title": self.title,
+            "tag_name": self.release.tag_name,
+            "published_at": self.release.published_at.isoformat(),
+            "prerelease": self.release.is_prerelease,
+            "url": self.release.url,
+            "pypi_url": self.pypi_url,
+            "description": self.release.description or "",
+            "assets": [dataclasses.asdict(asset) for asset in self.release.assets],
+        }
+
+    def links(self) -> list[tuple[str, str]]:
+        links = [("GitHub", self.release.url)]
+        if self.pypi_url:
+            links.append(("PyPI", self.pypi_url))
+        return links
+
+
+def to_json(releases: Sequence[ExportedRelease]) -> str:
+    return json.dumps([r.to_json() for r in releases], indent=2) + "\n"
+
+
+def to_markdown(releases: Sequence[ExportedRelease]) -> str:
+    return "".join(
+        f"## {r.title}\n\n"
+        f"_Released on {r.release.published_at.isoformat()} - "
+        + " - ".join(f"[{name}]({url})" for name, url in r.links())
+        + "_\n\n"
+        + (f"{description}\n\n" if (description := _description(r)) else "")
+        for r in releases
+    )
+
+
+def to_text(releases: Sequence[ExportedRelease]) -> str:
+    return "".join(
+        f"{r.title}\n{'=' * len(r.title)}\n\n"
+        f"Released on {r.release.published_at.isoformat()}\n"
+        + "".join(f"{name}: {url}\n" for name, url in r.links())
+        + "\n"
+        + (f"{description}\n\n" if (description := _description(r)) else "")
+        for r in releases
+    )
+
+
+def _description(release: ExportedRelease) -> str:
+    return (release.release.description or "").replace("\r\n", "\n").strip()
+
+
+FORMATS: dict[str, tuple[str, Callable[[Sequence[ExportedRelease]], str]]] = {
+    "json": (".json", to_json),
+    "markdown": (".md", to_markdown),
+    "text": (".txt", to_text),
+}
+
+
+def check_format(format: str) -> str:
+    if format not in FORMATS:
+        raise exceptions.ChangelogError(
+            f"Unknown export format: {format!r} (expected one of: {', '.join(FORMATS)})"
+        )
+    return format
+
+
+def export(releases: Sequence[ExportedRelease], format: str) -> str:
+    _, exporter = FORMATS[check_format(format)]
+    return exporter(releases)
+
+
+def parse_formats(value: str) -> list[str]:
+    """Parse a comma- or space-separated list of formats."""
+    return [check_format(format) for format in value.replace(",", " ").split()]
+
+
+# Releases rendered in each document, by repository URL, as one list per
+# directive.
+ENV_ATTRIBUTE = "sphinx_github_changelog_releases"
+
+
+def _collected(env) -> dict[str, dict[str, list[list[ExportedRelease]]]]:
+    if not hasattr(env, ENV_ATTRIBUTE):
+        setattr(env, ENV_ATTRIBUTE, {})
+    return getattr(env, ENV_ATTRIBUTE)
+
+
+def note_releases(
+    env, docname: str, repo_url: str, releases: Sequence[ExportedRelease]
+) -> None:
+    _collected(env).setdefault(docname, {}).setdefault(repo_url, []).append(
+        list(releases)
+    )
+
+
+def collected_releases(env) -> dict[str, list[ExportedRelease]]:
+    """Return the releases rendered in the whole project, by repository URL.
+
+    Releases of a repository rendered by several directives (e.g. one per
+    package of a monorepo, with ``:tag-pattern:``) are merged, newest first, and
+    each release is only kept once.
+    """
+    lists: dict[str, list[list[ExportedRelease]]] = {}
+    collected = _collected(env)
+    for docname in sorted(collected):
+        for repo_url, releases in collected[docname].items():
+            lists.setdefault(repo_url, []).extend(releases)
+
+    result: dict[str, list[ExportedRelease]] = {}
+    for repo_url, [first, *others] in lists.items():
+        if not others:
+            # Kept in the order of the directive.
+            result[repo_url] = first
+            continue
+        merged: dict[str, ExportedRelease] = {}
+        for release in itertools.chain(first, *others):
+            merged.setdefault(release.release.tag_name, release)
+        result[repo_url] = sorted(
+            merged.values(), key=lambda r: r.release.published_at, reverse=True
+        )
+    return result
+
+
+def on_env_purge_doc(app, env, docname: str) -> None:
+    _collected(env).pop(docname, None)
+
+
+def on_env_merge_info(app, env, docnames: Iterable[str], other) -> None:
+    collected = _collected(env)
+    other_collected = _collected(other)
+    for docname in docnames:
+        if docname in other_collected:
+            collected[docname] = other_collected[docname]
+
+
+def export_path(outdir: pathlib.Path, repo_url: str, format: str) -> pathlib.Path:
+    extension, _ = FORMATS[format]
+    # e.g. https://github.com/owner/repo -> github.com/owner/repo
+    return outdir / EXPORT_DIR / (repo_url.split("://", 1)[-1] + extension)
+
+
+def on_build_finished(app, exception: Exception | None) -> None:
+    formats = parse_formats(app.config.sphinx_github_changelog_export)
+    if exception is not None or not formats:
+        return
+    for repo_url, releases in collected_releases(app.env).items():
+        for format in formats:
+            path = export_path(pathlib.Path(app.outdir), repo_url, format)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(export(releases, format), encoding="utf-8")
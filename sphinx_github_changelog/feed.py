@@ -0,0 +1,169 @@
+"""
+Atom and RSS feeds of the releases.
+
+Feeds are written at the end of HTML builds, next to the exports (see
+`export`), from the releases collected while reading the ``changelog``
+directives: they cost no API call. Entry contents are the release descriptions
+as already rendered for the changelog, converted to HTML by the builder.
+"""
+
+from __future__ import annotations
+
+import datetime
+import email.utils
+import pathlib
+import xml.etree.ElementTree as ET
+from collections.abc import Callable, Sequence
+
+from docutils import nodes
+
+from . import exceptions, export
+
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+
+# Renders the body of a release as an HTML fragment.
+BodyRenderer = Callable[[export.ExportedRelease], str]
+
+
+def _element(parent: ET.Element, tag: str, text: str | None = None, **attrib):
+    child = ET.SubElement(parent, tag, attrib)
+    child.text = text
+    return child
+
+
+def _datetime(date: datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(date, datetime.time(), tzinfo=datetime.UTC)
+
+
+def latest_releases(
+    releases: Sequence[export.ExportedRelease], limit: int
+) -> list[export.ExportedRelease]:
+    """Return the ``limit`` most recently published releases (all of them if
+    ``limit`` is 0), newest first.
+    """
+    result = sorted(releases, key=lambda r: r.release.published_at, reverse=True)
+    return result[:limit] if limit else result
+
+
+def to_atom(
+    repo_url: str,
+    releases: Sequence[export.ExportedRelease],
+    render_body: BodyRenderer,
+    self_url: str | None = None,
+) -> str:
+    feed = ET.Element("feed", xmlns=ATOM_NAMESPACE)
+    _element(feed, "id", f"{repo_url}/releases")
+    _element(feed, "title", f"Releases of {repo_url.split('://', 1)[-1]}")
+    _element(feed, "link", rel="alternate", href=f"{repo_url}/releases")
+    if self_url:
+        _element(feed, "link", rel="self", href=self_url)
+    # Required by RFC 4287 when entries don't have their own author.
+    owner_url = repo_url.rsplit("/", 1)[0]
+    author = _element(feed, "author")
+    _element(author, "name", owner_url.rsplit("/", 1)[-1])
+    _element(author, "uri", owner_url)
+    updated = max(
+        (r.release.published_at for r in releases), default=datetime.date(1970, 1, 1)
+    )
+    _element(feed, "updated", _datetime(updated).isoformat())
+    for release in releases:
+        entry = _element(feed, "entry")
+        _element(entry, "id", release.release.url)
+        _element(entry, "title", release.title)
+        _element(entry, "link", rel="alternate", href=release.release.url)
+        _element(entry, "updated", _datetime(release.release.published_at).isoformat())
+        _element(entry, "content", render_body(release), type="html")
+    return _serialize(feed)
+
+
+def to_rss(
+    repo_url: str,
+    releases: Sequence[export.ExportedRelease],
+    render_body: BodyRenderer,
+    self_url: str | None = None,
+) -> str:
+    rss = ET.Element("rss", version="2.0")
+    channel = _element(rss, "channel")
+    name = repo_url.split("://", 1)[-1]
+    _element(channel, "title", f"Releases of {name}")
+    _element(channel, "link", f"{repo_url}/releases")
+    _element(channel, "description", f"Releases of {name}")
+    for release in releases:
+        item = _element(channel, "item")
+        _element(item, "title", release.title)
+        _element(item, "link", release.release.url)
+        _element(item, "guid", release.release.url, isPermaLink="true")
+        _element(
+            item,
+            "pubDate",
+            email.utils.format_datetime(_datetime(release.release.published_at)),
+        )
+        _element(item, "description", render_body(release))
+    return _serialize(rss)
+
+
+def _serialize(root: ET.Element) -> str:
+    ET.indent(root)
+    return ET.tostring(root, encoding="unicode", xml_declaration=True) + "\n"
+
+
+FORMATS: dict[str, tuple[str, Callable[..., str]]] = {
+    "atom": (".atom", to_atom),
+    "rss": (".rss", to_rss),
+}
+
+
+def parse_formats(value: str) -> list[str]:
+    formats = value.replace(",", " ").split()
+    for format in formats:
+        if format not in FORMATS:
+            raise exceptions.ChangelogError(
+                f"Unknown feed format: {format!r} (expected one of: "
+                f"{', '.join(FORMATS)})"
+            )
+    return formats
+
+
+def feed_path(outdir: pathlib.Path, repo_url: str, format: str) -> pathlib.Path:
+    extension, _ = FORMATS[format]
+    return outdir / export.EXPORT_DIR / (repo_url.split("://", 1)[-1] + extension)
+
+
+def on_build_finished(app, exception: Exception | None) -> None:
+    formats = parse_formats(app.config.sphinx_github_changelog_feed)
+    # Feeds are only written next to HTML output, whose builder renders the
+    # release bodies.
+    if exception is not None or not formats or app.builder.format != "html":
+        return
+
+    # Bodies are rendered once, even when several formats are written.
+    fragments: dict[int, str] = {}
+
+    def render_body(release: export.ExportedRelease) -> str:
+        if id(release) not in fragments:
+            container = nodes.container("", *(n.deepcopy() for n in release.body))
+            # MyST warnings, which Sphinx removes from the documents too.
+            for message in list(container.findall(nodes.system_message)):
+                message.parent.remove(message)
+            fragments[id(release)] = app.builder.render_partial(container)["fragment"]
+        return fragments[id(release)]
+
+    outdir = pathlib.Path(app.outdir)
+    base_url = app.config.html_baseurl
+    limit = app.config.sphinx_github_changelog_feed_limit
+    for repo_url, releases in export.collected_releases(app.env).items():
+        for format in formats:
+            path = feed_path(outdir, repo_url, format)
+            _, writer = FORMATS[format]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            content = writer(
+                repo_url,
+                latest_releases(releases, limit=limit),
+                render_body=render_body,
+                self_url=(
+                    base_url.rstrip("/") + "/" + path.relative_to(outdir).as_posix()
+                    if base_url
+                    else None
+                ),
+            )
+            path.write_text(content, encoding="utf-8")
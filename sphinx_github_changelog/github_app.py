@@ -0,0 +1,242 @@
+"""
+GitHub App authentication.
+
+When ``sphinx_github_changelog_app_id`` and
+``sphinx_github_changelog_app_private_key`` are set, GitHub is called with an
+installation token of the app, which gets higher rate limits than personal
+tokens. A JWT is signed locally with the app's private key (this needs the
+``cryptography`` package), and exchanged for a token of the installation given
+by ``sphinx_github_changelog_app_installation_id``, or else of the one on the
+repository.
+
+Installation tokens are valid for an hour: they're kept in memory and, when
+``sphinx_github_changelog_cache_dir`` is set, on disk (readable by the owner
+only), until `EXPIRY_MARGIN` before they expire, so that builds don't mint a
+new one each time.
+"""
+
+from __future__ import annotations
+
+import base64
+import dataclasses
+import datetime
+import json
+import os
+import pathlib
+import threading
+import time
+from collections.abc import Callable
+
+from . import config as config_module
+from . import exceptions, github_releases, urls
+
+# Tokens are renewed this long before they expire, so that they don't expire
+# during a build.
+EXPIRY_MARGIN = datetime.timedelta(minutes=5)
+# GitHub rejects JWTs valid for more than 10 minutes. They're also backdated,
+# in case the local clock is ahead of GitHub's.
+JWT_LIFETIME = 540
+JWT_BACKDATE = 60
+
+
+@dataclasses.dataclass(frozen=True)
+class App:
+    app_id: str
+    private_key: str
+    installation_id: str | None = None
+
+    @classmethod
+    def from_config(cls, config: config_module.ChangelogConfig) -> App | None:
+        if not config.app_id:
+            return None
+        if not config.app_private_key:
+            raise exceptions.ChangelogError(
+                f"{config.prefix}_app_id is set, but not "
+                f"{config.prefix}_app_private_key"
+            )
+        return cls(
+            app_id=str(config.app_id),
+            private_key=config.app_private_key,
+            installation_id=config.app_installation_id,
+        )
+
+    def private_key_pem(self) -> bytes:
+        """Return the private key, which is either given as is, or as the path
+        to its file."""
+        if "-----BEGIN" in self.private_key:
+            return self.private_key.encode()
+        try:
+            return pathlib.Path(self.private_key).expanduser().read_bytes()
+        except OSError as exc:
+            raise exceptions.ChangelogError(
+                f"Could not read the GitHub App private key: {exc}"
+            ) from exc
+
+
+@dataclasses.dataclass(frozen=True)
+class InstallationToken:
+    token: str
+    expires_at: datetime.datetime
+
+    def is_valid(self, now: datetime.datetime) -> bool:
+        return now < self.expires_at - EXPIRY_MARGIN
+
+    def to_json(self) -> dict[str, str]:
+        return {"token": self.token, "expires_at": self.expires_at.isoformat()}
+
+    @classmethod
+    def from_json(cls, data: dict[str, str]) -> InstallationToken:
+        return cls(
+            token=data["token"],
+            expires_at=datetime.datetime.fromisoformat(data["expires_at"]),
+        )
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def sign_jwt(app: App, now: float) -> str:
+    """Return a JWT authenticating as the app, signed with RS256."""
+    try:
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding, rsa
+    except ImportError as exc:
+        raise exceptions.ChangelogError(
+            "GitHub App authentication needs the cryptography package: "
+            "install sphinx-github-changelog[app]"
+        ) from exc
+
+    try:
+        key = serialization.load_pem_private_key(app.private_key_pem(), password=None)
+    except (ValueError, TypeError) as exc:
+        raise exceptions.ChangelogError(
+            f"Invalid GitHub App private key: {exc}"
+        ) from exc
+    if not isinstance(key, rsa.RSAPrivateKey):
+        raise exceptions.ChangelogError("Invalid GitHub App private key: not RSA")
+
+    header = _b64(json.dumps({"alg": "RS256", "typ": "JWT"}).encode())
+    payload = _b64(
+        json.dumps(
+            {
+                "iat": int(now) - JWT_BACKDATE,
+                "exp": int(now) + JWT_LIFETIME,
+                "iss": app.app_id,
+            }
+        ).encode()
+    )
+    signing_input = f"{header}.{payload}".encode()
+    signature = key.sign(signing_input, padding.PKCS1v15(), hashes.SHA256())
+    return f"{header}.{payload}.{_b64(signature)}"
+
+
+def mint_installation_token(
+    app: App,
+    github_params: urls.GitHubParams,
+    retries: int,
+    api_url: str | None = None,
+    clock: Callable[[], float] = time.time,
+) -> InstallationToken:
+    """Exchange a JWT of the app for an installation token.
+
+    ``api_url`` defaults to the REST API of the repository's host.
+    """
+    api_url = api_url or github_params.rest_api_url
+    jwt = sign_jwt(app, now=clock())
+    try:
+        installation_id = (
+            app.installation_id
+            or (
+                github_releases.github_request(
+                    "GET",
+                    f"{api_url}/repos/{github_params.owner}/{github_params.repo}/installation",
+                    token=jwt,
+                    retries=retries,
+                    auth_scheme="Bearer",
+                ).json()["id"]
+            )
+        )
+        data = github_releases.github_request(
+            "POST",
+            f"{api_url}/app/installations/{installation_id}/access_tokens",
+            token=jwt,
+            retries=retries,
+            auth_scheme="Bearer",
+        ).json()
+        return InstallationToken(
+            token=data["token"],
+            expires_at=datetime.datetime.fromisoformat(data["expires_at"]),
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        raise exceptions.GitHubAPIError(
+            f"GitHub API error unexpected format while minting an installation "
+            f"token: {exc!r}"
+        ) from exc
+
+
+def _target(app: App, github_params: urls.GitHubParams) -> str:
+    # Without an installation ID, each repository gets its own token.
+    return app.installation_id or f"{github_params.owner}--{github_params.repo}"
+
+
+def token_path(
+    cache_dir: str, app: App, github_params: urls.GitHubParams
+) -> pathlib.Path:
+    return (
+        pathlib.Path(cache_dir)
+        / github_params.hostname
+        / f"app-{app.app_id}-{_target(app, github_params)}.token.json"
+    )
+
+
+def load_token(path: pathlib.Path) -> InstallationToken | None:
+    try:
+        return InstallationToken.from_json(json.loads(path.read_text()))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_token(path: pathlib.Path, token: InstallationToken) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Written to a temporary file first, only readable by its owner.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as file:
+        json.dump(token.to_json(), file)
+    tmp_path.replace(path)
+
+
+_tokens: dict[tuple[str, App, str], InstallationToken] = {}
+_tokens_lock = threading.Lock()
+
+
+def get_installation_token(
+    app: App,
+    github_params: urls.GitHubParams,
+    retries: int,
+    cache_dir: str | None = None,
+    api_url: str | None = None,
+    clock: Callable[[], float] = time.time,
+) -> str:
+    """Return a valid installation token of the app, minting one only if none
+    is cached."""
+    key = (github_params.hostname, app, _target(app, github_params))
+    path = token_path(cache_dir, app, github_params) if cache_dir else None
+    now = datetime.datetime.fromtimestamp(clock(), tz=datetime.UTC)
+    with _tokens_lock:
+        token = _tokens.get(key)
+        if (token is None or not token.is_valid(now)) and path:
+            token = load_token(path)
+        if token is None or not token.is_valid(now):
+            token = mint_installation_token(
+                app, github_params, retries=retries, api_url=api_url, clock=clock
+            )
+            if path:
+                save_token(path, token)
+        _tokens[key] = token
+    return token.token
+
+
+def clear_installation_tokens() -> None:
+    _tokens.clear()
@@ -1,25 +1,175 @@
 from __future__ import annotations
 
+import concurrent.futures
 import dataclasses
 import datetime
-from collections.abc import Callable, Sequence
+import functools
+import importlib.util
+import pathlib
+import random
+import re
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from typing import TYPE_CHECKING, Any, ClassVar
 
-import httpx
-from tenacity import (
-    Retrying,
-    nap,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_exponential,
-)
+from sphinx.util import logging
 
-from . import exceptions, urls
+from . import cache as cache_module
+from . import circuit_breaker, exceptions, tags, token_pool, urls
+from . import config as config_module
+
+# httpx and tenacity are only imported when GitHub is called, so that builds
+# without changelog (or reading from the cache) don't pay for their import.
+if TYPE_CHECKING:
+    import httpx
+    from tenacity import RetryCallState
+
+logger = logging.getLogger(__name__)
+
+# A token, or a function returning it, called only when GitHub is actually
+# called: GitHub App installation tokens (see `github_app`) are then only minted
+# if the releases aren't read from the cache.
+Token = str | Callable[[], str | None] | None
+
+
+def resolve_lazy_token(token: Token) -> str | None:
+    return token() if callable(token) else token
 
 
 class GitHubRateLimitError(Exception):
     """Raised internally to trigger retry logic on HTTP 429."""
 
 
+@dataclasses.dataclass(frozen=True)
+class RetryPolicy:
+    """How `github_call` waits for GitHub, and when it tries again.
+
+    Durations are in seconds. Waits between attempts use decorrelated jitter:
+    each one is random between ``backoff`` and 3 times the previous one (capped
+    at ``max_backoff``), so that parallel builds don't retry in lockstep.
+    """
+
+    connect_timeout: float = 10
+    read_timeout: float = 30
+    # Time budget for a call, retries included. 0 means no limit.
+    total_timeout: float = 120
+    retry_statuses: frozenset[int] = frozenset({429, 502, 503, 504})
+    retry_transport_errors: bool = True
+    backoff: float = 5
+    max_backoff: float = 60
+    # Consecutive failed calls to a host before calls to it are suspended for
+    # ``breaker_cooldown`` (see `circuit_breaker`). 0 disables it.
+    breaker_threshold: int = 3
+    breaker_cooldown: float = 60
+
+    @classmethod
+    def from_config(cls, config: config_module.ChangelogConfig) -> RetryPolicy:
+        try:
+            retry_statuses = frozenset(
+                int(status)
+                for status in config.retry_statuses.replace(",", " ").split()
+            )
+        except ValueError as exc:
+            raise exceptions.ChangelogError(
+                f"Invalid {config.prefix}_retry_statuses: {config.retry_statuses!r} "
+                "(expected HTTP status codes separated by commas)"
+            ) from exc
+        return cls(
+            connect_timeout=config.connect_timeout,
+            read_timeout=config.read_timeout,
+            total_timeout=config.total_timeout,
+            retry_statuses=retry_statuses,
+            retry_transport_errors=config.retry_transport_errors,
+            breaker_threshold=config.circuit_breaker_threshold,
+            breaker_cooldown=config.circuit_breaker_cooldown,
+        )
+
+    def is_retryable(self, exc: BaseException | None) -> bool:
+        import httpx
+
+        if isinstance(exc, GitHubRateLimitError):
+            return 429 in self.retry_statuses
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code in self.retry_statuses
+        return self.retry_transport_errors and isinstance(exc, httpx.TransportError)
+
+    def wait(self, rng: Callable[[float, float], float] = random.uniform):
+        """Return a tenacity wait strategy, for a single call."""
+        previous = self.backoff
+
+        def wait(retry_state: RetryCallState) -> float:
+            nonlocal previous
+            previous = min(self.max_backoff, rng(self.backoff, previous * 3))
+            return previous
+
+        return wait
+
+    def stop(self, retries: int):
+        from tenacity import stop_after_attempt, stop_before_delay
+
+        stop = stop_after_attempt(max(1, retries + 1))
+        if self.total_timeout:
+            # Don't start waiting for an attempt that would end past the
+            # deadline.
+            stop |= stop_before_delay(self.total_timeout)
+        return stop
+
+
+@dataclasses.dataclass(frozen=True)
+class ReleaseFilter:
+    """Decide which releases to keep, based on their raw REST payload.
+
+    It's applied before building `Release` objects, so that discarded releases
+    cost as little as possible.
+    """
+
+    include_drafts: bool = False
+    include_prereleases: bool = True
+    include_tags: re.Pattern | None = None
+    exclude_tags: re.Pattern | None = None
+    published_since: datetime.date | None = None
+
+    def __call__(self, data: dict) -> bool:
+        if data["draft"] and not self.include_drafts:
+            return False
+        if data["prerelease"] and not self.include_prereleases:
+            return False
+        tag = data["tag_name"]
+        if self.include_tags and not self.include_tags.search(tag):
+            return False
+        if self.exclude_tags and self.exclude_tags.search(tag):
+            return False
+        if self.published_since:
+            published = data.get("published_at") or data.get("created_at") or ""
+            return published[:10] >= self.published_since.isoformat()
+        return True
+
+
+@dataclasses.dataclass(frozen=True)
+class Asset:
+    name: str
+    url: str
+    size: int
+    download_count: int
+
+    REST_FIELDS: ClassVar[tuple[str, ...]] = (
+        "name",
+        "browser_download_url",
+        "size",
+        "download_count",
+    )
+
+    @classmethod
+    def from_rest(cls, data: dict) -> Asset:
+        return cls(
+            name=data["name"],
+            url=data["browser_download_url"],
+            size=data["size"],
+            download_count=data["download_count"],
+        )
+
+
 @dataclasses.dataclass
 class Release:
     name: str | None
@@ -29,6 +179,30 @@ class Release:
     published_at: datetime.date
     is_draft: bool
     is_prerelease: bool
+    assets: tuple[Asset, ...] = ()
+
+    REST_FIELDS: ClassVar[tuple[str, ...]] = (
+        "name",
+        "body",
+        "html_url",
+        "tag_name",
+        "published_at",
+        "created_at",
+        "draft",
+        "prerelease",
+        "assets",
+    )
+
+    @classmethod
+    def trim_rest(cls, data: dict) -> dict:
+        """Keep only the fields of a REST payload that `from_rest` reads."""
+        trimmed = {key: data[key] for key in cls.REST_FIELDS if key in data}
+        if "assets" in trimmed:
+            trimmed["assets"] = [
+                {key: asset[key] for key in Asset.REST_FIELDS if key in asset}
+                for asset in trimmed["assets"]
+            ]
+        return trimmed
 
     @classmethod
     def from_rest(cls, data: dict) -> Release:
@@ -45,71 +219,573 @@ class Release:
             published_at=datetime.date.fromisoformat(published_or_created[:10]),
             is_draft=data["draft"],
             is_prerelease=data["prerelease"],
+            # Releases cached before assets were kept have none.
+            assets=tuple(Asset.from_rest(asset) for asset in data.get("assets", ())),
         )
 
 
 def extract_releases(
     github_params: urls.GitHubParams,
-    token: str | None,
+    token: Token,
     retries: int,
+    release_filter: ReleaseFilter | None = None,
+    cache: cache_module.ReleaseCache | None = None,
+    refresh: bool = False,
+    retry_policy: RetryPolicy | None = None,
 ) -> Sequence[Release]:
-    page = 1
-    releases: list[Release] = []
-    while True:
-        result = github_call(
-            url=github_params.releases_api_url,
+    """Return the releases of the repository, newest first.
+
+    If a cache is given, releases are read from it when it has them (unless
+    ``refresh`` is set), and stored in it after being downloaded otherwise.
+    Cached releases past the cache's TTL are returned as is, and refreshed in
+    the background (see `wait_for_refreshes`).
+    """
+    if cache is None:
+        releases, _ = download_releases(
+            github_params=github_params,
             token=token,
-            params={"per_page": 100, "page": page},
             retries=retries,
+            release_filter=release_filter,
+            retry_policy=retry_policy,
         )
-        if not result:
-            break
-        try:
-            releases.extend(Release.from_rest(r) for r in result)
-        except (KeyError, TypeError) as exc:
-            raise exceptions.GitHubAPIError(
-                f"GitHub API error unexpected format:\n{result!r}"
-            ) from exc
-        page += 1
+    else:
+        # The lock makes concurrent builds wait for the first one to download
+        # the releases, and then read them from the cache.
+        with cache.lock(github_params):
+            entry = (
+                None
+                if refresh
+                else cache.load(github_params, release_filter=release_filter)
+            )
+            if entry is not None:
+                releases = releases_from_payloads(
+                    entry.payloads, release_filter=release_filter
+                )
+                if cache.is_stale(entry):
+                    refresh_in_background(
+                        github_params=github_params,
+                        token=token,
+                        retries=retries,
+                        cache=cache,
+                        retry_policy=retry_policy,
+                    )
+            else:
+                releases, payloads = download_releases(
+                    github_params=github_params,
+                    token=token,
+                    retries=retries,
+                    release_filter=release_filter,
+                    retry_policy=retry_policy,
+                )
+                cache.save(github_params, payloads)
 
+    return sort_releases(releases)
+
+
+def sort_releases(releases: Sequence[Release]) -> list[Release]:
     # Sort by publication date descending
     return sorted(
         releases,
-        key=lambda r: r.published_at,
+        key=lambda r: tags.sort_key(
+            "date", tags.default_version(r.tag_name), r.published_at
+        ),
         reverse=True,
     )
 
 
+_refreshes: dict[tuple[pathlib.Path, str], threading.Thread] = {}
+
+
+def refresh_in_background(
+    github_params: urls.GitHubParams,
+    token: Token,
+    retries: int,
+    cache: cache_module.ReleaseCache,
+    retry_policy: RetryPolicy | None = None,
+) -> None:
+    """Download the releases of the repository into the cache, in a thread."""
+    key = (cache.directory, github_params.releases_api_url)
+    if key in _refreshes and _refreshes[key].is_alive():
+        return
+    thread = threading.Thread(
+        target=_refresh,
+        kwargs={
+            "github_params": github_params,
+            "token": token,
+            "retries": retries,
+            "cache": cache,
+            "retry_policy": retry_policy,
+        },
+        name=f"sphinx-github-changelog refresh {github_params.repo_url}",
+    )
+    _refreshes[key] = thread
+    thread.start()
+
+
+def _refresh(
+    github_params: urls.GitHubParams,
+    token: Token,
+    retries: int,
+    cache: cache_module.ReleaseCache,
+    retry_policy: RetryPolicy | None = None,
+) -> None:
+    try:
+        _, payloads = download_releases(
+            github_params=github_params,
+            token=token,
+            retries=retries,
+            retry_policy=retry_policy,
+        )
+    except exceptions.GitHubAPIError as exc:
+        logger.warning(
+            "Could not refresh the cached releases of %s: %s",
+            github_params.repo_url,
+            exc,
+        )
+        return
+    # Only lock once downloaded, so that concurrent builds keep using the stale
+    # entry in the meantime.
+    with cache.lock(github_params):
+        cache.save(github_params, payloads)
+
+
+def wait_for_refreshes(*args) -> None:
+    """Wait for the background refreshes to finish (``build-finished``)."""
+    for thread in _refreshes.values():
+        thread.join()
+    _refreshes.clear()
+
+
+def download_releases(
+    github_params: urls.GitHubParams,
+    token: Token,
+    retries: int,
+    release_filter: ReleaseFilter | None = None,
+    retry_policy: RetryPolicy | None = None,
+) -> tuple[list[Release], list[dict]]:
+    """Download the releases of the repository, along with their trimmed
+    payloads for the cache.
+    """
+    releases: list[Release] = []
+    payloads: list[dict] = []
+    for page in iter_release_pages(
+        github_params=github_params,
+        token=token,
+        retries=retries,
+        retry_policy=retry_policy,
+    ):
+        releases.extend(releases_from_payloads(page, release_filter=release_filter))
+        payloads.extend(Release.trim_rest(p) for p in page)
+
+    stats = transfer_stats[github_params.repo_url]
+    logger.info(
+        "Downloaded releases of %s: %d bytes, %d decoded (compression ratio %.1f)",
+        github_params.repo_url,
+        stats.downloaded_bytes,
+        stats.decoded_bytes,
+        stats.compression_ratio,
+    )
+    return releases, payloads
+
+
+def iter_release_pages(
+    github_params: urls.GitHubParams,
+    token: Token,
+    retries: int,
+    retry_policy: RetryPolicy | None = None,
+) -> Iterator[list[dict]]:
+    """Download the REST payloads of the releases of the repository, page by
+    page.
+    """
+    retry_policy = retry_policy or RetryPolicy()
+    breaker = circuit_breaker.get_circuit_breaker(
+        github_params.hostname,
+        threshold=retry_policy.breaker_threshold,
+        cooldown=retry_policy.breaker_cooldown,
+    )
+    stats = transfer_stats.setdefault(github_params.repo_url, TransferStats())
+    resolved_token = None
+    page = 1
+    while True:
+        breaker.before_call()
+        try:
+            if page == 1:
+                resolved_token = resolve_lazy_token(token)
+            result = coalesced_github_call(
+                url=github_params.releases_api_url,
+                token=resolved_token,
+                params={"per_page": 100, "page": page},
+                retries=retries,
+                retry_policy=retry_policy,
+                stats=stats,
+            )
+        except exceptions.GitHubAPIError as exc:
+            # Only errors that retrying couldn't fix count against the host, not
+            # e.g. authentication errors.
+            if retry_policy.is_retryable(exc.__cause__):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except BaseException:
+            # Anything else (e.g. an HTML page instead of JSON, or a GitHub App
+            # key that can't be used) still ends a probe, or the breaker would
+            # stay open for the rest of the build.
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        if not result:
+            break
+        yield result
+        page += 1
+
+
+def releases_from_payloads(
+    payloads: list[dict],
+    release_filter: ReleaseFilter | None = None,
+) -> list[Release]:
+    try:
+        return [
+            Release.from_rest(r)
+            for r in payloads
+            if release_filter is None or release_filter(r)
+        ]
+    except (KeyError, TypeError) as exc:
+        raise exceptions.GitHubAPIError(
+            f"GitHub API error unexpected format:\n{payloads!r}"
+        ) from exc
+
+
+@dataclasses.dataclass
+class ReleaseIndex:
+    """Releases of a repository, shared by every directive of the build.
+
+    Lookups are computed on first use and kept, so that several directives
+    rendering the same repository don't repeat them.
+    """
+
+    releases: Sequence[Release]
+    # Set when GitHub couldn't be reached and the releases come from the last
+    # snapshot in the cache, fetched at ``as_of``.
+    as_of: datetime.datetime | None = None
+    fetch_error: exceptions.GitHubAPIError | None = None
+    packages: dict[tuple[tags.TagPattern | None, str], list[tuple[str, Release]]] = (
+        dataclasses.field(default_factory=dict, repr=False)
+    )
+    lookups: dict[tags.TagPattern | None, dict[str, tuple[str, Release]]] = (
+        dataclasses.field(default_factory=dict, repr=False)
+    )
+
+    def for_package(
+        self, tag_pattern: tags.TagPattern | None, order: str = "date"
+    ) -> list[tuple[str, Release]]:
+        """Return the (version, release) pairs whose tag matches the pattern,
+        newest first according to the given order (see `tags.ORDERS`).
+        """
+        key = (tag_pattern, order)
+        if key not in self.packages:
+            if tag_pattern is None:
+                versions = [
+                    (tags.default_version(r.tag_name), r) for r in self.releases
+                ]
+            else:
+                versions = [
+                    (version, r)
+                    for r in self.releases
+                    if (version := tag_pattern.match(r.tag_name)) is not None
+                ]
+            versions.sort(
+                key=lambda vr: tags.sort_key(order, vr[0], vr[1].published_at),
+                reverse=True,
+            )
+            self.packages[key] = versions
+        return self.packages[key]
+
+    def lookup(
+        self, tag_pattern: tags.TagPattern | None
+    ) -> dict[str, tuple[str, Release]]:
+        """Map both the version and the tag name of each release matching the
+        pattern to its (version, release) pair.
+        """
+        if tag_pattern not in self.lookups:
+            lookup: dict[str, tuple[str, Release]] = {}
+            for version, release in reversed(self.for_package(tag_pattern)):
+                lookup[version] = lookup[release.tag_name] = (version, release)
+            self.lookups[tag_pattern] = lookup
+        return self.lookups[tag_pattern]
+
+
+_release_indexes: dict[tuple[str, ReleaseFilter | None], ReleaseIndex] = {}
+
+
+def get_release_index(
+    github_params: urls.GitHubParams,
+    token: Token,
+    retries: int,
+    release_filter: ReleaseFilter | None = None,
+    cache: cache_module.ReleaseCache | None = None,
+    retry_policy: RetryPolicy | None = None,
+) -> ReleaseIndex:
+    """Like `extract_releases`, but download each repository once per build.
+
+    If the download fails, fall back to the last releases saved in the cache,
+    whatever their age.
+    """
+    key = (github_params.releases_api_url, release_filter)
+    if key not in _release_indexes:
+        try:
+            release_index = ReleaseIndex(
+                releases=extract_releases(
+                    github_params=github_params,
+                    token=token,
+                    retries=retries,
+                    release_filter=release_filter,
+                    cache=cache,
+                    retry_policy=retry_policy,
+                )
+            )
+        except exceptions.GitHubAPIError as exc:
+            entry = cache and cache.last_known_good(
+                github_params, release_filter=release_filter
+            )
+            if entry is None:
+                raise
+            release_index = ReleaseIndex(
+                releases=sort_releases(
+                    releases_from_payloads(
+                        entry.payloads, release_filter=release_filter
+                    )
+                ),
+                as_of=entry.fetched_at,
+                fetch_error=exc,
+            )
+        _release_indexes[key] = release_index
+    return _release_indexes[key]
+
+
+def clear_release_indexes(*args) -> None:
+    """Forget the releases downloaded by a previous build (``builder-inited``)."""
+    _release_indexes.clear()
+    transfer_stats.clear()
+
+
+@functools.cache
+def accept_encoding() -> str:
+    """Content encodings to accept from GitHub: gzip, and Brotli and Zstandard
+    when httpx can decode them (i.e. when their optional packages are installed).
+    """
+    encodings = ["gzip"]
+    if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi"):
+        encodings.append("br")
+    if importlib.util.find_spec("zstandard"):
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+@dataclasses.dataclass
+class TransferStats:
+    """Bytes received from GitHub API, before and after decompression."""
+
+    downloaded_bytes: int = 0
+    decoded_bytes: int = 0
+
+    def record(self, response: httpx.Response) -> None:
+        self.downloaded_bytes += response.num_bytes_downloaded
+        self.decoded_bytes += len(response.content)
+
+    @property
+    def compression_ratio(self) -> float:
+        return (
+            self.decoded_bytes / self.downloaded_bytes if self.downloaded_bytes else 1
+        )
+
+
+# Transfer statistics of each repository (by URL), for the current process.
+transfer_stats: dict[str, TransferStats] = {}
+
+
+_in_flight: dict[
+    tuple[str, tuple[tuple[str, int], ...], str | None],
+    concurrent.futures.Future[list[dict]],
+] = {}
+_in_flight_lock = threading.Lock()
+
+
+def coalesced_github_call(
+    url: str,
+    token: str | None,
+    params: dict[str, int],
+    retries: int,
+    retry_policy: RetryPolicy | None = None,
+    stats: TransferStats | None = None,
+) -> list[dict]:
+    """Like `github_call`, but concurrent calls with the same URL, parameters
+    and token share a single request, and its result (which must therefore not
+    be modified).
+    """
+    key = (url, tuple(sorted(params.items())), token)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if future is None:
+            future = _in_flight[key] = concurrent.futures.Future()
+
+    if not leader:
+        return future.result()
+
+    try:
+        result = github_call(
+            url=url,
+            token=token,
+            params=params,
+            retries=retries,
+            retry_policy=retry_policy,
+            stats=stats,
+        )
+    # Even on KeyboardInterrupt, so that the other callers don't wait forever.
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+
 def github_call(
     url: str,
     token: str | None,
     params: dict[str, int],
     retries: int,
-    sleep: Callable[[float], None] = nap.sleep,
+    sleep: Callable[[float], None] = time.sleep,
+    retry_policy: RetryPolicy | None = None,
+    stats: TransferStats | None = None,
 ) -> list[dict]:
+    response = github_request(
+        "GET",
+        url,
+        token=token,
+        retries=retries,
+        sleep=sleep,
+        retry_policy=retry_policy,
+        stats=stats,
+        resource="core",
+        params=params,
+    )
+    response_payload = response.json()
+    if not isinstance(response_payload, list):
+        raise exceptions.GitHubAPIError(
+            f"GitHub API error unexpected format:\n{response_payload!r}"
+        )
+    return response_payload
+
+
+def graphql_call(
+    url: str,
+    token: str | None,
+    query: str,
+    retries: int,
+    sleep: Callable[[float], None] = time.sleep,
+    retry_policy: RetryPolicy | None = None,
+) -> dict:
+    """Run a GraphQL query and return its ``data``.
+
+    Partial errors (e.g. an alias pointing to an unknown user) are ignored: the
+    corresponding fields of ``data`` are null.
+    """
+    response = github_request(
+        "POST",
+        url,
+        token=token,
+        retries=retries,
+        sleep=sleep,
+        retry_policy=retry_policy,
+        resource="graphql",
+        json={"query": query},
+    )
+    response_payload = response.json()
+    if not isinstance(response_payload, dict) or not isinstance(
+        response_payload.get("data"), dict
+    ):
+        raise exceptions.GitHubAPIError(
+            f"GitHub GraphQL API error:\n{response_payload!r}"
+        )
+    return response_payload["data"]
+
+
+def github_request(
+    method: str,
+    url: str,
+    token: str | None,
+    retries: int,
+    sleep: Callable[[float], None] = time.sleep,
+    retry_policy: RetryPolicy | None = None,
+    stats: TransferStats | None = None,
+    auth_scheme: str = "token",
+    resource: str = "core",
+    **kwargs: Any,
+) -> httpx.Response:
+    """Call GitHub API, retrying according to the retry policy.
+
+    ``auth_scheme`` is ``Bearer`` for GitHub App JWTs (see `github_app`).
+    ``resource`` is the rate limit the call counts against (``core`` for REST,
+    ``graphql``), which decides the token picked from the pool (see
+    `token_pool`).
+    """
+    import httpx
+    from tenacity import Retrying, retry_if_exception
+
     headers = {
         "Accept": "application/vnd.github+json",
+        "Accept-Encoding": accept_encoding(),
     }
-    if token:
-        headers["Authorization"] = f"token {token}"
+    pool = None
+    if token and token.strip():
+        if auth_scheme == "token":
+            pool = token_pool.get_token_pool(token)
+        else:
+            # JWTs are short-lived and only used for a couple of calls: they
+            # aren't pooled.
+            headers["Authorization"] = f"{auth_scheme} {token}"
+    retry_policy = retry_policy or RetryPolicy()
+    timeout = httpx.Timeout(
+        retry_policy.read_timeout, connect=retry_policy.connect_timeout
+    )
+
+    def send() -> httpx.Response:
+        if pool is None:
+            return httpx.request(
+                method, url, headers=headers, timeout=timeout, **kwargs
+            )
+        while True:
+            current = pool.pick(resource)
+            headers["Authorization"] = f"token {current}"
+            response = httpx.request(
+                method, url, headers=headers, timeout=timeout, **kwargs
+            )
+            pool.record(current, response.headers)
+            # A token of the pool ran out: others are tried right away, without
+            # counting as a retry.
+            if response.status_code not in (403, 429) or not pool.should_rotate(
+                current, resource
+            ):
+                return response
+            logger.debug("GitHub API rate limit reached, switching to another token")
 
     response: httpx.Response | None = None
-    total_attempts = max(1, retries + 1)
     try:
         for attempt in Retrying(
-            stop=stop_after_attempt(total_attempts),
-            retry=retry_if_exception_type(GitHubRateLimitError),
-            wait=wait_exponential(multiplier=5, min=5),
+            stop=retry_policy.stop(retries),
+            retry=retry_if_exception(retry_policy.is_retryable),
+            wait=retry_policy.wait(),
             sleep=sleep,
             reraise=True,
         ):
             with attempt:
                 try:
-                    response = httpx.get(
-                        url,
-                        params=params,
-                        headers=headers,
-                    ).raise_for_status()
+                    response = send().raise_for_status()
                 except httpx.HTTPStatusError as exc:
                     if exc.response.status_code == 429:
                         raise GitHubRateLimitError(exc.response.text) from exc
@@ -136,9 +812,6 @@ def github_call(
     if response is None:
         raise NotImplementedError("Unreachable: retry loop completed without response")
 
-    response_payload = response.json()
-    if not isinstance(response_payload, list):
-        raise exceptions.GitHubAPIError(
-            f"GitHub API error unexpected format:\n{response_payload!r}"
-        )
-    return response_payload
+    if stats is not None:
+        stats.record(response)
+    return response
@@ -0,0 +1,88 @@
+"""
+Profiling of the ``changelog`` directives.
+
+When ``sphinx_github_changelog_profile_dir`` (or the
+``SPHINX_GITHUB_CHANGELOG_PROFILE_DIR`` environment variable) is set, each run
+of a directive is profiled with `cProfile`, and its stats are written to
+``<docname>-L<line>.prof`` in that directory. At the end of the build, they're
+merged into `MERGED_PROFILE`, which tools like snakeviz, flameprof or
+gprof2dot turn into flame graphs. Each file can also be read with `pstats`,
+e.g. to see the time spent downloading releases (httpx), decoding them (json),
+parsing descriptions (myst_parser) and building nodes (docutils).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import pathlib
+import pstats
+import re
+from collections.abc import Iterator
+
+from sphinx.util import logging
+
+logger = logging.getLogger(__name__)
+
+MERGED_PROFILE = "changelog.prof"
+# Other files of the profile directory aren't ours, and are left alone.
+PROFILE_NAME_RE = re.compile(r".+-L\d+\.prof")
+
+
+def profile_path(profile_dir: str, docname: str, lineno: int) -> pathlib.Path:
+    return pathlib.Path(profile_dir) / f"{docname.replace('/', '--')}-L{lineno}.prof"
+
+
+@contextlib.contextmanager
+def profiled(profile_dir: str | None, docname: str, lineno: int) -> Iterator[None]:
+    """Profile the block into its own file, if a profile directory is set."""
+    if not profile_dir:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = profile_path(profile_dir, docname, lineno)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+
+
+def profiles(profile_dir: str) -> list[pathlib.Path]:
+    """Return the profiles of the directives written to the directory."""
+    return sorted(
+        path
+        for path in pathlib.Path(profile_dir).glob("*.prof")
+        if PROFILE_NAME_RE.fullmatch(path.name)
+    )
+
+
+def merge_profiles(profile_dir: str) -> pathlib.Path | None:
+    """Merge the profiles of the directives into `MERGED_PROFILE`."""
+    paths = profiles(profile_dir)
+    if not paths:
+        return None
+    stats = pstats.Stats(*map(str, paths))
+    path = pathlib.Path(profile_dir) / MERGED_PROFILE
+    stats.dump_stats(path)
+    return path
+
+
+def on_builder_inited(app) -> None:
+    """Remove the profiles of the previous build."""
+    profile_dir = app.config.sphinx_github_changelog_profile_dir
+    if not profile_dir:
+        return
+    for path in [*profiles(profile_dir), pathlib.Path(profile_dir) / MERGED_PROFILE]:
+        path.unlink(missing_ok=True)
+
+
+def on_build_finished(app, exception: Exception | None) -> None:
+    profile_dir = app.config.sphinx_github_changelog_profile_dir
+    if not profile_dir:
+        return
+    path = merge_profiles(profile_dir)
+    if path is not None:
+        logger.info(f"Changelog profiles written to {profile_dir}, merged in {path}")
@@ -2,7 +2,17 @@ from __future__ import annotations
 
 import importlib.metadata
 
-from . import changelog, config
+from . import (
+    cache,
+    changelog,
+    circuit_breaker,
+    config,
+    deferred,
+    export,
+    feed,
+    github_releases,
+    profiling,
+)
 
 
 def version() -> str:
@@ -15,9 +25,37 @@ def setup(app):
             name=option_name,
             default=default,
             rebuild="html",
+            # Whole numbers are fine for float options (e.g. timeouts).
+            types=(int, float) if isinstance(default, float) else (),
         )
 
     app.add_directive("changelog", changelog.ChangelogDirective)
+    app.add_crossref_type(
+        directivename=changelog.RELEASE_OBJECT_TYPE,
+        rolename="release",
+        objname="release",
+    )
+
+    app.add_node(
+        deferred.deferred_releases,
+        html=(
+            deferred.visit_deferred_releases_html,
+            deferred.depart_deferred_releases_html,
+        ),
+    )
+    app.connect("builder-inited", github_releases.clear_release_indexes)
+    app.connect("builder-inited", cache.on_builder_inited)
+    app.connect("builder-inited", circuit_breaker.reset_circuit_breakers)
+    app.connect("builder-inited", profiling.on_builder_inited)
+    app.connect("build-finished", github_releases.wait_for_refreshes)
+    app.connect("build-finished", export.on_build_finished)
+    app.connect("build-finished", feed.on_build_finished)
+    app.connect("build-finished", profiling.on_build_finished)
+    app.connect("env-purge-doc", export.on_env_purge_doc)
+    app.connect("env-merge-info", export.on_env_merge_info)
+    app.connect("config-inited", deferred.on_config_inited)
+    app.connect("doctree-resolved", deferred.on_doctree_resolved)
+    app.connect("html-page-context", deferred.on_html_page_context)
 
     return {
         "version": version(),
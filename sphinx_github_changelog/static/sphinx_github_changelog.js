@@ -0,0 +1,69 @@
+// Load the older releases of a changelog when the reader scrolls to them,
+// clicks the placeholder button, or follows a link to one of them.
+(function () {
+  "use strict";
+
+  function load(placeholder) {
+    if (!placeholder.isConnected || placeholder.dataset.loading) {
+      return Promise.resolve();
+    }
+    placeholder.dataset.loading = "true";
+    return fetch(placeholder.dataset.src)
+      .then(function (response) {
+        return response.json();
+      })
+      .then(function (data) {
+        placeholder.outerHTML = data.html;
+      })
+      .catch(function () {
+        delete placeholder.dataset.loading;
+      });
+  }
+
+  function loadAll() {
+    var placeholders = document.querySelectorAll(".changelog-deferred");
+    return Promise.all(Array.prototype.map.call(placeholders, load));
+  }
+
+  function revealHash() {
+    var id = decodeURIComponent(window.location.hash.slice(1));
+    if (!id || document.getElementById(id)) {
+      return;
+    }
+    loadAll().then(function () {
+      var target = document.getElementById(id);
+      if (target) {
+        target.scrollIntoView();
+      }
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    var placeholders = document.querySelectorAll(".changelog-deferred");
+    var observer =
+      "IntersectionObserver" in window
+        ? new IntersectionObserver(
+            function (entries) {
+              entries.forEach(function (entry) {
+                if (entry.isIntersecting) {
+                  observer.unobserve(entry.target);
+                  load(entry.target);
+                }
+              });
+            },
+            { rootMargin: "200px" }
+          )
+        : null;
+
+    placeholders.forEach(function (placeholder) {
+      placeholder.querySelector("button").addEventListener("click", function () {
+        load(placeholder);
+      });
+      if (observer) {
+        observer.observe(placeholder);
+      }
+    });
+    revealHash();
+  });
+  window.addEventListener("hashchange", revealHash);
+})();
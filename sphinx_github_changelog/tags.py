@@ -0,0 +1,144 @@
+"""
+Utilities for working with release tag names.
+
+Includes the tag patterns used to pick the releases of a single package in
+a repository that publishes several of them, and the keys used to order
+releases.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import functools
+import re
+
+from packaging.version import InvalidVersion, Version
+
+from . import exceptions
+
+ORDERS = ("date", "pep440", "semver")
+
+SEMVER_RE = re.compile(
+    r"(?P<major>0|[1-9]\d*)\.(?P<minor>0|[1-9]\d*)\.(?P<patch>0|[1-9]\d*)"
+    r"(?:-(?P<prerelease>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?"
+    r"(?:\+[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*)?"
+)
+
+
+def default_version(tag: str) -> str:
+    """Return the version a tag stands for, when no tag pattern is set.
+
+    >>> default_version('v1.2.3')
+    '1.2.3'
+    """
+    return tag.removeprefix("v")
+
+
+@dataclasses.dataclass(frozen=True)
+class TagPattern:
+    regex: re.Pattern
+
+    @classmethod
+    def from_option(cls, value: str) -> TagPattern:
+        """Build a pattern from the ``:tag-pattern:`` directive option.
+
+        Values containing a ``(`` are regular expressions, where the version is
+        captured by the group named ``version``, or else by the first group.
+        Other values are globs, where the first ``*`` stands for the version.
+
+        >>> TagPattern.from_option('pkg-a@*').match('pkg-a@1.2.3')
+        '1.2.3'
+        >>> TagPattern.from_option(r'pkg-a@v(\\d.*)').match('pkg-a@v1.2.3')
+        '1.2.3'
+        """
+        if "(" not in value:
+            value = glob_to_regex(value)
+        try:
+            regex = re.compile(value)
+        except re.error as exc:
+            raise exceptions.ChangelogError(
+                f"Invalid :tag-pattern: {value!r} ({exc})"
+            ) from exc
+        if not regex.groups:
+            raise exceptions.ChangelogError(
+                f"The :tag-pattern: {value!r} doesn't capture the version"
+            )
+        return cls(regex=regex)
+
+    def match(self, tag: str) -> str | None:
+        """Return the version of the tag, or None if the tag doesn't match."""
+        if not (m := self.regex.fullmatch(tag)):
+            return None
+        if "version" in self.regex.groupindex:
+            return m.group("version")
+        return m.group(1)
+
+
+def glob_to_regex(glob: str) -> str:
+    """
+    >>> glob_to_regex('pkg-a@v*')
+    'pkg\\\\-a@v(?P<version>.+)'
+    """
+    head, star, tail = glob.partition("*")
+    parts = [_glob_part_to_regex(head)]
+    if star:
+        parts += ["(?P<version>.+)", _glob_part_to_regex(tail)]
+    return "".join(parts)
+
+
+def _glob_part_to_regex(part: str) -> str:
+    return ".".join(
+        ".*".join(re.escape(chunk) for chunk in sub.split("*"))
+        for sub in part.split("?")
+    )
+
+
+@functools.cache
+def parse_pep440(version: str) -> Version | None:
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return None
+
+
+@functools.cache
+def parse_semver(version: str) -> tuple | None:
+    """Return a key following the SemVer 2.0.0 precedence rules.
+
+    >>> parse_semver('1.0.0-rc.1') < parse_semver('1.0.0')
+    True
+    """
+    if not (m := SEMVER_RE.fullmatch(version)):
+        return None
+    core = (int(m["major"]), int(m["minor"]), int(m["patch"]))
+    if m["prerelease"] is None:
+        # A release has a higher precedence than its pre-releases.
+        return (*core, (1,))
+    identifiers = tuple(
+        (0, int(identifier), "") if identifier.isdigit() else (1, 0, identifier)
+        for identifier in m["prerelease"].split(".")
+    )
+    return (*core, (0, identifiers))
+
+
+def _version_key(version: str, parse) -> tuple:
+    # Versions that can't be parsed sort before the others, i.e. last in the
+    # changelog.
+    parsed = parse(version)
+    return (0,) if parsed is None else (1, parsed)
+
+
+@functools.cache
+def sort_key(order: str, version: str, published_at: datetime.date) -> tuple:
+    """Return the key ordering releases from the oldest to the newest.
+
+    Keys are cached, so sorting the same releases again is cheap. Ties are
+    broken deterministically, by version for the date order, and by date for
+    the version orders.
+    """
+    if order == "pep440":
+        return (*_version_key(version, parse_pep440), published_at)
+    if order == "semver":
+        return (*_version_key(version, parse_semver), published_at)
+    return (published_at, *_version_key(version, parse_pep440), version)
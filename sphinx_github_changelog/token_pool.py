@@ -0,0 +1,98 @@
+"""
+Pools of GitHub API tokens.
+
+Wherever a token is expected (``sphinx_github_changelog_token``, the
+environment variables, ``--token``), several ones can be given, separated by
+commas or whitespace: e.g. tokens of different accounts, or GitHub App
+installation tokens. Each call uses the healthiest token of the pool: the one
+with the largest remaining rate limit budget, as reported by the
+``X-RateLimit-*`` headers of its last response (tokens whose budget is unknown,
+or was reset since, are tried first). Calls are thus spread across the tokens,
+and a token is left aside before it's exhausted, as long as the others have
+budget left. Budgets are tracked per rate limit resource (``core`` for the REST
+API, ``graphql``), as GitHub does.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import math
+import threading
+import time
+from collections.abc import Callable, Mapping
+
+
+def split_tokens(token: str) -> tuple[str, ...]:
+    return tuple(token.replace(",", " ").split())
+
+
+@dataclasses.dataclass(frozen=True)
+class Budget:
+    remaining: int
+    # Epoch time at which the budget is restored.
+    reset_at: float
+
+
+@dataclasses.dataclass
+class TokenPool:
+    tokens: tuple[str, ...]
+    clock: Callable[[], float] = time.time
+
+    budgets: dict[tuple[str, str], Budget] = dataclasses.field(
+        default_factory=dict, repr=False
+    )
+    lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def remaining(self, token: str, resource: str = "core") -> float:
+        """Return the known remaining budget of the token, or infinity if it's
+        unknown."""
+        budget = self.budgets.get((token, resource))
+        if budget is None or budget.reset_at <= self.clock():
+            return math.inf
+        return budget.remaining
+
+    def pick(self, resource: str = "core") -> str:
+        """Return the token with the largest remaining budget (the first one,
+        on ties)."""
+        with self.lock:
+            return max(self.tokens, key=lambda t: self.remaining(t, resource))
+
+    def record(self, token: str, headers: Mapping[str, str]) -> None:
+        """Update the budget of the token from the headers of a response."""
+        try:
+            budget = Budget(
+                remaining=int(headers["x-ratelimit-remaining"]),
+                reset_at=float(headers["x-ratelimit-reset"]),
+            )
+        except (KeyError, ValueError):
+            return
+        resource = headers.get("x-ratelimit-resource", "core")
+        with self.lock:
+            self.budgets[token, resource] = budget
+
+    def should_rotate(self, token: str, resource: str = "core") -> bool:
+        """Whether the token is exhausted, and another one still has budget."""
+        with self.lock:
+            return self.remaining(token, resource) <= 0 and any(
+                self.remaining(t, resource) > 0 for t in self.tokens
+            )
+
+
+_token_pools: dict[str, TokenPool] = {}
+_token_pools_lock = threading.Lock()
+
+
+def get_token_pool(token: str) -> TokenPool:
+    """Return the pool of the tokens of ``token``, shared by all the calls of
+    the process, so that they all see the same budgets.
+    """
+    with _token_pools_lock:
+        if token not in _token_pools:
+            _token_pools[token] = TokenPool(tokens=split_tokens(token))
+        return _token_pools[token]
+
+
+def clear_token_pools() -> None:
+    _token_pools.clear()
@@ -9,7 +9,6 @@ from __future__ import annotations
 import dataclasses
 import pathlib
 import re
-import subprocess
 from typing import Self
 from urllib.parse import urlparse
 
@@ -83,6 +82,12 @@ class GitHubParams:
             return "https://api.github.com"
         return f"https://{self.hostname}/api/v3"
 
+    @property
+    def graphql_api_url(self) -> str:
+        if self.is_github_com:
+            return "https://api.github.com/graphql"
+        return f"https://{self.hostname}/api/graphql"
+
     @property
     def releases_api_url(self) -> str:
         return f"{self.rest_api_url}/repos/{self.owner}/{self.repo}/releases"
@@ -104,6 +109,7 @@ def extract_remote_candidates() -> list[str]:
     Prefer upstream, then origin, if these are set and represent a
     GitHub remote.
     """
+    import subprocess
 
     remotes = subprocess.check_output(["git", "remote", "-v"], text=True).splitlines()
     urls: dict[str, str] = {}
@@ -0,0 +1,120 @@
+"""
+WSGI application keeping the release cache up to date from GitHub webhooks.
+
+It receives the ``release`` events of the repositories (or organizations) whose
+webhooks point to it, checks their signature, and updates the releases stored
+in the cache directory from the release in the event payload, so that the next
+builds see it without calling GitHub API. Run it with
+``sphinx-github-changelog webhook``, or with any WSGI server::
+
+    from sphinx_github_changelog import cache, webhook
+
+    application = webhook.make_app(
+        cache=cache.from_config("/var/cache/changelog"),
+        secret=os.environ[webhook.SECRET_ENV_VAR],
+    )
+
+Repositories that aren't in the cache yet are left alone: the next build
+downloads all their releases.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from . import cache as cache_module
+from . import exceptions, github_releases, urls
+
+logger = logging.getLogger(__name__)
+
+SECRET_ENV_VAR = "SPHINX_GITHUB_CHANGELOG_WEBHOOK_SECRET"
+
+# GitHub doesn't send larger payloads.
+MAX_PAYLOAD_SIZE = 25 * 1024 * 1024
+
+StartResponse = Callable[[str, list[tuple[str, str]]], Any]
+
+
+def signature(secret: str, body: bytes) -> str:
+    """Return the ``X-Hub-Signature-256`` header GitHub sends with ``body``."""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def is_valid_signature(secret: str, body: bytes, header: str | None) -> bool:
+    return header is not None and hmac.compare_digest(signature(secret, body), header)
+
+
+def handle_release_event(cache: cache_module.ReleaseCache, event: dict) -> str:
+    """Apply a ``release`` event to the cache, and describe what was done."""
+    try:
+        github_params = urls.GitHubParams.from_http_url(event["repository"]["html_url"])
+        payload = github_releases.Release.trim_rest(event["release"])
+        # Payloads that couldn't be read back aren't stored.
+        github_releases.Release.from_rest(payload)
+        action = event["action"]
+        previous_tag_name = (event.get("changes") or {}).get("tag_name", {}).get("from")
+    except (KeyError, TypeError, AttributeError, exceptions.ChangelogError) as exc:
+        raise exceptions.ChangelogError(f"Invalid release event: {exc!r}") from exc
+
+    deleted = action == "deleted"
+    if not cache.update_release(
+        github_params,
+        payload,
+        deleted=deleted,
+        previous_tag_name=previous_tag_name,
+    ):
+        return f"{github_params.repo_url} is not cached"
+    return (
+        f"{'Removed' if deleted else 'Updated'} release {payload['tag_name']} "
+        f"of {github_params.repo_url}"
+    )
+
+
+def make_app(
+    cache: cache_module.ReleaseCache, secret: str
+) -> Callable[[dict, StartResponse], Iterable[bytes]]:
+    if not secret:
+        raise exceptions.ChangelogError(
+            f"The webhook needs a secret: set the {SECRET_ENV_VAR} environment "
+            "variable, and the same secret on the GitHub webhooks"
+        )
+
+    def application(environ: dict, start_response: StartResponse) -> list[bytes]:
+        def respond(status: str, message: str) -> list[bytes]:
+            start_response(status, [("Content-Type", "text/plain; charset=utf-8")])
+            return [message.encode() + b"\n"]
+
+        if environ["REQUEST_METHOD"] != "POST":
+            return respond("405 Method Not Allowed", "Only POST is supported")
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_PAYLOAD_SIZE:
+            return respond("400 Bad Request", "Invalid Content-Length")
+        body = environ["wsgi.input"].read(length)
+
+        if not is_valid_signature(
+            secret, body, environ.get("HTTP_X_HUB_SIGNATURE_256")
+        ):
+            return respond("401 Unauthorized", "Invalid signature")
+
+        event_name = environ.get("HTTP_X_GITHUB_EVENT")
+        if event_name == "ping":
+            return respond("200 OK", "pong")
+        if event_name != "release":
+            return respond("202 Accepted", f"Ignored {event_name} event")
+
+        try:
+            message = handle_release_event(cache, json.loads(body))
+        except (ValueError, exceptions.ChangelogError) as exc:
+            return respond("400 Bad Request", str(exc))
+        logger.info(message)
+        return respond("200 OK", message)
+
+    return application
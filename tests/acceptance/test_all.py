@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import datetime
+import gzip
+import json
 from pathlib import Path
+from xml.etree import ElementTree
 
 import pytest
 from bs4 import BeautifulSoup
 
-from sphinx_github_changelog import credentials, exceptions
+from sphinx_github_changelog import cache, credentials, exceptions, export, urls
 
 
 def normalize_html_fragment(fragment: str) -> str:
@@ -25,8 +29,12 @@ def no_local_token_discovery(monkeypatch):
 
 @pytest.mark.vcr
 @pytest.mark.sphinx(buildername="html", testroot="all")
-def test_build(app):
+def test_build(app, status):
     app.builder.build_all()
+    assert (
+        "Downloaded releases of https://github.com/ewjoachim/sphinx-github-changelog: "
+        in status.getvalue()
+    )
     received = (app.outdir / "index.html").read_text()
     expected_path = Path(__file__).parent / "changelog.html"
     expected = expected_path.read_text()
@@ -52,6 +60,32 @@ def test_build_404(app):
     assert "Find the project changelog" in received
 
 
+@pytest.mark.vcr
+@pytest.mark.default_cassette("test_build_404.yaml")
+@pytest.mark.sphinx(buildername="html", testroot="404", freshenv=True)
+def test_build_404_last_known_good(app, warning, release_dict):
+    github_params = urls.GitHubParams(
+        hostname="github.com", owner="ewjoachim", repo="sphinx-github-changelog-nope"
+    )
+    path = cache.build_cache.path(github_params)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fetched_at = datetime.datetime(2000, 1, 2, 3, 4, tzinfo=datetime.UTC)
+    content = json.dumps(cache.CacheEntry(fetched_at, [release_dict]).to_json())
+    path.write_bytes(gzip.compress(content.encode()))
+    # The test root's build directory is shared with the other tests.
+    try:
+        app.builder.build_all()
+    finally:
+        path.unlink()
+    received = (app.outdir / "index.html").read_text()
+    assert "this changelog shows the releases as of 2000-01-02 03:04 UTC" in received
+    assert 'id="release-1-0-0"' in received
+    assert (
+        "Using releases of https://github.com/ewjoachim/sphinx-github-changelog-nope "
+        "cached on 2000-01-02 03:04 UTC" in warning.getvalue()
+    )
+
+
 @pytest.mark.sphinx(buildername="html", testroot="error")
 def test_error(app, status, warning):
     app.builder.build_all()
@@ -59,3 +93,109 @@ def test_error(app, status, warning):
         "No :github: release URL provided and unable to determine it from "
         "git remotes." in warning.getvalue()
     )
+
+
+@pytest.mark.vcr
+@pytest.mark.default_cassette("test_build.yaml")
+@pytest.mark.sphinx(buildername="html", testroot="deferred")
+def test_build_deferred(app):
+    app.builder.build_all()
+    received = (app.outdir / "index.html").read_text()
+    assert "release-1-0-0" not in received
+    assert 'data-src="_changelog/index/0.json"' in received
+    assert "sphinx_github_changelog.js" in received
+    assert (app.outdir / "_static" / "sphinx_github_changelog.js").exists()
+
+    fragment = json.loads((app.outdir / "_changelog" / "index" / "0.json").read_text())
+    assert 'id="release-1-0-0"' in fragment["html"]
+
+
+@pytest.mark.vcr
+@pytest.mark.default_cassette("test_build.yaml")
+@pytest.mark.sphinx(buildername="text", testroot="deferred")
+def test_build_deferred_text(app):
+    app.builder.build_all()
+    received = (app.outdir / "index.txt").read_text()
+    assert "1.0.0: A fresh start" in received
+    assert not (app.outdir / "_changelog").exists()
+
+
+@pytest.mark.vcr
+@pytest.mark.default_cassette("test_build.yaml")
+@pytest.mark.sphinx(buildername="html", testroot="release-role")
+def test_build_release_role(app, warning):
+    app.builder.build_all()
+    excerpt = (app.outdir / "excerpt.html").read_text()
+    assert 'href="index.html#release-1-0-0"' in excerpt
+    assert 'id="release-1-0-0"' in excerpt
+    assert "WARNING" not in warning.getvalue()
+    # Neither exported nor written to a feed.
+    assert not getattr(app.env, export.ENV_ATTRIBUTE, None)
+
+
+@pytest.mark.vcr
+@pytest.mark.default_cassette("test_build.yaml")
+@pytest.mark.sphinx(buildername="html", testroot="two-changelogs", freshenv=True)
+def test_build_two_changelogs(app, warning):
+    app.build(force_all=True)
+    assert "WARNING" not in warning.getvalue()
+    index = (app.outdir / "index.html").read_text()
+    for name in ["1.0.0", "ewjoachim/sphinx-github-changelog&#64;1.0.0"]:
+        assert (
+            '<a class="reference internal" href="#release-1-0-0"><code class="xref '
+            f'std std-release docutils literal notranslate"><span class="pre">{name}'
+        ) in index
+
+
+@pytest.mark.vcr
+@pytest.mark.default_cassette("test_build.yaml")
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="release-role",
+    freshenv=True,
+    confoverrides={"sphinx_github_changelog_export": "json,markdown"},
+)
+def test_build_export(app):
+    app.build(force_all=True)
+    export_dir = app.outdir / "_changelog" / "github.com" / "ewjoachim"
+    releases = json.loads((export_dir / "sphinx-github-changelog.json").read_text())
+    assert releases[-1]["tag_name"] == "1.0.0"
+    assert releases[-1]["url"].startswith("https://github.com/")
+    markdown = (export_dir / "sphinx-github-changelog.md").read_text()
+    assert "## 1.0.0" in markdown
+
+
+@pytest.mark.vcr
+@pytest.mark.default_cassette("test_build.yaml")
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="release-role",
+    freshenv=True,
+    confoverrides={"sphinx_github_changelog_feed": "atom"},
+)
+def test_build_feed(app):
+    app.build(force_all=True)
+    path = app.outdir / "_changelog/github.com/ewjoachim/sphinx-github-changelog.atom"
+    root = ElementTree.fromstring(path.read_text())
+    [entry] = root.findall("{http://www.w3.org/2005/Atom}entry")
+    content = entry.findtext("{http://www.w3.org/2005/Atom}content")
+    assert "<li><p>Initial code (#2)</p></li>" in content
+    assert "System Message" not in content
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPHINX_GITHUB_CHANGELOG_PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.vcr
+@pytest.mark.default_cassette("test_build.yaml")
+@pytest.mark.sphinx(buildername="html", testroot="release-role", freshenv=True)
+def test_build_profile(profile_dir, app):
+    app.build(force_all=True)
+    assert sorted(path.name for path in profile_dir.iterdir()) == [
+        "changelog.prof",
+        "excerpt-L6.prof",
+        "index-L8.prof",
+    ]
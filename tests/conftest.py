@@ -6,7 +6,14 @@ from pathlib import Path
 
 import pytest
 
-from sphinx_github_changelog import github_releases
+from sphinx_github_changelog import (
+    cache,
+    circuit_breaker,
+    github_app,
+    github_releases,
+    token_pool,
+    urls,
+)
 
 pytest_plugins = "sphinx.testing.fixtures"
 
@@ -68,6 +75,16 @@ def release_dict():
     }
 
 
+@pytest.fixture
+def github_params():
+    return urls.GitHubParams(hostname="github.com", owner="a", repo="b")
+
+
+@pytest.fixture
+def release_cache(tmp_path):
+    return cache.ReleaseCache(directory=tmp_path)
+
+
 @pytest.fixture
 def release(release_dict):
     return github_releases.Release.from_rest(release_dict)
@@ -84,6 +101,17 @@ def env(monkeypatch):
     monkeypatch.delenv("GITHUB_TOKEN", raising=False)
 
 
+@pytest.fixture(autouse=True)
+def release_indexes():
+    github_releases.clear_release_indexes()
+    circuit_breaker.reset_circuit_breakers()
+    token_pool.clear_token_pools()
+    github_app.clear_installation_tokens()
+    yield
+    github_releases.wait_for_refreshes()
+    github_releases.clear_release_indexes()
+
+
 @pytest.fixture(scope="module")
 def vcr_config():
     return {
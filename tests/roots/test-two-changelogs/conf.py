@@ -0,0 +1,5 @@
+from __future__ import annotations
+
+extensions = ["sphinx_github_changelog"]
+
+buildername = "html"
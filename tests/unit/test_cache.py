@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import re
+import threading
+import time
+
+import pytest
+
+from sphinx_github_changelog import cache, exceptions, github_releases, urls
+
+
+def test_release_cache_path(release_cache, github_params, tmp_path):
+    assert release_cache.path(github_params) == (
+        tmp_path / "github.com" / "a" / "b.json.gz"
+    )
+
+
+def test_release_cache_load_missing(release_cache, github_params):
+    assert release_cache.load(github_params) is None
+
+
+def test_release_cache_save_load(release_cache, github_params, release_dict):
+    saved = release_cache.save(github_params, [release_dict])
+
+    loaded = release_cache.load(github_params)
+    assert loaded == saved
+    assert loaded.payloads == [release_dict]
+    assert loaded.fetched_at.tzinfo == datetime.UTC
+    assert list(release_cache.path(github_params).parent.iterdir()) == [
+        release_cache.path(github_params)
+    ]
+
+
+def test_release_cache_load_invalid(release_cache, github_params):
+    path = release_cache.path(github_params)
+    path.parent.mkdir(parents=True)
+    path.write_text("{}")
+
+    with pytest.raises(exceptions.ChangelogError, match="Invalid release cache file"):
+        release_cache.load(github_params)
+
+
+def test_release_cache_references(release_cache, github_params):
+    assert release_cache.load_references(github_params) == {}
+
+    release_cache.save_references(github_params, {"#1": None, "@a": {"login": "a"}})
+
+    assert release_cache.load_references(github_params) == {
+        "#1": None,
+        "@a": {"login": "a"},
+    }
+    assert release_cache.references_path(github_params).name == "b.references.json.gz"
+
+
+def test_release_cache_references_invalid(release_cache, github_params):
+    path = release_cache.references_path(github_params)
+    path.parent.mkdir(parents=True)
+    path.write_text("{}")
+
+    with pytest.raises(exceptions.ChangelogError, match="Invalid release cache file"):
+        release_cache.load_references(github_params)
+
+
+def test_from_config(tmp_path):
+    assert cache.from_config(None) is None
+    assert cache.from_config(str(tmp_path)) == cache.ReleaseCache(directory=tmp_path)
+    assert cache.from_config(
+        str(tmp_path), backend="sqlite"
+    ) == cache.SQLiteReleaseCache(directory=tmp_path)
+
+
+def test_from_config_ttl(tmp_path):
+    release_cache = cache.from_config(str(tmp_path), ttl=60, max_staleness=3600)
+
+    assert release_cache.ttl == datetime.timedelta(minutes=1)
+    assert release_cache.max_staleness == datetime.timedelta(hours=1)
+
+
+def test_release_cache_is_stale(tmp_path):
+    release_cache = cache.ReleaseCache(
+        directory=tmp_path, ttl=datetime.timedelta(hours=1)
+    )
+    now = datetime.datetime.now(tz=datetime.UTC)
+
+    assert not release_cache.is_stale(cache.CacheEntry(fetched_at=now, payloads=[]))
+    assert release_cache.is_stale(
+        cache.CacheEntry(fetched_at=now - datetime.timedelta(hours=2), payloads=[])
+    )
+    assert not cache.ReleaseCache(directory=tmp_path).is_stale(
+        cache.CacheEntry(fetched_at=now - datetime.timedelta(days=365), payloads=[])
+    )
+
+
+def test_release_cache_max_staleness(release_cache, github_params):
+    entry = release_cache.save(github_params, [])
+    release_cache.max_staleness = datetime.timedelta(hours=1)
+
+    assert release_cache.load(github_params) == entry
+    release_cache.max_staleness = datetime.timedelta(microseconds=1)
+    time.sleep(0.001)
+    assert release_cache.load(github_params) is None
+
+
+def test_from_config_unknown_backend(tmp_path):
+    with pytest.raises(exceptions.ChangelogError, match="Unknown cache backend"):
+        cache.from_config(str(tmp_path), backend="redis")
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    return cache.SQLiteReleaseCache(directory=tmp_path)
+
+
+def test_sqlite_release_cache_load_missing(sqlite_cache, github_params):
+    assert sqlite_cache.load(github_params) is None
+
+
+def test_sqlite_release_cache_save_load(sqlite_cache, github_params, release_dict):
+    other_repo = urls.GitHubParams(hostname="github.com", owner="a", repo="c")
+    sqlite_cache.save(other_repo, [{**release_dict, "tag_name": "0.1.0"}])
+    sqlite_cache.save(github_params, [{**release_dict, "tag_name": "0.1.0"}])
+    saved = sqlite_cache.save(
+        github_params,
+        [
+            release_dict,
+            {**release_dict, "tag_name": "2.0.0", "published_at": "2000-03-01"},
+        ],
+    )
+
+    loaded = sqlite_cache.load(github_params)
+    assert loaded.fetched_at == saved.fetched_at
+    assert sorted(p["tag_name"] for p in loaded.payloads) == ["1.0.0", "2.0.0"]
+    assert release_dict in loaded.payloads
+    assert sqlite_cache.path(github_params) == sqlite_cache.directory / (
+        "releases.sqlite3"
+    )
+
+
+def test_sqlite_release_cache_filter(sqlite_cache, github_params, release_dict):
+    sqlite_cache.save(
+        github_params,
+        [
+            release_dict,
+            {**release_dict, "tag_name": "1.1.0rc1", "prerelease": True},
+            {
+                **release_dict,
+                "tag_name": "v2.0.0",
+                "published_at": None,
+                "created_at": "2000-03-01",
+            },
+            {**release_dict, "tag_name": "3.0.0", "draft": True},
+        ],
+    )
+
+    def load(**kwargs):
+        release_filter = github_releases.ReleaseFilter(**kwargs)
+        entry = sqlite_cache.load(github_params, release_filter=release_filter)
+        return sorted(p["tag_name"] for p in entry.payloads)
+
+    assert load() == ["1.0.0", "1.1.0rc1", "v2.0.0"]
+    assert load(include_drafts=True, include_prereleases=False) == [
+        "1.0.0",
+        "3.0.0",
+        "v2.0.0",
+    ]
+    assert load(include_tags=re.compile(r"^\d"), exclude_tags=re.compile("rc")) == [
+        "1.0.0"
+    ]
+    assert load(published_since=datetime.date(2000, 2, 1)) == ["v2.0.0"]
+
+
+def test_sqlite_release_cache_fresh_since(sqlite_cache, github_params):
+    entry = sqlite_cache.save(github_params, [])
+
+    later = entry.fetched_at + datetime.timedelta(seconds=1)
+    assert (
+        dataclasses.replace(sqlite_cache, fresh_since=later).load(github_params) is None
+    )
+
+
+def test_release_cache_fresh_since(tmp_path, github_params):
+    release_cache = cache.ReleaseCache(directory=tmp_path)
+    entry = release_cache.save(github_params, [])
+
+    assert (
+        dataclasses.replace(release_cache, fresh_since=entry.fetched_at).load(
+            github_params
+        )
+        == entry
+    )
+    later = entry.fetched_at + datetime.timedelta(seconds=1)
+    assert (
+        dataclasses.replace(release_cache, fresh_since=later).load(github_params)
+        is None
+    )
+
+
+def test_release_cache_last_known_good(tmp_path, github_params):
+    release_cache = cache.ReleaseCache(directory=tmp_path)
+    entry = release_cache.save(github_params, [])
+    release_cache.fresh_since = entry.fetched_at + datetime.timedelta(seconds=1)
+    release_cache.max_staleness = datetime.timedelta(microseconds=1)
+
+    assert release_cache.load(github_params) is None
+    assert release_cache.last_known_good(github_params) == entry
+
+
+def test_release_cache_lock(release_cache, github_params):
+    events = []
+
+    def other():
+        with release_cache.lock(github_params):
+            events.append("other")
+
+    with release_cache.lock(github_params):
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join(timeout=0.2)
+        events.append("first")
+    thread.join()
+
+    assert events == ["first", "other"]
+
+
+@pytest.fixture(params=cache.BACKENDS)
+def any_cache(request, tmp_path):
+    return cache.from_config(str(tmp_path), backend=request.param)
+
+
+def test_update_release_not_cached(any_cache, github_params, release_dict):
+    assert any_cache.update_release(github_params, release_dict) is False
+    assert any_cache.load(github_params) is None
+
+
+def test_update_release(any_cache, github_params, release_dict):
+    old = {**release_dict, "tag_name": "0.9.0", "published_at": "1999-01-01"}
+    fetched_at = any_cache.save(github_params, [release_dict, old]).fetched_at
+    new = {**release_dict, "tag_name": "2.0.0", "published_at": "2001-01-01"}
+    edited = {**release_dict, "name": "Edited"}
+
+    assert any_cache.update_release(github_params, new) is True
+    assert any_cache.update_release(github_params, edited) is True
+    assert any_cache.update_release(github_params, old, deleted=True) is True
+
+    entry = any_cache.load(github_params)
+    assert entry.fetched_at == fetched_at
+    assert sorted(entry.payloads, key=lambda p: p["tag_name"]) == [edited, new]
+
+
+def test_update_release_renamed_tag(any_cache, github_params, release_dict):
+    any_cache.save(github_params, [release_dict])
+    renamed = {**release_dict, "tag_name": "v1.0.0"}
+
+    assert any_cache.update_release(
+        github_params, renamed, previous_tag_name=release_dict["tag_name"]
+    )
+    assert any_cache.load(github_params).payloads == [renamed]
+
+
+def test_on_builder_inited(tmp_path, mocker, monkeypatch):
+    monkeypatch.setattr(cache, "build_cache", None)
+    app = mocker.Mock(doctreedir=str(tmp_path))
+
+    cache.on_builder_inited(app)
+
+    assert cache.build_cache.directory == tmp_path / "sphinx_github_changelog"
+    assert cache.build_cache.fresh_since is not None
+    assert cache.from_config(None) is cache.build_cache
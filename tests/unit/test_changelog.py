@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+import datetime
+import gc
 import re
+import tracemalloc
 import xml.dom.minidom
 
 import pytest
-
-from sphinx_github_changelog import changelog, credentials, exceptions
+from docutils import nodes
+
+from sphinx_github_changelog import cache as cache_module
+from sphinx_github_changelog import (
+    changelog,
+    credentials,
+    deferred,
+    exceptions,
+    export,
+    github_releases,
+    urls,
+)
 from sphinx_github_changelog import config as config_module
 
 
@@ -43,11 +56,15 @@ def canonicalize(value):
     )
 
 
-def test_compute_changelog_no_token(monkeypatch):
+def test_compute_changelog_no_token(monkeypatch, httpx_mock):
     def raise_no_token(host):
         raise exceptions.CouldNotExtract("No GitHub token found")
 
     monkeypatch.setattr(credentials, "get_github_token", raise_no_token)
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        status_code=404,
+    )
     options = config_module.ChangelogDirectiveOptions(
         github="https://github.com/a/b/releases",
     )
@@ -80,18 +97,180 @@ def test_compute_changelog_token(extract_releases):
     assert "1.0.0: A new hope" in node_to_string(nodes[0])
 
 
-def test_compute_changelog_exclude_prereleases(mocker, release):
-    release.is_prerelease = True
+def test_compute_changelog_exclude_prereleases(extract_releases, release_dict):
+    options = config_module.ChangelogDirectiveOptions(
+        github="https://github.com/a/b/releases",
+    )
+    config = config_module.ChangelogConfig(token="token", include_prereleases=False)
+    changelog.compute_changelog(options=options, config=config)
+
+    release_filter = extract_releases.call_args.kwargs["release_filter"]
+    assert release_filter(release_dict)
+    assert not release_filter({**release_dict, "prerelease": True})
+
+
+def test_compute_changelog_tag_filters(extract_releases, release_dict):
+    options = config_module.ChangelogDirectiveOptions(
+        github="https://github.com/a/b/releases",
+    )
+    config = config_module.ChangelogConfig(
+        token="token", include_tags=r"^\d", exclude_tags=r"rc"
+    )
+    changelog.compute_changelog(options=options, config=config)
+
+    release_filter = extract_releases.call_args.kwargs["release_filter"]
+    assert release_filter(release_dict)
+    assert not release_filter({**release_dict, "tag_name": "v1.0.0"})
+    assert not release_filter({**release_dict, "tag_name": "1.0.0rc1"})
+
+
+def test_compute_changelog_since(extract_releases, release_dict):
+    options = config_module.ChangelogDirectiveOptions(
+        github="https://github.com/a/b/releases",
+    )
+    config = config_module.ChangelogConfig(token="token", since="2000-01-02")
+    changelog.compute_changelog(options=options, config=config)
+
+    release_filter = extract_releases.call_args.kwargs["release_filter"]
+    assert release_filter.published_since == datetime.date(2000, 1, 2)
+    assert not release_filter(release_dict)
+
+
+def test_compute_changelog_invalid_since():
+    options = config_module.ChangelogDirectiveOptions(
+        github="https://github.com/a/b/releases",
+    )
+    config = config_module.ChangelogConfig(token="token", since="yesterday")
+    with pytest.raises(
+        exceptions.ChangelogError,
+        match=r"^Invalid date for sphinx_github_changelog_since: 'yesterday'",
+    ):
+        changelog.compute_changelog(options=options, config=config)
+
+
+def test_compute_changelog_last_known_good(mocker, release):
+    as_of = datetime.datetime(2000, 1, 2, 3, 4, tzinfo=datetime.UTC)
     mocker.patch(
-        "sphinx_github_changelog.github_releases.extract_releases",
-        return_value=[release],
+        "sphinx_github_changelog.github_releases.get_release_index",
+        return_value=github_releases.ReleaseIndex(
+            releases=[release],
+            as_of=as_of,
+            fetch_error=exceptions.GitHubAPIError("Boom"),
+        ),
     )
+    warn = mocker.Mock()
+    options = config_module.ChangelogDirectiveOptions(
+        github="https://github.com/a/b/releases", inline_releases=0
+    )
+    config = config_module.ChangelogConfig(token="token")
+
+    note, deferred_releases = changelog.compute_changelog(
+        options=options, config=config, warn=warn
+    )
+
+    assert "shows the releases as of 2000-01-02 03:04 UTC" in node_to_string(note)
+    assert "1.0.0: A new hope" in node_to_string(deferred_releases)
+    warn.assert_called_once_with(
+        "Using releases of https://github.com/a/b cached on 2000-01-02 03:04 UTC: Boom"
+    )
+    assert len(changelog.compute_changelog(options=options, config=config)) == 2
+
+
+@pytest.mark.parametrize(
+    "max_staleness, note", [(0, False), (60, True)], ids=["fresh", "last-known-good"]
+)
+def test_compute_changelog_app_token_unavailable(
+    mocker, tmp_path, release_dict, max_staleness, note
+):
+    get_installation_token = mocker.patch(
+        "sphinx_github_changelog.github_app.get_installation_token",
+        side_effect=exceptions.GitHubAPIError("Boom"),
+    )
+    github_params = urls.GitHubParams(hostname="github.com", owner="a", repo="b")
+    cache_module.ReleaseCache(directory=tmp_path).save(
+        github_params,
+        [release_dict],
+        fetched_at=datetime.datetime(2000, 1, 2, tzinfo=datetime.UTC),
+    )
+    config = config_module.ChangelogConfig(
+        token="token",
+        app_id="42",
+        app_private_key="key",
+        cache_dir=str(tmp_path),
+        cache_max_staleness=max_staleness,
+    )
+
+    result = changelog.compute_changelog(
+        options=config_module.ChangelogDirectiveOptions(
+            github="https://github.com/a/b/releases"
+        ),
+        config=config,
+    )
+
+    assert "1.0.0: A new hope" in node_to_string(result)
+    assert ("shows the releases as of" in node_to_string(result)) is note
+    # Only minted when the releases had to be downloaded.
+    assert get_installation_token.called is note
+
+
+def test_compute_changelog_enrich_references(extract_releases, release, mocker):
+    release.description = "Fixed in #12"
+    resolve_references = mocker.patch(
+        "sphinx_github_changelog.enrichment.resolve_references",
+        return_value={
+            "#12": {
+                "type": "PullRequest",
+                "title": "Fix",
+                "url": "https://github.com/a/b/pull/12",
+            }
+        },
+    )
+
+    [section] = changelog.compute_changelog(
+        options=config_module.ChangelogDirectiveOptions(
+            github="https://github.com/a/b/releases",
+        ),
+        config=config_module.ChangelogConfig(token="token", enrich_references=True),
+    )
+
+    assert resolve_references.call_args.kwargs["descriptions"] == ["Fixed in #12"]
+    assert (
+        '<reference classes="changelog-pull-request" reftitle="Fix" '
+        'refuri="https://github.com/a/b/pull/12">#12</reference>'
+        in node_to_string(section)
+    )
+
+
+def test_compute_changelog_enrich_references_error(extract_releases, mocker):
+    mocker.patch(
+        "sphinx_github_changelog.enrichment.resolve_references",
+        side_effect=exceptions.GitHubAPIError("Boom"),
+    )
+    warn = mocker.Mock()
     options = config_module.ChangelogDirectiveOptions(
         github="https://github.com/a/b/releases",
     )
-    config = config_module.ChangelogConfig(token="token", include_prereleases=False)
-    nodes = changelog.compute_changelog(options=options, config=config)
-    assert nodes == []
+    config = config_module.ChangelogConfig(token="token", enrich_references=True)
+
+    assert (
+        len(changelog.compute_changelog(options=options, config=config, warn=warn)) == 1
+    )
+    warn.assert_called_once_with(
+        "Could not resolve references of https://github.com/a/b: Boom"
+    )
+    assert len(changelog.compute_changelog(options=options, config=config)) == 1
+
+
+def test_compute_changelog_invalid_tag_filter():
+    options = config_module.ChangelogDirectiveOptions(
+        github="https://github.com/a/b/releases",
+    )
+    config = config_module.ChangelogConfig(token="token", include_tags="(")
+    with pytest.raises(
+        exceptions.ChangelogError,
+        match=r"^Invalid regular expression for sphinx_github_changelog_include_tags",
+    ):
+        changelog.compute_changelog(options=options, config=config)
 
 
 def test_compute_changelog_include_prereleases(extract_releases, release):
@@ -104,6 +283,227 @@ def test_compute_changelog_include_prereleases(extract_releases, release):
     assert "1.0.0: A new hope" in node_to_string(nodes[0])
 
 
+def test_compute_changelog_tag_pattern(mocker, release_dict):
+    releases = [
+        github_releases.Release.from_rest({**release_dict, "tag_name": tag})
+        for tag in ["pkg-a@2.0.0", "pkg-b@1.1.0"]
+    ]
+    extract_releases = mocker.patch(
+        "sphinx_github_changelog.github_releases.extract_releases",
+        return_value=releases,
+    )
+    config = config_module.ChangelogConfig(token="token")
+
+    nodes_a = changelog.compute_changelog(
+        options=config_module.ChangelogDirectiveOptions(
+            github="https://github.com/a/b/releases",
+            tag_pattern="pkg-a@*",
+            pypi="https://pypi.org/project/pkg-a/",
+        ),
+        config=config,
+    )
+    nodes_b = changelog.compute_changelog(
+        options=config_module.ChangelogDirectiveOptions(
+            github="https://github.com/a/b/releases",
+            tag_pattern="pkg-b@*",
+        ),
+        config=config,
+    )
+
+    extract_releases.assert_called_once()
+    assert len(nodes_a) == 1
+    assert len(nodes_b) == 1
+    value = node_to_string(nodes_a[0])
+    assert "2.0.0: A new hope" in value
+    assert 'ids="release-pkg-a-2-0-0"' in value
+    assert "https://pypi.org/project/pkg-a/2.0.0/" in value
+    assert "1.1.0: A new hope" in node_to_string(nodes_b[0])
+
+
+def test_compute_changelog_note_release(mocker, release_dict):
+    releases = [
+        github_releases.Release.from_rest({**release_dict, "tag_name": tag})
+        for tag in ["v2.0.0", "1.0.0"]
+    ]
+    mocker.patch(
+        "sphinx_github_changelog.github_releases.extract_releases",
+        return_value=releases,
+    )
+    note_release = mocker.Mock()
+    changelog.compute_changelog(
+        options=config_module.ChangelogDirectiveOptions(
+            github="https://github.com/a/b/releases",
+        ),
+        config=config_module.ChangelogConfig(token="token"),
+        note_release=note_release,
+    )
+
+    assert note_release.call_args_list == [
+        mocker.call("v2.0.0", "release-2-0-0"),
+        mocker.call("a/b@v2.0.0", "release-2-0-0"),
+        mocker.call("2.0.0", "release-2-0-0"),
+        mocker.call("a/b@2.0.0", "release-2-0-0"),
+        mocker.call("1.0.0", "release-1-0-0"),
+        mocker.call("a/b@1.0.0", "release-1-0-0"),
+    ]
+
+
+def test_compute_changelog_note_release_tag_pattern(mocker, release_dict):
+    releases = [
+        github_releases.Release.from_rest({**release_dict, "tag_name": tag})
+        for tag in ["pkg-a@1.0.0", "pkg-b@1.0.0"]
+    ]
+    mocker.patch(
+        "sphinx_github_changelog.github_releases.extract_releases",
+        return_value=releases,
+    )
+    note_release = mocker.Mock()
+    nodes = changelog.compute_changelog(
+        options=config_module.ChangelogDirectiveOptions(
+            github="https://github.com/a/b/releases",
+            tag_pattern="pkg-b@*",
+        ),
+        config=config_module.ChangelogConfig(token="token"),
+        note_release=note_release,
+    )
+
+    assert 'ids="release-pkg-b-1-0-0"' in node_to_string(nodes[0])
+    assert note_release.call_args_list == [
+        mocker.call("pkg-b@1.0.0", "release-pkg-b-1-0-0"),
+        mocker.call("a/b@pkg-b@1.0.0", "release-pkg-b-1-0-0"),
+    ]
+
+
+def test_compute_changelog_collect_releases(extract_releases, release, mocker):
+    collect_releases = mocker.Mock()
+    changelog.compute_changelog(
+        options=config_module.ChangelogDirectiveOptions(
+            github="https://github.com/a/b/releases",
+            pypi="https://pypi.org/project/foo/",
+        ),
+        config=config_module.ChangelogConfig(token="token"),
+        collect_releases=collect_releases,
+    )
+
+    collect_releases.assert_called_once_with(
+        "https://github.com/a/b",
+        [
+            export.ExportedRelease(
+                version="1.0.0",
+                title="1.0.0: A new hope",
+                release=release,
+                pypi_url="https://pypi.org/project/foo/1.0.0/",
+            )
+        ],
+    )
+
+
+def test_compute_changelog_collect_releases_feed(extract_releases, mocker):
+    collect_releases = mocker.Mock()
+    changelog.compute_changelog(
+        options=config_module.ChangelogDirectiveOptions(
+            github="https://github.com/a/b/releases",
+        ),
+        config=config_module.ChangelogConfig(token="token", feed="atom"),
+        collect_releases=collect_releases,
+    )
+
+    [[_, [exported]], _] = collect_releases.call_args
+    [body] = exported.body
+    assert body.astext() == "yay"
+    assert body.parent is None
+
+
+def test_compute_changelog_collect_releases_only(extract_releases, mocker):
+    collect_releases = mocker.Mock()
+    changelog.compute_changelog(
+        options=config_module.ChangelogDirectiveOptions(
+            github="https://github.com/a/b/releases",
+            only=["1.0.0"],
+        ),
+        config=config_module.ChangelogConfig(token="token"),
+        collect_releases=collect_releases,
+    )
+
+    collect_releases.assert_not_called()
+
+
+@pytest.mark.parametrize("include_drafts", [True, False])
+def test_compute_changelog_drafts(extract_releases, release_dict, include_drafts):
+    options = config_module.ChangelogDirectiveOptions(
+        github="https://github.com/a/b/releases",
+    )
+    config = config_module.ChangelogConfig(token="token", include_drafts=include_drafts)
+    changelog.compute_changelog(options=options, config=config)
+
+    release_filter = extract_releases.call_args.kwargs["release_filter"]
+    assert release_filter(release_dict)
+    assert release_filter({**release_dict, "draft": True}) is include_drafts
+
+
+def test_compute_changelog_only(mocker, release_dict):
+    releases = [
+        github_releases.Release.from_rest({**release_dict, "tag_name": tag})
+        for tag in ["v3.0.0", "v2.0.0", "1.0.0"]
+    ]
+    mocker.patch(
+        "sphinx_github_changelog.github_releases.extract_releases",
+        return_value=releases,
+    )
+    note_release = mocker.Mock()
+    nodes = changelog.compute_changelog(
+        options=config_module.ChangelogDirectiveOptions(
+            github="https://github.com/a/b/releases",
+            only=["1.0.0", "v2.0.0"],
+        ),
+        config=config_module.ChangelogConfig(token="token"),
+        note_release=note_release,
+    )
+
+    assert [n["ids"] for n in nodes] == [["release-1-0-0"], ["release-2-0-0"]]
+    note_release.assert_not_called()
+
+
+def test_compute_changelog_only_not_found(extract_releases):
+    with pytest.raises(
+        exceptions.ChangelogError,
+        match=r"^Release\(s\) not found in https://github.com/a/b: 9.9.9$",
+    ):
+        changelog.compute_changelog(
+            options=config_module.ChangelogDirectiveOptions(
+                github="https://github.com/a/b/releases",
+                only=["1.0.0", "9.9.9"],
+            ),
+            config=config_module.ChangelogConfig(token="token"),
+        )
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("1.0.0", ["1.0.0"]), ("1.0.0, v2.0.0", ["1.0.0", "v2.0.0"]), ("a b", ["a", "b"])],
+)
+def test_version_list(value, expected):
+    assert changelog.version_list(value) == expected
+
+
+def test_version_list_none():
+    with pytest.raises(ValueError, match=r"^argument required"):
+        changelog.version_list(None)
+
+
+def test_compute_changelog_unknown_order(extract_releases):
+    with pytest.raises(
+        exceptions.ChangelogError,
+        match=r"^Unknown sphinx_github_changelog_order: 'alphabetical'",
+    ):
+        changelog.compute_changelog(
+            options=config_module.ChangelogDirectiveOptions(
+                github="https://github.com/a/b/releases",
+            ),
+            config=config_module.ChangelogConfig(token="token", order="alphabetical"),
+        )
+
+
 def test_compute_changelog_token_reraises_api_error(mocker):
     mocker.patch(
         "sphinx_github_changelog.github_releases.extract_releases",
@@ -227,9 +627,65 @@ def test_node_for_release_title_pypy(release):
     )
 
 
+def test_node_for_release_assets(release):
+    release.assets = (
+        github_releases.Asset(
+            name="pkg.whl", url="https://example.com/pkg.whl", size=1, download_count=1
+        ),
+        github_releases.Asset(
+            name="pkg.tar.gz",
+            url="https://example.com/pkg.tar.gz",
+            size=1234567,
+            download_count=3,
+        ),
+    )
+    assert changelog.node_for_release(release=release)[-1].astext() == "yay"
+
+    value = node_to_string(
+        changelog.node_for_release(release=release, show_assets=True)[-1]
+    )
+
+    assert value == canonicalize(
+        """
+        <bullet_list classes="changelog-assets">
+            <list_item>
+                <paragraph>
+                    <reference refuri="https://example.com/pkg.whl">pkg.whl</reference>
+                    (1 B, 1 download)
+                </paragraph>
+            </list_item>
+            <list_item>
+                <paragraph>
+                    <reference refuri="https://example.com/pkg.tar.gz">
+                        pkg.tar.gz
+                    </reference>
+                    (1.2 MB, 3 downloads)
+                </paragraph>
+            </list_item>
+        </bullet_list>
+        """
+    )
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [
+        (999, "999 B"),
+        (1000, "1.0 kB"),
+        (1234567, "1.2 MB"),
+        (12_345_678_901, "12.3 GB"),
+    ],
+)
+def test_format_size(size, expected):
+    assert changelog.format_size(size) == expected
+
+
 def test_node_for_release_draft(release):
+    # Drafts are excluded by the release filter, unless asked for.
     release.is_draft = True
-    assert changelog.node_for_release(release=release, pypi_name="foo") is None
+    assert "1.0.0: A new hope" in node_to_string(
+        changelog.node_for_release(release=release, pypi_name="foo")
+    )
 
 
 @pytest.mark.parametrize(
@@ -248,6 +704,13 @@ def test_get_release_title(title, tag, expected):
     assert changelog.get_release_title(title=title, tag=tag) == expected
 
 
+def test_get_release_title_version():
+    assert (
+        changelog.get_release_title(title="Foo", tag="pkg-a@1.0.0", version="1.0.0")
+        == "1.0.0: Foo"
+    )
+
+
 def test_get_token_from_env(monkeypatch):
     monkeypatch.setenv("SPHINX_GITHUB_CHANGELOG_TOKEN", "testtoken")
     assert credentials.get_token_from_env() == "testtoken"
@@ -281,3 +744,229 @@ def test_convert_markdown_to_nodes_empty():
     assert changelog.convert_markdown_to_nodes(None) == []
     assert changelog.convert_markdown_to_nodes("") == []
     assert changelog.convert_markdown_to_nodes("   ") == []
+
+
+def test_convert_markdown_to_nodes_detached():
+    result = changelog.convert_markdown_to_nodes("# Title\n\nSome *emphasis*")
+
+    assert [node.parent for node in result] == [None] * len(result)
+    assert {
+        descendant.document for node in result for descendant in node.findall()
+    } == {None}
+
+
+MEMORY_MARKDOWN = """## Features
+
+- Add *thing* (#12)
+- Fix `other`
+
+See [docs](https://example.com).
+"""
+
+
+def measure_markdown_conversions(count: int) -> tuple[int, int, int]:
+    """Return the memory retained by the nodes of ``count`` conversions, the
+    peak memory used on top of it, and the memory of a copy of the nodes."""
+    changelog.convert_markdown_to_nodes(MEMORY_MARKDOWN)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = [
+            changelog.convert_markdown_to_nodes(MEMORY_MARKDOWN) for _ in range(count)
+        ]
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        copies = [[node.deepcopy() for node in nodes_] for nodes_ in result]
+        copied = tracemalloc.get_traced_memory()[0] - retained
+    finally:
+        tracemalloc.stop()
+    assert len(copies) == count
+    return retained, peak - retained, copied
+
+
+def test_convert_markdown_to_nodes_memory():
+    _, overhead, _ = measure_markdown_conversions(20)
+    retained, many_overhead, copied = measure_markdown_conversions(200)
+
+    # Parse documents are freed as soon as their nodes are returned: only the
+    # nodes are kept, and the peak doesn't grow with the number of releases.
+    assert retained < 1.2 * copied
+    assert many_overhead < 3 * overhead
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "yay",
+        "Hello\nworld\n\nSecond paragraph.",
+        "Windows\r\nline endings",
+        "\n  Surrounding whitespace \n\n\n\n   and blank lines \n",
+        "Questions? Answers: (some), 100% 'quoted' \"text\"",
+        "Thanks @some-one",
+    ],
+)
+def test_convert_plain_text_to_nodes(text):
+    result = changelog.convert_plain_text_to_nodes(text)
+
+    assert result is not None
+    assert node_to_string(result) == node_to_string(
+        changelog.convert_markdown_to_nodes(text)
+    )
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Some *emphasis*",
+        "`code`",
+        "[link](https://example.com)",
+        "https://example.com",
+        "www.example.com",
+        "# Title",
+        "Title\n=====",
+        "- item",
+        "1. item",
+        "> quote",
+        "    code",
+        "hard  \nbreak",
+        "a | b",
+        "&amp;",
+        "<b>html</b>",
+        "Contact foo@example.com",
+    ],
+)
+def test_convert_plain_text_to_nodes_markdown(text):
+    assert changelog.convert_plain_text_to_nodes(text) is None
+
+
+def test_render_description_email():
+    assert 'refuri="mailto:foo@example.com"' in node_to_string(
+        changelog.render_description("Contact foo@example.com")
+    )
+
+
+def test_render_description():
+    assert changelog.render_description(None) == []
+    assert changelog.render_description(" ") == []
+    assert "<strong>" in node_to_string(changelog.render_description("**bold**"))
+    assert node_to_string(changelog.render_description("plain")) == (
+        canonicalize("<list><paragraph>plain</paragraph></list>")
+    )
+
+
+def test_get_renderer():
+    assert changelog.get_renderer("auto") is changelog.render_description
+    assert changelog.get_renderer("myst") is changelog.convert_markdown_to_nodes
+    assert (
+        changelog.get_renderer("sphinx_github_changelog.changelog.render_description")
+        is changelog.render_description
+    )
+
+
+@pytest.mark.parametrize("name", ["nope", "nope.nope", "sphinx_github_changelog.nope"])
+def test_get_renderer_invalid(name):
+    with pytest.raises(
+        exceptions.ChangelogError, match=r"^Invalid sphinx_github_changelog_renderer"
+    ):
+        changelog.get_renderer(name)
+
+
+def test_node_for_release_renderer(release):
+    result = changelog.node_for_release(
+        release=release, renderer=lambda text: [nodes.paragraph("", text.upper())]
+    )
+
+    assert "<paragraph>YAY</paragraph>" in node_to_string(result)
+
+
+@pytest.mark.parametrize(
+    "template, pypi_name, expected",
+    [
+        (
+            "Released on {date} - {links}",
+            "foo",
+            (
+                "Released on 2000-01-01 - "
+                '<reference refuri="https://example.com">GitHub</reference> - '
+                '<reference refuri="https://pypi.org/project/foo/1.0.0/">PyPI</reference>'
+            ),
+        ),
+        (
+            "{date:%B %d, %Y} ({tag})",
+            None,
+            "January 01, 2000 (1.0.0)",
+        ),
+        (
+            "{github}{pypi} v{version}",
+            None,
+            '<reference refuri="https://example.com">GitHub</reference> v1.0.0',
+        ),
+    ],
+)
+def test_header_template(release, template, pypi_name, expected):
+    header = changelog.compile_header_template(template)
+
+    assert node_to_string(
+        header.render(release=release, version="1.0.0", pypi_name=pypi_name)
+    ) == canonicalize(f"<paragraph><emphasis>{expected}</emphasis></paragraph>")
+
+
+def test_compile_header_template_cached():
+    assert changelog.compile_header_template(
+        "{date}"
+    ) is changelog.compile_header_template("{date}")
+
+
+@pytest.mark.parametrize(
+    "template, message",
+    [
+        ("{date", "Invalid sphinx_github_changelog_header: '{date'"),
+        ("{author}", "unknown field {author}"),
+        ("{version:d}", "{version:d} (Unknown format code 'd'"),
+        ("{date!r}", "conversions such as {date!r} are not supported"),
+        ("{github:>10}", "{github} doesn't take a format spec"),
+    ],
+)
+def test_compile_header_template_invalid(template, message):
+    with pytest.raises(exceptions.ChangelogError, match=re.escape(message)):
+        changelog.compile_header_template(template)
+
+
+def test_compute_changelog_header(extract_releases):
+    options = config_module.ChangelogDirectiveOptions(
+        github="https://github.com/a/b/releases",
+    )
+    config = config_module.ChangelogConfig(token="token", header="On {date}")
+
+    (node,) = changelog.compute_changelog(options=options, config=config)
+
+    assert "<emphasis>On 2000-01-01</emphasis>" in node_to_string(node)
+
+
+def test_compute_changelog_inline_releases(mocker, release):
+    mocker.patch(
+        "sphinx_github_changelog.github_releases.extract_releases",
+        return_value=[release, release, release],
+    )
+    options = config_module.ChangelogDirectiveOptions(
+        github="https://github.com/a/b/releases",
+        inline_releases=1,
+    )
+    config = config_module.ChangelogConfig(token="token")
+    nodes = changelog.compute_changelog(options=options, config=config)
+
+    assert len(nodes) == 2
+    assert isinstance(nodes[1], deferred.deferred_releases)
+    assert len(nodes[1].children) == 2
+
+
+def test_compute_changelog_inline_releases_not_reached(extract_releases):
+    options = config_module.ChangelogDirectiveOptions(
+        github="https://github.com/a/b/releases",
+        inline_releases=1,
+    )
+    config = config_module.ChangelogConfig(token="token")
+    nodes = changelog.compute_changelog(options=options, config=config)
+
+    assert len(nodes) == 1
+    assert not isinstance(nodes[0], deferred.deferred_releases)
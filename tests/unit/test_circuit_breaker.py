@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import pytest
+
+from sphinx_github_changelog import circuit_breaker
+
+
+@pytest.fixture
+def clock():
+    return [0.0]
+
+
+@pytest.fixture
+def breaker(clock):
+    return circuit_breaker.CircuitBreaker(
+        hostname="github.example.com", threshold=2, cooldown=60, clock=lambda: clock[0]
+    )
+
+
+def test_circuit_breaker_opens_after_threshold(breaker):
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+
+    with pytest.raises(
+        circuit_breaker.CircuitOpenError,
+        match=(
+            r"^Not calling GitHub API on github.example.com after 2 consecutive "
+            r"failures, retrying in 60s.$"
+        ),
+    ):
+        breaker.before_call()
+
+
+def test_circuit_breaker_success_resets_failures(breaker):
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    breaker.before_call()
+
+
+def test_circuit_breaker_probe(breaker, clock):
+    breaker.record_failure()
+    breaker.record_failure()
+    clock[0] = 60
+
+    # A single call probes the host, the others keep failing fast.
+    breaker.before_call()
+    with pytest.raises(circuit_breaker.CircuitOpenError, match="retrying in 0s"):
+        breaker.before_call()
+
+    breaker.record_success()
+    breaker.before_call()
+
+
+def test_circuit_breaker_failed_probe(breaker, clock):
+    breaker.record_failure()
+    breaker.record_failure()
+    clock[0] = 60
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock[0] = 100
+    with pytest.raises(circuit_breaker.CircuitOpenError, match="retrying in 20s"):
+        breaker.before_call()
+
+
+def test_circuit_breaker_disabled():
+    breaker = circuit_breaker.CircuitBreaker(hostname="github.com", threshold=0)
+    for _ in range(10):
+        breaker.record_failure()
+
+    breaker.before_call()
+
+
+def test_get_circuit_breaker():
+    breaker = circuit_breaker.get_circuit_breaker("github.com", threshold=5)
+
+    assert breaker.threshold == 5
+    assert circuit_breaker.get_circuit_breaker("github.com") is breaker
+    circuit_breaker.reset_circuit_breakers()
+    assert circuit_breaker.get_circuit_breaker("github.com") is not breaker
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import runpy
+
+import pytest
+
+from sphinx_github_changelog import cache, cli, credentials, exceptions, urls
+
+
+@pytest.fixture(autouse=True)
+def no_local_token_discovery(monkeypatch):
+    def _no_token(*, host: str) -> str:
+        raise exceptions.CouldNotExtract("No GitHub token found")
+
+    monkeypatch.setattr(credentials, "get_github_token", _no_token)
+
+
+@pytest.fixture
+def release_pages(httpx_mock, github_payload):
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        method="GET",
+        json=github_payload,
+    )
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=2",
+        method="GET",
+        json=[],
+    )
+    return httpx_mock
+
+
+def test_fetch(release_pages, tmp_path, capsys, release_dict):
+    exit_code = cli.main(
+        [
+            "fetch",
+            "--github",
+            "https://github.com/a/b/releases",
+            "--cache-dir",
+            str(tmp_path),
+            "--token",
+            "token",
+        ]
+    )
+
+    assert exit_code == 0
+    out = capsys.readouterr().out
+    assert "Fetched 1 releases of https://github.com/a/b" in out
+    assert "compression ratio 1.0" in out
+    entry = cache.ReleaseCache(directory=tmp_path).load(
+        urls.GitHubParams(hostname="github.com", owner="a", repo="b")
+    )
+    assert entry.payloads == [release_dict]
+    request = release_pages.get_requests()[0]
+    assert request.headers["Authorization"] == "token token"
+
+
+def test_fetch_refreshes_existing_cache(release_pages, tmp_path, monkeypatch):
+    github_params = urls.GitHubParams(hostname="github.com", owner="a", repo="b")
+    release_cache = cache.ReleaseCache(directory=tmp_path)
+    release_cache.save(github_params, [])
+    monkeypatch.setenv("SPHINX_GITHUB_CHANGELOG_CACHE_DIR", str(tmp_path))
+
+    assert cli.main(["fetch", "--github", "https://github.com/a/b/releases"]) == 0
+    assert len(release_cache.load(github_params).payloads) == 1
+
+
+def test_fetch_sqlite(release_pages, tmp_path, capsys, release_dict):
+    exit_code = cli.main(
+        [
+            "fetch",
+            "--github",
+            "https://github.com/a/b/releases",
+            "--cache-dir",
+            str(tmp_path),
+            "--cache-backend",
+            "sqlite",
+        ]
+    )
+
+    assert exit_code == 0
+    assert str(tmp_path / "releases.sqlite3") in capsys.readouterr().out
+    entry = cache.SQLiteReleaseCache(directory=tmp_path).load(
+        urls.GitHubParams(hostname="github.com", owner="a", repo="b")
+    )
+    assert entry.payloads == [release_dict]
+
+
+def test_fetch_no_cache_dir(capsys, monkeypatch):
+    monkeypatch.delenv("SPHINX_GITHUB_CHANGELOG_CACHE_DIR", raising=False)
+
+    assert cli.main(["fetch", "--github", "https://github.com/a/b/releases"]) == 1
+    assert "No cache directory" in capsys.readouterr().err
+
+
+def test_fetch_no_url(temp_git, tmp_path, capsys):
+    assert cli.main(["fetch", "--cache-dir", str(tmp_path)]) == 1
+    assert "No --github release URL provided" in capsys.readouterr().err
+
+
+def test_main_module(monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["sphinx-github-changelog", "--help"])
+    with pytest.raises(SystemExit) as exc_info:
+        runpy.run_module("sphinx_github_changelog", run_name="__main__")
+
+    assert exc_info.value.code == 0
+    assert "fetch" in capsys.readouterr().out
+
+
+def test_export(release_pages, capsys):
+    exit_code = cli.main(
+        [
+            "export",
+            "--format",
+            "markdown",
+            "--github",
+            "https://github.com/a/b/releases",
+            "--pypi",
+            "https://pypi.org/project/b/",
+        ]
+    )
+
+    assert exit_code == 0
+    out = capsys.readouterr().out
+    assert out.startswith("## 1.0.0: A new hope\n")
+    assert "[PyPI](https://pypi.org/project/b/1.0.0/)" in out
+
+
+def test_export_output(httpx_mock, tmp_path, release_dict):
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        method="GET",
+        json=[
+            {**release_dict, "tag_name": "pkg@3.0.0", "draft": True},
+            {**release_dict, "tag_name": "pkg@2.0.0"},
+            release_dict,
+        ],
+    )
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=2",
+        method="GET",
+        json=[],
+    )
+    output = tmp_path / "changelog.json"
+    exit_code = cli.main(
+        [
+            "export",
+            "--github",
+            "https://github.com/a/b/releases",
+            "--tag-pattern",
+            "pkg@*",
+            "--output",
+            str(output),
+        ]
+    )
+
+    assert exit_code == 0
+    assert [r["version"] for r in json.loads(output.read_text())] == ["2.0.0"]
+
+
+def test_export_no_url(temp_git, capsys):
+    assert cli.main(["export"]) == 1
+    assert "No --github release URL provided" in capsys.readouterr().err
+
+
+def test_export_unknown_order(monkeypatch, capsys):
+    monkeypatch.setenv("SPHINX_GITHUB_CHANGELOG_ORDER", "nope")
+
+    assert cli.main(["export", "--github", "https://github.com/a/b/releases"]) == 1
+    assert "Unknown sphinx_github_changelog_order: 'nope'" in capsys.readouterr().err
+
+
+def test_webhook(tmp_path, monkeypatch, mocker, capsys):
+    monkeypatch.setenv("SPHINX_GITHUB_CHANGELOG_WEBHOOK_SECRET", "secret")
+    make_server = mocker.patch("wsgiref.simple_server.make_server")
+
+    exit_code = cli.main(
+        ["webhook", "--cache-dir", str(tmp_path), "--cache-backend", "sqlite"]
+    )
+
+    assert exit_code == 0
+    make_server.assert_called_once_with("127.0.0.1", 8000, mocker.ANY)
+    server = make_server.return_value.__enter__.return_value
+    server.serve_forever.assert_called_once_with()
+    assert capsys.readouterr().out == (
+        "Listening for GitHub webhooks on http://127.0.0.1:8000/\n"
+    )
+
+
+def test_webhook_no_secret(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv("SPHINX_GITHUB_CHANGELOG_WEBHOOK_SECRET", raising=False)
+
+    assert cli.main(["webhook", "--cache-dir", str(tmp_path), "--port", "8080"]) == 1
+    assert "The webhook needs a secret" in capsys.readouterr().err
@@ -38,3 +38,42 @@ def test_get_config_defaults_int_invalid_default_raises(monkeypatch):
 
     with pytest.raises(TypeError, match="Unexpected default type for retries"):
         dict(BrokenConfig.get_config_defaults())
+
+
+def test_get_config_defaults_float(monkeypatch):
+    monkeypatch.setenv("SPHINX_GITHUB_CHANGELOG_READ_TIMEOUT", "2.5")
+    monkeypatch.delenv("SPHINX_GITHUB_CHANGELOG_CONNECT_TIMEOUT", raising=False)
+
+    defaults = dict(config.ChangelogConfig.get_config_defaults())
+
+    assert defaults["sphinx_github_changelog_read_timeout"] == 2.5
+    assert defaults["sphinx_github_changelog_connect_timeout"] == 10.0
+    assert isinstance(defaults["sphinx_github_changelog_connect_timeout"], float)
+
+
+def test_get_config_defaults_str_uses_dataclass_default(monkeypatch):
+    monkeypatch.delenv("SPHINX_GITHUB_CHANGELOG_ORDER", raising=False)
+
+    defaults = dict(config.ChangelogConfig.get_config_defaults())
+
+    assert defaults["sphinx_github_changelog_order"] == "date"
+    assert defaults["sphinx_github_changelog_token"] is None
+
+
+def test_get_config_defaults_str_uses_env_value(monkeypatch):
+    monkeypatch.setenv("SPHINX_GITHUB_CHANGELOG_ORDER", "semver")
+
+    defaults = dict(config.ChangelogConfig.get_config_defaults())
+
+    assert defaults["sphinx_github_changelog_order"] == "semver"
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("SPHINX_GITHUB_CHANGELOG_CACHE_DIR", "/tmp/cache")
+    monkeypatch.setenv("SPHINX_GITHUB_CHANGELOG_RETRIES", "5")
+
+    result = config.ChangelogConfig.from_env()
+
+    assert result.cache_dir == "/tmp/cache"
+    assert result.retries == 5
+    assert result.order == "date"
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from docutils import nodes
+
+from sphinx_github_changelog import cache, changelog, enrichment
+
+PULL_REQUEST = {
+    "type": "PullRequest",
+    "title": "Fix the thing",
+    "url": "https://github.com/a/b/pull/12",
+}
+USER = {
+    "login": "Some-One",
+    "url": "https://github.com/Some-One",
+    "avatar_url": "https://avatars.example.com/u/1?s=40&v=4",
+}
+
+
+@pytest.mark.parametrize(
+    "description, expected",
+    [
+        ("Fix (#12) by @Some-One, see #12", {"#12", "@some-one"}),
+        ("#1 and #01", {"#1"}),
+        ("mail me at me@example.com", set()),
+        ("https://example.com/#12 page#3 &#123;", set()),
+        ("@-nope", set()),
+        ("#2147483647 but not #2147483648 or #99999999999", {"#2147483647"}),
+        (None, set()),
+    ],
+)
+def test_extract_references(description, expected):
+    assert enrichment.extract_references([description]) == expected
+
+
+def test_build_query(github_params):
+    query = enrichment.build_query(github_params, ["#12", "@some-one"])
+
+    assert query.startswith('query { repository(owner: "a", name: "b") { n12: ')
+    assert 'u1: user(login: "some-one")' in query
+
+
+def test_build_query_users_only(github_params):
+    assert "repository" not in enrichment.build_query(github_params, ["@a"])
+
+
+def test_parse_response():
+    data = {
+        "repository": {
+            "n12": {"__typename": "PullRequest", **PULL_REQUEST},
+            "n13": None,
+        },
+        "u2": {
+            "login": "Some-One",
+            "url": "https://github.com/Some-One",
+            "avatarUrl": USER["avatar_url"],
+        },
+        "u3": None,
+    }
+
+    assert enrichment.parse_response(["#12", "#13", "@some-one", "@nobody"], data) == {
+        "#12": PULL_REQUEST,
+        "#13": None,
+        "@some-one": USER,
+        "@nobody": None,
+    }
+
+
+def test_resolve_references(github_params, httpx_mock, tmp_path, monkeypatch):
+    monkeypatch.setattr(enrichment, "BATCH_SIZE", 2)
+    httpx_mock.add_response(
+        url="https://api.github.com/graphql",
+        method="POST",
+        json={
+            "data": {
+                "repository": {
+                    "n12": {"__typename": "PullRequest", **PULL_REQUEST},
+                    "n13": None,
+                }
+            }
+        },
+    )
+    httpx_mock.add_response(
+        url="https://api.github.com/graphql",
+        method="POST",
+        json={"data": {"u0": None}},
+    )
+    release_cache = cache.ReleaseCache(directory=tmp_path)
+
+    def resolve():
+        return enrichment.resolve_references(
+            github_params=github_params,
+            token="token",
+            descriptions=["#12, #13", "@nobody, #12"],
+            retries=0,
+            cache=release_cache,
+        )
+
+    assert resolve() == {"#12": PULL_REQUEST}
+    queries = [json.loads(r.content)["query"] for r in httpx_mock.get_requests()]
+    assert ["n12" in q and "n13" in q for q in queries] == [True, False]
+    assert release_cache.load_references(github_params) == {
+        "#12": PULL_REQUEST,
+        "#13": None,
+        "@nobody": None,
+    }
+    # Everything is cached, unknown references included.
+    assert resolve() == {"#12": PULL_REQUEST}
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_resolve_references_no_cache(github_params, httpx_mock):
+    httpx_mock.add_response(
+        url="https://api.github.com/graphql", method="POST", json={"data": {}}
+    )
+
+    assert (
+        enrichment.resolve_references(
+            github_params=github_params,
+            token="token",
+            descriptions=["@nobody"],
+            retries=0,
+        )
+        == {}
+    )
+
+
+def test_enrich_nodes():
+    result = changelog.convert_markdown_to_nodes(
+        "Fix #12 by @Some-One, not #13.\n\n`#12` [#12](https://example.com)"
+    )
+
+    enrichment.enrich_nodes(result, {"#12": PULL_REQUEST, "@some-one": USER})
+
+    first, second = result
+    assert first.astext().startswith("Fix #12 by <img")
+    assert first.astext().endswith("/> @Some-One, not #13.")
+    [pull_request, user] = first.findall(nodes.reference)
+    assert pull_request["refuri"] == "https://github.com/a/b/pull/12"
+    assert pull_request["reftitle"] == "Fix the thing"
+    assert pull_request["classes"] == ["changelog-pull-request"]
+    assert user["refuri"] == "https://github.com/Some-One"
+    assert user.astext() == "@Some-One"
+    [avatar] = first.findall(nodes.raw)
+    assert avatar["format"] == "html"
+    assert 'src="https://avatars.example.com/u/1?s=40&amp;v=4"' in avatar.astext()
+    # Code and existing links are left alone.
+    assert [r["refuri"] for r in second.findall(nodes.reference)] == [
+        "https://example.com"
+    ]
+
+
+def test_enrich_nodes_issue():
+    par = nodes.paragraph("", "#7")
+
+    enrichment.enrich_nodes(
+        [par, nodes.Text("#7")],
+        {"#7": {**PULL_REQUEST, "type": "Issue"}},
+    )
+
+    [reference] = par.children
+    assert reference["classes"] == ["changelog-issue"]
+
+
+def test_enriching_renderer():
+    renderer = changelog.convert_plain_text_to_nodes
+    assert enrichment.enriching_renderer(renderer, {}) is renderer
+
+    [par] = enrichment.enriching_renderer(renderer, {"@some-one": USER})("hi @some-one")
+
+    assert [type(n) for n in par.children] == [nodes.Text, nodes.raw, nodes.reference]
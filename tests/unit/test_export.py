@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import pathlib
+import types
+
+import pytest
+
+from sphinx_github_changelog import exceptions, export, github_releases
+
+
+@pytest.fixture
+def exported(release):
+    return export.ExportedRelease(
+        version="1.0.0",
+        title="1.0.0: A new hope",
+        release=release,
+        pypi_url="https://pypi.org/project/foo/1.0.0/",
+    )
+
+
+def test_to_json(exported):
+    assert json.loads(export.export([exported], "json")) == [
+        {
+            "version": "1.0.0",
+            "title": "1.0.0: A new hope",
+            "tag_name": "1.0.0",
+            "published_at": "2000-01-01",
+            "prerelease": False,
+            "url": "https://example.com",
+            "pypi_url": "https://pypi.org/project/foo/1.0.0/",
+            "description": "yay",
+            "assets": [],
+        }
+    ]
+
+
+def test_to_markdown(exported):
+    assert export.export([exported], "markdown") == (
+        "## 1.0.0: A new hope\n"
+        "\n"
+        "_Released on 2000-01-01 - [GitHub](https://example.com) - "
+        "[PyPI](https://pypi.org/project/foo/1.0.0/)_\n"
+        "\n"
+        "yay\n"
+        "\n"
+    )
+
+
+def test_to_text(exported):
+    exported.pypi_url = None
+    exported.release.description = None
+    assert export.export([exported], "text") == (
+        "1.0.0: A new hope\n"
+        "=================\n"
+        "\n"
+        "Released on 2000-01-01\n"
+        "GitHub: https://example.com\n"
+        "\n"
+    )
+
+
+def test_export_unknown_format(exported):
+    with pytest.raises(
+        exceptions.ChangelogError, match=r"^Unknown export format: 'man'"
+    ):
+        export.export([exported], "man")
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("", []),
+        ("json", ["json"]),
+        ("json,markdown", ["json", "markdown"]),
+        ("json, text", ["json", "text"]),
+    ],
+)
+def test_parse_formats(value, expected):
+    assert export.parse_formats(value) == expected
+
+
+def test_collected_releases(exported):
+    env, other = types.SimpleNamespace(), types.SimpleNamespace()
+    export.note_releases(env, "b", "https://github.com/a/b", [exported])
+    export.note_releases(env, "a", "https://github.com/a/b", [])
+    export.note_releases(other, "c", "https://github.com/a/c", [exported])
+    export.note_releases(other, "d", "https://github.com/a/d", [exported])
+
+    export.on_env_merge_info(None, env, ["c", "e"], other)
+    export.on_env_purge_doc(None, env, "a")
+
+    assert export.collected_releases(env) == {
+        "https://github.com/a/b": [exported],
+        "https://github.com/a/c": [exported],
+    }
+
+
+def test_collected_releases_merged(exported, release_dict):
+    # e.g. one directive per package of a monorepo, with :tag-pattern:.
+    other = export.ExportedRelease(
+        version="2.0.0",
+        title="2.0.0",
+        release=github_releases.Release.from_rest(
+            {**release_dict, "tag_name": "pkg@2.0.0", "published_at": "2001-01-01"}
+        ),
+    )
+    env = types.SimpleNamespace()
+    export.note_releases(env, "a", "https://github.com/a/b", [exported])
+    export.note_releases(env, "b", "https://github.com/a/b", [exported])
+    export.note_releases(env, "b", "https://github.com/a/b", [other])
+
+    assert export.collected_releases(env) == {
+        "https://github.com/a/b": [other, exported],
+    }
+
+
+def test_on_build_finished(exported, tmp_path):
+    app = types.SimpleNamespace(
+        config=types.SimpleNamespace(sphinx_github_changelog_export="json,text"),
+        env=types.SimpleNamespace(),
+        outdir=str(tmp_path),
+    )
+    export.note_releases(app.env, "index", "https://github.com/a/b", [exported])
+
+    export.on_build_finished(app, exception=None)
+
+    export_dir = tmp_path / "_changelog" / "github.com" / "a"
+    assert sorted(path.name for path in export_dir.iterdir()) == ["b.json", "b.txt"]
+    assert "A new hope" in (export_dir / "b.txt").read_text()
+
+
+@pytest.mark.parametrize(
+    "value, exception", [("", None), ("json", ValueError("failed"))]
+)
+def test_on_build_finished_nothing_to_do(exported, tmp_path, value, exception):
+    app = types.SimpleNamespace(
+        config=types.SimpleNamespace(sphinx_github_changelog_export=value),
+        env=types.SimpleNamespace(),
+        outdir=str(tmp_path),
+    )
+    export.note_releases(app.env, "index", "https://github.com/a/b", [exported])
+
+    export.on_build_finished(app, exception=exception)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_path():
+    assert export.export_path(
+        pathlib.Path("out"), "https://ghe.example.com/a/b", "markdown"
+    ) == pathlib.Path("out/_changelog/ghe.example.com/a/b.md")
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import types
+import xml.etree.ElementTree as ET
+
+import pytest
+from docutils import nodes
+
+from sphinx_github_changelog import exceptions, export, feed, github_releases
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+@pytest.fixture
+def exported(release_dict):
+    def _exported(tag_name, published_at):
+        release = github_releases.Release.from_rest(
+            {
+                **release_dict,
+                "tag_name": tag_name,
+                "html_url": f"https://github.com/a/b/releases/tag/{tag_name}",
+                "published_at": published_at,
+            }
+        )
+        return export.ExportedRelease(
+            version=tag_name,
+            title=f"{tag_name}: A new hope",
+            release=release,
+            body=[
+                nodes.paragraph("", f"Body of {tag_name}"),
+                nodes.system_message("Heading level", level=2),
+            ],
+        )
+
+    return _exported
+
+
+def render_body(release):
+    return f"<p>{release.body[0].astext()}</p>"
+
+
+def test_latest_releases(exported):
+    releases = [
+        exported("1.0.0", "2000-01-01"),
+        exported("3.0.0", "2002-01-01"),
+        exported("2.0.0", "2001-01-01"),
+    ]
+
+    assert [r.version for r in feed.latest_releases(releases, limit=2)] == [
+        "3.0.0",
+        "2.0.0",
+    ]
+    assert len(feed.latest_releases(releases, limit=0)) == 3
+
+
+def test_to_atom(exported):
+    content = feed.to_atom(
+        "https://github.com/a/b",
+        [exported("2.0.0", "2001-02-03"), exported("1.0.0", "2000-01-01")],
+        render_body=render_body,
+        self_url="https://example.com/_changelog/github.com/a/b.atom",
+    )
+
+    root = ET.fromstring(content)
+    assert root.findtext(f"{ATOM}id") == "https://github.com/a/b/releases"
+    assert root.findtext(f"{ATOM}title") == "Releases of github.com/a/b"
+    assert root.findtext(f"{ATOM}updated") == "2001-02-03T00:00:00+00:00"
+    assert [link.get("rel") for link in root.findall(f"{ATOM}link")] == [
+        "alternate",
+        "self",
+    ]
+    assert root.findtext(f"{ATOM}author/{ATOM}name") == "a"
+    assert root.findtext(f"{ATOM}author/{ATOM}uri") == "https://github.com/a"
+    entry = root.find(f"{ATOM}entry")
+    assert entry.findtext(f"{ATOM}id") == ("https://github.com/a/b/releases/tag/2.0.0")
+    assert entry.findtext(f"{ATOM}title") == "2.0.0: A new hope"
+    assert entry.find(f"{ATOM}content").get("type") == "html"
+    assert entry.findtext(f"{ATOM}content") == "<p>Body of 2.0.0</p>"
+
+
+def test_to_atom_empty():
+    root = ET.fromstring(
+        feed.to_atom("https://github.com/a/b", [], render_body=render_body)
+    )
+    assert root.findtext(f"{ATOM}updated") == "1970-01-01T00:00:00+00:00"
+    assert len(root.findall(f"{ATOM}link")) == 1
+
+
+def test_to_rss(exported):
+    content = feed.to_rss(
+        "https://github.com/a/b",
+        [exported("1.0.0", "2000-01-01")],
+        render_body=render_body,
+    )
+
+    channel = ET.fromstring(content).find("channel")
+    assert channel.findtext("link") == "https://github.com/a/b/releases"
+    item = channel.find("item")
+    assert item.findtext("title") == "1.0.0: A new hope"
+    assert item.findtext("guid") == "https://github.com/a/b/releases/tag/1.0.0"
+    assert item.findtext("pubDate") == "Sat, 01 Jan 2000 00:00:00 +0000"
+    assert item.findtext("description") == "<p>Body of 1.0.0</p>"
+
+
+def test_parse_formats():
+    assert feed.parse_formats("atom, rss") == ["atom", "rss"]
+    with pytest.raises(exceptions.ChangelogError, match=r"^Unknown feed format"):
+        feed.parse_formats("json")
+
+
+@pytest.fixture
+def app(tmp_path):
+    calls = []
+
+    def render_partial(node):
+        calls.append(node)
+        return {"fragment": f"<div>{node.astext()}</div>"}
+
+    return types.SimpleNamespace(
+        config=types.SimpleNamespace(
+            sphinx_github_changelog_feed="atom,rss",
+            sphinx_github_changelog_feed_limit=1,
+            html_baseurl="https://example.com/",
+        ),
+        builder=types.SimpleNamespace(format="html", render_partial=render_partial),
+        env=types.SimpleNamespace(),
+        outdir=str(tmp_path),
+        render_calls=calls,
+    )
+
+
+def test_on_build_finished(app, exported, tmp_path):
+    releases = [exported("1.0.0", "2000-01-01"), exported("2.0.0", "2001-01-01")]
+    export.note_releases(app.env, "index", "https://github.com/a/b", releases)
+
+    feed.on_build_finished(app, exception=None)
+
+    root = ET.fromstring((tmp_path / "_changelog/github.com/a/b.atom").read_text())
+    assert root.find(f"{ATOM}link[@rel='self']").get("href") == (
+        "https://example.com/_changelog/github.com/a/b.atom"
+    )
+    [entry] = root.findall(f"{ATOM}entry")
+    assert entry.findtext(f"{ATOM}content") == "<div>Body of 2.0.0</div>"
+    rss = ET.fromstring((tmp_path / "_changelog/github.com/a/b.rss").read_text())
+    assert rss.findtext("channel/item/description") == "<div>Body of 2.0.0</div>"
+    # The body is rendered once for both feeds, from a copy of the nodes.
+    assert len(app.render_calls) == 1
+    assert releases[1].body[0].parent is None
+
+
+def test_on_build_finished_no_base_url(app, exported, tmp_path):
+    app.config.html_baseurl = ""
+    export.note_releases(
+        app.env, "index", "https://github.com/a/b", [exported("1.0.0", "2000-01-01")]
+    )
+
+    feed.on_build_finished(app, exception=None)
+
+    root = ET.fromstring((tmp_path / "_changelog/github.com/a/b.atom").read_text())
+    assert root.find(f"{ATOM}link[@rel='self']") is None
+
+
+@pytest.mark.parametrize(
+    "formats, builder_format, exception",
+    [
+        ("", "html", None),
+        ("atom", "text", None),
+        ("atom", "html", ValueError("failed")),
+    ],
+)
+def test_on_build_finished_nothing_to_do(
+    app, exported, tmp_path, formats, builder_format, exception
+):
+    app.config.sphinx_github_changelog_feed = formats
+    app.builder.format = builder_format
+    export.note_releases(
+        app.env, "index", "https://github.com/a/b", [exported("1.0.0", "2000-01-01")]
+    )
+
+    feed.on_build_finished(app, exception=exception)
+
+    assert list(tmp_path.iterdir()) == []
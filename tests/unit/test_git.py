@@ -7,7 +7,8 @@ from pathlib import Path
 
 import pytest
 
-from sphinx_github_changelog import credentials, exceptions, urls
+from sphinx_github_changelog import config as config_module
+from sphinx_github_changelog import credentials, exceptions, github_app, urls
 
 
 def git(*args: str) -> str:
@@ -130,3 +131,39 @@ def test_get_github_token_not_found(monkeypatch, fake_process):
     fake_process.register(["gh", "auth", "token", "--hostname=github.com"], stdout="")
     with pytest.raises(exceptions.CouldNotExtract, match="No GitHub token found"):
         credentials.get_github_token("github.com")
+
+
+def test_resolve_config_token():
+    config = config_module.ChangelogConfig(token="ghp_conf")
+    github_params = urls.GitHubParams(hostname="github.com", owner="a", repo="b")
+
+    assert credentials.resolve_config_token(config, github_params) == "ghp_conf"
+
+
+@pytest.mark.parametrize(
+    "token, expected", [("ghp_conf", "ghs_app,ghp_conf"), (None, "ghs_app")]
+)
+def test_resolve_config_token_app(mocker, fake_process, token, expected):
+    fake_process.register(["git", "credential", "fill"], stdout="")
+    fake_process.register(["gh", "auth", "token", "--hostname=github.com"], stdout="")
+    get_installation_token = mocker.patch(
+        "sphinx_github_changelog.github_app.get_installation_token",
+        return_value="ghs_app",
+    )
+    config = config_module.ChangelogConfig(
+        token=token, app_id="42", app_private_key="key", cache_dir="cache"
+    )
+    github_params = urls.GitHubParams(hostname="github.com", owner="a", repo="b")
+
+    token = credentials.resolve_config_token(config, github_params)
+
+    # Only minted when GitHub is called.
+    get_installation_token.assert_not_called()
+    assert callable(token)
+    assert token() == expected
+    get_installation_token.assert_called_once_with(
+        github_app.App(app_id="42", private_key="key"),
+        github_params=github_params,
+        retries=3,
+        cache_dir="cache",
+    )
@@ -1,14 +1,27 @@
 from __future__ import annotations
 
+import concurrent.futures
+import datetime
+import gzip
+import json
+import re
+import threading
+import time
+
 import httpx
 import pytest
+import pytest_httpx
+from sphinx.util import logging as sphinx_logging
 
-from sphinx_github_changelog import exceptions, github_releases, urls
-
-
-@pytest.fixture
-def github_params():
-    return urls.GitHubParams(hostname="github.com", owner="a", repo="b")
+from sphinx_github_changelog import (
+    cache,
+    circuit_breaker,
+    exceptions,
+    github_releases,
+    tags,
+    token_pool,
+)
+from sphinx_github_changelog import config as config_module
 
 
 def test_extract_releases(github_payload, release, github_params, httpx_mock):
@@ -47,6 +60,24 @@ def test_extract_releases_unauthenticated(
     ) == [release]
 
 
+def test_extract_releases_lazy_token(
+    github_payload, release, github_params, httpx_mock, mocker
+):
+    for page, payload in [(1, github_payload), (2, [])]:
+        httpx_mock.add_response(
+            url=f"https://api.github.com/repos/a/b/releases?per_page=100&page={page}",
+            method="GET",
+            match_headers={"Authorization": "token minted"},
+            json=payload,
+        )
+    token = mocker.Mock(return_value="minted")
+
+    assert github_releases.extract_releases(
+        github_params=github_params, token=token, retries=3
+    ) == [release]
+    token.assert_called_once_with()
+
+
 def test_extract_releases_remove_none(github_params, httpx_mock, release_dict):
     release_dict_2 = release_dict.copy()
     release_dict_2["name"] = "Second"
@@ -66,6 +97,411 @@ def test_extract_releases_remove_none(github_params, httpx_mock, release_dict):
     assert len(result) == 2
 
 
+def test_extract_releases_filter(github_params, httpx_mock, release_dict):
+    draft = {**release_dict, "tag_name": "2.0.0", "draft": True}
+    prerelease = {**release_dict, "tag_name": "2.0.0rc1", "prerelease": True}
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        method="GET",
+        json=[draft, prerelease, release_dict],
+    )
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=2",
+        method="GET",
+        json=[],
+    )
+    result = github_releases.extract_releases(
+        github_params=github_params,
+        token="token",
+        retries=3,
+        release_filter=github_releases.ReleaseFilter(include_prereleases=False),
+    )
+    assert [r.tag_name for r in result] == ["1.0.0"]
+
+
+@pytest.mark.parametrize(
+    "release_filter, expected",
+    [
+        (github_releases.ReleaseFilter(), ["1.0.0", "1.1.0rc1", "v2.0.0"]),
+        (
+            github_releases.ReleaseFilter(include_drafts=True),
+            ["1.0.0", "1.1.0rc1", "v2.0.0", "3.0.0"],
+        ),
+        (
+            github_releases.ReleaseFilter(include_prereleases=False),
+            ["1.0.0", "v2.0.0"],
+        ),
+        (
+            github_releases.ReleaseFilter(include_tags=re.compile(r"^v")),
+            ["v2.0.0"],
+        ),
+        (
+            github_releases.ReleaseFilter(exclude_tags=re.compile(r"rc\d+$")),
+            ["1.0.0", "v2.0.0"],
+        ),
+        (
+            github_releases.ReleaseFilter(published_since=datetime.date(2000, 2, 1)),
+            ["1.1.0rc1", "v2.0.0"],
+        ),
+    ],
+)
+def test_release_filter(release_dict, release_filter, expected):
+    payloads = [
+        {**release_dict, "tag_name": "1.0.0"},
+        {
+            **release_dict,
+            "tag_name": "1.1.0rc1",
+            "prerelease": True,
+            "published_at": "2000-02-01T00:00:00Z",
+        },
+        {
+            **release_dict,
+            "tag_name": "v2.0.0",
+            "published_at": None,
+            "created_at": "2000-03-01",
+        },
+        {**release_dict, "tag_name": "3.0.0", "draft": True},
+    ]
+    assert [p["tag_name"] for p in payloads if release_filter(p)] == expected
+
+
+def test_get_release_index_downloads_once(github_params, release, mocker):
+    extract_releases = mocker.patch(
+        "sphinx_github_changelog.github_releases.extract_releases",
+        return_value=[release],
+    )
+    first = github_releases.get_release_index(
+        github_params=github_params, token="token", retries=3
+    )
+    second = github_releases.get_release_index(
+        github_params=github_params, token="token", retries=3
+    )
+    assert first is second
+    assert first.releases == [release]
+    extract_releases.assert_called_once()
+
+    github_releases.clear_release_indexes()
+    github_releases.get_release_index(
+        github_params=github_params, token="token", retries=3
+    )
+    assert extract_releases.call_count == 2
+
+
+def test_release_index_for_package(release_dict):
+    releases = [
+        github_releases.Release.from_rest(
+            {**release_dict, "tag_name": tag, "published_at": date}
+        )
+        for tag, date in [
+            ("pkg-a@2.0.0", "2020-01-04"),
+            ("pkg-b@1.1.0", "2020-01-03"),
+            ("pkg-a@1.0.0", "2020-01-02"),
+            ("v0.1.0", "2020-01-01"),
+        ]
+    ]
+    index = github_releases.ReleaseIndex(releases=releases)
+    pattern = tags.TagPattern.from_option("pkg-a@*")
+
+    assert index.for_package(pattern) == [
+        ("2.0.0", releases[0]),
+        ("1.0.0", releases[2]),
+    ]
+    assert index.for_package(pattern) is index.for_package(pattern)
+    assert [version for version, _ in index.for_package(None)] == [
+        "pkg-a@2.0.0",
+        "pkg-b@1.1.0",
+        "pkg-a@1.0.0",
+        "0.1.0",
+    ]
+
+
+def test_release_index_lookup(release_dict):
+    releases = [
+        github_releases.Release.from_rest({**release_dict, "tag_name": tag})
+        for tag in ["pkg-a@2.0.0", "pkg-b@1.0.0", "v1.0.0"]
+    ]
+    index = github_releases.ReleaseIndex(releases=releases)
+
+    lookup = index.lookup(None)
+    assert lookup["1.0.0"] == ("1.0.0", releases[2])
+    assert lookup["v1.0.0"] == ("1.0.0", releases[2])
+    assert index.lookup(None) is lookup
+
+    lookup = index.lookup(tags.TagPattern.from_option("pkg-b@*"))
+    assert lookup == {
+        "1.0.0": ("1.0.0", releases[1]),
+        "pkg-b@1.0.0": ("1.0.0", releases[1]),
+    }
+
+
+def test_release_index_for_package_order(release_dict):
+    releases = [
+        github_releases.Release.from_rest(
+            {**release_dict, "tag_name": tag, "published_at": date}
+        )
+        for tag, date in [
+            ("1.1.0", "2020-01-03"),
+            ("2.0.0", "2020-01-02"),
+            ("1.0.0", "2020-01-01"),
+        ]
+    ]
+    index = github_releases.ReleaseIndex(releases=releases)
+
+    assert [v for v, _ in index.for_package(None)] == ["1.1.0", "2.0.0", "1.0.0"]
+    assert [v for v, _ in index.for_package(None, order="pep440")] == [
+        "2.0.0",
+        "1.1.0",
+        "1.0.0",
+    ]
+
+
+def test_extract_releases_same_day(github_params, httpx_mock, release_dict):
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        method="GET",
+        json=[
+            {**release_dict, "tag_name": "1.9.0"},
+            {**release_dict, "tag_name": "1.10.0"},
+        ],
+    )
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=2",
+        method="GET",
+        json=[],
+    )
+    result = github_releases.extract_releases(
+        github_params=github_params, token="token", retries=3
+    )
+    assert [r.tag_name for r in result] == ["1.10.0", "1.9.0"]
+
+
+def test_extract_releases_cache_miss(
+    github_params, httpx_mock, github_payload, release, release_dict, tmp_path
+):
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        method="GET",
+        json=[{**release_dict, "id": 1, "author": {}}],
+    )
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=2",
+        method="GET",
+        json=[],
+    )
+    release_cache = cache.ReleaseCache(directory=tmp_path)
+
+    assert github_releases.extract_releases(
+        github_params=github_params, token="token", retries=3, cache=release_cache
+    ) == [release]
+    assert release_cache.load(github_params).payloads == [release_dict]
+
+
+def test_extract_releases_cache_hit(github_params, release, release_dict, tmp_path):
+    release_cache = cache.ReleaseCache(directory=tmp_path)
+    release_cache.save(
+        github_params,
+        [release_dict, {**release_dict, "tag_name": "2.0.0", "draft": True}],
+    )
+
+    assert github_releases.extract_releases(
+        github_params=github_params,
+        token="token",
+        retries=3,
+        release_filter=github_releases.ReleaseFilter(),
+        cache=release_cache,
+    ) == [release]
+
+
+def test_extract_releases_cache_concurrent(
+    github_params, release, release_dict, tmp_path, mocker
+):
+    def slow_download(**kwargs):
+        time.sleep(0.1)
+        return [release], [release_dict]
+
+    download_releases = mocker.patch(
+        "sphinx_github_changelog.github_releases.download_releases",
+        side_effect=slow_download,
+    )
+    release_cache = cache.ReleaseCache(directory=tmp_path)
+
+    def extract():
+        return github_releases.extract_releases(
+            github_params=github_params, token="token", retries=3, cache=release_cache
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: extract(), range(4)))
+
+    assert results == [[release]] * 4
+    download_releases.assert_called_once()
+
+
+def test_extract_releases_cache_refresh(
+    github_params, release, release_dict, tmp_path, mocker
+):
+    download_releases = mocker.patch(
+        "sphinx_github_changelog.github_releases.download_releases",
+        return_value=([release], [release_dict]),
+    )
+    release_cache = cache.ReleaseCache(directory=tmp_path)
+    release_cache.save(github_params, [])
+
+    assert github_releases.extract_releases(
+        github_params=github_params,
+        token="token",
+        retries=3,
+        cache=release_cache,
+        refresh=True,
+    ) == [release]
+    download_releases.assert_called_once()
+    assert release_cache.load(github_params).payloads == [release_dict]
+
+
+def test_get_release_index_last_known_good(
+    github_params, release, release_dict, tmp_path, mocker
+):
+    error = exceptions.GitHubAPIError("Boom")
+    mocker.patch(
+        "sphinx_github_changelog.github_releases.download_releases",
+        side_effect=error,
+    )
+    release_cache = cache.ReleaseCache(
+        directory=tmp_path, fresh_since=datetime.datetime.now(tz=datetime.UTC)
+    )
+    save_old_entry(
+        release_cache,
+        github_params,
+        [release_dict, {**release_dict, "tag_name": "2.0.0", "draft": True}],
+        datetime.timedelta(days=1),
+    )
+
+    release_index = github_releases.get_release_index(
+        github_params=github_params,
+        token="token",
+        retries=3,
+        release_filter=github_releases.ReleaseFilter(),
+        cache=release_cache,
+    )
+
+    assert release_index.releases == [release]
+    assert (
+        release_index.as_of == release_cache.last_known_good(github_params).fetched_at
+    )
+    assert release_index.fetch_error is error
+
+
+def test_get_release_index_no_last_known_good(github_params, tmp_path, mocker):
+    mocker.patch(
+        "sphinx_github_changelog.github_releases.download_releases",
+        side_effect=exceptions.GitHubAPIError("Boom"),
+    )
+
+    with pytest.raises(exceptions.GitHubAPIError):
+        github_releases.get_release_index(
+            github_params=github_params,
+            token="token",
+            retries=3,
+            cache=cache.ReleaseCache(directory=tmp_path),
+        )
+
+
+def save_old_entry(release_cache, github_params, payloads, age):
+    path = release_cache.path(github_params)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fetched_at = datetime.datetime.now(tz=datetime.UTC) - age
+    content = json.dumps(cache.CacheEntry(fetched_at, payloads).to_json())
+    path.write_bytes(gzip.compress(content.encode()))
+
+
+def test_extract_releases_cache_stale(
+    github_params, release, release_dict, tmp_path, mocker
+):
+    downloading = threading.Event()
+    new_release = {**release_dict, "tag_name": "2.0.0"}
+
+    def download(**kwargs):
+        downloading.wait()
+        return [], [new_release]
+
+    download_releases = mocker.patch(
+        "sphinx_github_changelog.github_releases.download_releases",
+        side_effect=download,
+    )
+    release_cache = cache.ReleaseCache(
+        directory=tmp_path, ttl=datetime.timedelta(hours=1)
+    )
+    save_old_entry(
+        release_cache, github_params, [release_dict], datetime.timedelta(hours=2)
+    )
+
+    for _ in range(2):
+        # The stale entry is used while the refresh is ongoing.
+        assert github_releases.extract_releases(
+            github_params=github_params, token="token", retries=3, cache=release_cache
+        ) == [release]
+    downloading.set()
+    github_releases.wait_for_refreshes()
+
+    download_releases.assert_called_once_with(
+        github_params=github_params, token="token", retries=3, retry_policy=None
+    )
+    entry = release_cache.load(github_params)
+    assert entry.payloads == [new_release]
+    assert not release_cache.is_stale(entry)
+
+
+def test_extract_releases_cache_stale_refresh_error(
+    github_params, release, release_dict, tmp_path, mocker
+):
+    mocker.patch(
+        "sphinx_github_changelog.github_releases.download_releases",
+        side_effect=exceptions.GitHubAPIError("Boom"),
+    )
+    # Through Sphinx's logging, so that -W and -w see it.
+    assert isinstance(github_releases.logger, sphinx_logging.SphinxLoggerAdapter)
+    logger = mocker.patch.object(github_releases, "logger")
+    release_cache = cache.ReleaseCache(
+        directory=tmp_path, ttl=datetime.timedelta(hours=1)
+    )
+    save_old_entry(
+        release_cache, github_params, [release_dict], datetime.timedelta(hours=2)
+    )
+
+    assert github_releases.extract_releases(
+        github_params=github_params, token="token", retries=3, cache=release_cache
+    ) == [release]
+    github_releases.wait_for_refreshes()
+
+    logger.warning.assert_called_once_with(
+        "Could not refresh the cached releases of %s: %s",
+        "https://github.com/a/b",
+        mocker.ANY,
+    )
+    assert release_cache.load(github_params).payloads == [release_dict]
+
+
+def test_extract_releases_cache_max_staleness(
+    github_params, release, release_dict, tmp_path, mocker
+):
+    download_releases = mocker.patch(
+        "sphinx_github_changelog.github_releases.download_releases",
+        return_value=([release], [release_dict]),
+    )
+    release_cache = cache.ReleaseCache(
+        directory=tmp_path,
+        ttl=datetime.timedelta(hours=1),
+        max_staleness=datetime.timedelta(days=1),
+    )
+    save_old_entry(release_cache, github_params, [], datetime.timedelta(days=2))
+
+    assert github_releases.extract_releases(
+        github_params=github_params, token="token", retries=3, cache=release_cache
+    ) == [release]
+    download_releases.assert_called_once()
+    assert release_cache.load(github_params).payloads == [release_dict]
+
+
 def test_extract_releases_format(github_params, httpx_mock):
     httpx_mock.add_response(
         url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
@@ -112,6 +548,44 @@ def test_release_from_rest_missing_dates(release_dict):
     assert "release has no publication date" in str(exc_info.value)
 
 
+def test_release_trim_rest_assets(release_dict):
+    asset = {
+        "name": "pkg-1.0.0.tar.gz",
+        "browser_download_url": "https://example.com/pkg-1.0.0.tar.gz",
+        "size": 1234,
+        "download_count": 5,
+        "uploader": {"login": "someone"},
+        "content_type": "application/gzip",
+    }
+    payload = github_releases.Release.trim_rest(
+        {**release_dict, "id": 1, "assets": [asset]}
+    )
+
+    assert payload == {
+        **release_dict,
+        "assets": [
+            {
+                "name": "pkg-1.0.0.tar.gz",
+                "browser_download_url": "https://example.com/pkg-1.0.0.tar.gz",
+                "size": 1234,
+                "download_count": 5,
+            }
+        ],
+    }
+    assert github_releases.Release.from_rest(payload).assets == (
+        github_releases.Asset(
+            name="pkg-1.0.0.tar.gz",
+            url="https://example.com/pkg-1.0.0.tar.gz",
+            size=1234,
+            download_count=5,
+        ),
+    )
+
+
+def test_release_from_rest_no_assets(release_dict):
+    assert github_releases.Release.from_rest(release_dict).assets == ()
+
+
 def test_github_call(httpx_mock):
     url = "https://api.github.com/repos/a/b/releases"
     payload = {"message": "foo"}
@@ -128,6 +602,144 @@ def test_github_call(httpx_mock):
     ) == [payload]
 
 
+def test_graphql_call(httpx_mock):
+    url = "https://api.github.com/graphql"
+    httpx_mock.add_response(
+        url=url,
+        method="POST",
+        match_json={"query": "query { viewer { login } }"},
+        json={"data": {"viewer": None}, "errors": [{"type": "NOT_FOUND"}]},
+    )
+
+    result = github_releases.graphql_call(
+        url=url, token="token", query="query { viewer { login } }", retries=0
+    )
+
+    assert result == {"viewer": None}
+    assert httpx_mock.get_request().headers["Authorization"] == "token token"
+
+
+def test_graphql_call_error(httpx_mock):
+    httpx_mock.add_response(
+        url="https://api.github.com/graphql",
+        method="POST",
+        json={"errors": [{"message": "Parse error"}]},
+    )
+
+    with pytest.raises(exceptions.GitHubAPIError, match="GitHub GraphQL API error"):
+        github_releases.graphql_call(
+            url="https://api.github.com/graphql",
+            token="token",
+            query="query {",
+            retries=0,
+        )
+
+
+def rate_limit_headers(remaining, resource="core"):
+    return {
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": "4102444800",  # 2100-01-01
+        "X-RateLimit-Resource": resource,
+    }
+
+
+def test_github_request_token_pool(httpx_mock):
+    url = "https://api.github.com/repos/a/b/releases"
+    for token, remaining in [("a", 10), ("b", 4000), ("b", 3999)]:
+        httpx_mock.add_response(
+            url=url,
+            match_headers={"Authorization": f"token {token}"},
+            headers=rate_limit_headers(remaining),
+        )
+
+    for _ in range(3):
+        github_releases.github_request("GET", url, token="a, b", retries=0)
+
+    assert [
+        request.headers["Authorization"] for request in httpx_mock.get_requests()
+    ] == ["token a", "token b", "token b"]
+
+
+def test_github_request_token_pool_rotation(httpx_mock):
+    url = "https://api.github.com/repos/a/b/releases"
+    httpx_mock.add_response(
+        url=url,
+        match_headers={"Authorization": "token a"},
+        status_code=403,
+        headers=rate_limit_headers(0),
+    )
+    httpx_mock.add_response(
+        url=url,
+        match_headers={"Authorization": "token b"},
+        headers=rate_limit_headers(4999),
+        json=[],
+    )
+
+    # No retry needed: the exhausted token is replaced right away.
+    response = github_releases.github_request("GET", url, token="a,b", retries=0)
+
+    assert response.json() == []
+    assert token_pool.get_token_pool("a,b").pick() == "b"
+
+
+def test_github_request_token_pool_exhausted(httpx_mock):
+    url = "https://api.github.com/repos/a/b/releases"
+    for token in "ab":
+        httpx_mock.add_response(
+            url=url,
+            match_headers={"Authorization": f"token {token}"},
+            status_code=403,
+            headers=rate_limit_headers(0),
+        )
+
+    with pytest.raises(exceptions.GitHubAPIError, match="status code: 403"):
+        github_releases.github_request("GET", url, token="a,b", retries=0)
+
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_github_request_token_pool_graphql(httpx_mock):
+    url = "https://api.github.com/graphql"
+    pool = token_pool.get_token_pool("a,b")
+    pool.record("a", httpx.Headers(rate_limit_headers(100)))
+    pool.record("b", httpx.Headers(rate_limit_headers(50)))
+    pool.record("a", httpx.Headers(rate_limit_headers(0, resource="graphql")))
+    httpx_mock.add_response(
+        url=url,
+        method="POST",
+        match_headers={"Authorization": "token b"},
+        headers=rate_limit_headers(4999, resource="graphql"),
+        json={"data": {}},
+    )
+
+    assert github_releases.graphql_call(url, token="a,b", query="", retries=0) == {}
+    assert pool.pick() == "a"
+
+
+def test_github_request_token_pool_rest_post(httpx_mock):
+    # e.g. creating a GitHub App installation token: POST, but REST.
+    url = "https://api.github.com/app/installations/7/access_tokens"
+    pool = token_pool.get_token_pool("a,b")
+    pool.record("a", httpx.Headers(rate_limit_headers(0, resource="graphql")))
+    pool.record("b", httpx.Headers(rate_limit_headers(0)))
+    httpx_mock.add_response(
+        url=url, method="POST", match_headers={"Authorization": "token a"}
+    )
+
+    github_releases.github_request("POST", url, token="a,b", retries=0)
+
+
+def test_github_request_bearer_not_pooled(httpx_mock):
+    url = "https://api.github.com/repos/a/b/installation"
+    httpx_mock.add_response(url=url, match_headers={"Authorization": "Bearer jwt"})
+
+    github_releases.github_request(
+        "GET", url, token="jwt", retries=0, auth_scheme="Bearer"
+    )
+
+    assert token_pool._token_pools == {}
+
+
 def test_github_call_http_error(httpx_mock):
     url = "https://api.github.com/repos/a/b/releases"
     httpx_mock.add_response(
@@ -224,6 +836,7 @@ def test_github_call_http_error_connection(httpx_mock):
         httpx.ConnectError("bar"),
         url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
         method="GET",
+        is_reusable=True,
     )
     with pytest.raises(exceptions.GitHubAPIError) as exc_info:
         github_releases.github_call(
@@ -231,6 +844,384 @@ def test_github_call_http_error_connection(httpx_mock):
             token="token",
             params={"per_page": 100, "page": 1},
             retries=3,
+            sleep=lambda _: None,
         )
 
     assert str(exc_info.value) == "Could not retrieve changelog from github: bar"
+    assert len(httpx_mock.get_requests()) == 4
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        {"status_code": 503},
+        {"exception": httpx.ReadTimeout("timed out")},
+        {"exception": httpx.RemoteProtocolError("connection reset")},
+    ],
+)
+def test_github_call_retries_on_server_error(httpx_mock, error):
+    url = "https://api.github.com/repos/a/b/releases?per_page=100&page=1"
+    if "exception" in error:
+        httpx_mock.add_exception(error["exception"], url=url)
+    else:
+        httpx_mock.add_response(url=url, **error)
+    httpx_mock.add_response(url=url, json=[{"message": "ok"}])
+    sleeps = []
+
+    assert github_releases.github_call(
+        url="https://api.github.com/repos/a/b/releases",
+        token="token",
+        params={"per_page": 100, "page": 1},
+        retries=1,
+        sleep=sleeps.append,
+    ) == [{"message": "ok"}]
+    assert len(sleeps) == 1
+    assert 5 <= sleeps[0] <= 15
+
+
+@pytest.mark.parametrize(
+    "retry_policy, error",
+    [
+        (
+            github_releases.RetryPolicy(retry_statuses=frozenset({502})),
+            {"status_code": 503},
+        ),
+        (
+            github_releases.RetryPolicy(retry_transport_errors=False),
+            {"exception": httpx.ConnectError("bar")},
+        ),
+    ],
+)
+def test_github_call_not_retryable(httpx_mock, retry_policy, error):
+    url = "https://api.github.com/repos/a/b/releases?per_page=100&page=1"
+    if "exception" in error:
+        httpx_mock.add_exception(error["exception"], url=url)
+    else:
+        httpx_mock.add_response(url=url, **error)
+
+    with pytest.raises(exceptions.GitHubAPIError):
+        github_releases.github_call(
+            url="https://api.github.com/repos/a/b/releases",
+            token="token",
+            params={"per_page": 100, "page": 1},
+            retries=3,
+            retry_policy=retry_policy,
+        )
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_github_call_total_timeout(httpx_mock, mocker):
+    clock = [0.0]
+    mocker.patch("time.monotonic", side_effect=lambda: clock[0])
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        status_code=503,
+        is_reusable=True,
+    )
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    with pytest.raises(exceptions.GitHubAPIError):
+        github_releases.github_call(
+            url="https://api.github.com/repos/a/b/releases",
+            token="token",
+            params={"per_page": 100, "page": 1},
+            retries=10,
+            sleep=sleep,
+            retry_policy=github_releases.RetryPolicy(
+                total_timeout=100, backoff=40, max_backoff=40
+            ),
+        )
+
+    # The third wait would have ended past the 100s budget.
+    assert sleeps == [40, 40]
+
+
+def test_github_call_timeouts(httpx_mock):
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        json=[],
+    )
+
+    github_releases.github_call(
+        url="https://api.github.com/repos/a/b/releases",
+        token="token",
+        params={"per_page": 100, "page": 1},
+        retries=0,
+        retry_policy=github_releases.RetryPolicy(
+            connect_timeout=1, read_timeout=2, total_timeout=0
+        ),
+    )
+
+    timeout = httpx_mock.get_requests()[0].extensions["timeout"]
+    assert timeout == {"connect": 1, "read": 2, "write": 2, "pool": 2}
+
+
+def test_iter_release_pages_circuit_breaker(github_params, httpx_mock):
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        status_code=503,
+        is_reusable=True,
+    )
+    retry_policy = github_releases.RetryPolicy(breaker_threshold=2)
+
+    def iter_pages():
+        return list(
+            github_releases.iter_release_pages(
+                github_params=github_params,
+                token="token",
+                retries=0,
+                retry_policy=retry_policy,
+            )
+        )
+
+    for _ in range(2):
+        with pytest.raises(exceptions.GitHubAPIError, match="status code: 503"):
+            iter_pages()
+    with pytest.raises(circuit_breaker.CircuitOpenError):
+        iter_pages()
+
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_iter_release_pages_circuit_breaker_not_retryable(github_params, httpx_mock):
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        status_code=404,
+        is_reusable=True,
+    )
+    retry_policy = github_releases.RetryPolicy(breaker_threshold=1)
+
+    for _ in range(2):
+        with pytest.raises(exceptions.GitHubAPIError, match="status code: 404"):
+            list(
+                github_releases.iter_release_pages(
+                    github_params=github_params,
+                    token="token",
+                    retries=0,
+                    retry_policy=retry_policy,
+                )
+            )
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [json.JSONDecodeError("Expecting value", "<html>", 0), exceptions.ChangelogError()],
+)
+def test_iter_release_pages_circuit_breaker_other_error(github_params, mocker, exc):
+    clock = mocker.Mock(return_value=0)
+    breaker = circuit_breaker.CircuitBreaker(
+        hostname="github.com", threshold=1, cooldown=10, clock=clock
+    )
+    breaker.record_failure()
+    mocker.patch.object(circuit_breaker, "get_circuit_breaker", return_value=breaker)
+    coalesced_github_call = mocker.patch.object(
+        github_releases, "coalesced_github_call", side_effect=[exc, []]
+    )
+
+    def iter_pages():
+        return list(
+            github_releases.iter_release_pages(
+                github_params=github_params, token="token", retries=0
+            )
+        )
+
+    clock.return_value = 10
+    with pytest.raises(type(exc)):
+        iter_pages()
+    # The failed probe reopened the breaker, and the next one is let through.
+    with pytest.raises(circuit_breaker.CircuitOpenError):
+        iter_pages()
+    clock.return_value = 20
+    assert iter_pages() == []
+    assert coalesced_github_call.call_count == 2
+
+
+class CountingLock:
+    """Lock counting how many times it was acquired, so that tests can wait
+    for threads to get past it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.acquired = 0
+
+    def __enter__(self):
+        self.lock.acquire()
+        with self.condition:
+            self.acquired += 1
+            self.condition.notify_all()
+
+    def __exit__(self, *exc_info):
+        self.lock.release()
+
+    def wait_for(self, count):
+        with self.condition:
+            assert self.condition.wait_for(lambda: self.acquired >= count, timeout=5)
+
+
+@pytest.fixture
+def in_flight_lock(monkeypatch):
+    lock = CountingLock()
+    monkeypatch.setattr(github_releases, "_in_flight_lock", lock)
+    return lock
+
+
+def test_coalesced_github_call(mocker, in_flight_lock):
+    calling = threading.Event()
+    release_call = threading.Event()
+
+    def slow_call(**kwargs):
+        calling.set()
+        release_call.wait()
+        return [{"token": kwargs["token"]}]
+
+    github_call = mocker.patch(
+        "sphinx_github_changelog.github_releases.github_call", side_effect=slow_call
+    )
+
+    def call(token):
+        return github_releases.coalesced_github_call(
+            url="https://api.github.com/repos/a/b/releases",
+            token=token,
+            params={"per_page": 100, "page": 1},
+            retries=3,
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(call, "token")
+        calling.wait()
+        others = [executor.submit(call, token) for token in ["token", "token", "other"]]
+        # All the calls have looked up the in-flight ones.
+        in_flight_lock.wait_for(4)
+        release_call.set()
+        results = [first.result()] + [future.result() for future in others]
+
+    assert results == [[{"token": "token"}]] * 3 + [[{"token": "other"}]]
+    assert results[0] is results[1]
+    assert github_call.call_count == 2
+    assert github_releases._in_flight == {}
+
+
+@pytest.mark.parametrize(
+    "error", [exceptions.GitHubAPIError("Boom"), KeyboardInterrupt("Boom")]
+)
+def test_coalesced_github_call_error(mocker, in_flight_lock, error):
+    release_call = threading.Event()
+
+    def failing_call(**kwargs):
+        release_call.wait()
+        raise error
+
+    github_call = mocker.patch(
+        "sphinx_github_changelog.github_releases.github_call",
+        side_effect=failing_call,
+    )
+
+    def call():
+        return github_releases.coalesced_github_call(
+            url="https://api.github.com/repos/a/b/releases",
+            token="token",
+            params={"per_page": 100, "page": 1},
+            retries=3,
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(call) for _ in range(2)]
+        in_flight_lock.wait_for(2)
+        release_call.set()
+        for future in futures:
+            with pytest.raises(type(error), match="Boom"):
+                future.result()
+
+    github_call.assert_called_once()
+    assert github_releases._in_flight == {}
+
+
+def test_github_call_compressed(httpx_mock):
+    payload = [{"message": "foo" * 100}]
+    content = gzip.compress(json.dumps(payload).encode())
+    httpx_mock.add_response(
+        url="https://api.github.com/repos/a/b/releases?per_page=100&page=1",
+        stream=pytest_httpx.IteratorStream([content]),
+        headers={"Content-Encoding": "gzip"},
+    )
+    stats = github_releases.TransferStats()
+
+    assert (
+        github_releases.github_call(
+            url="https://api.github.com/repos/a/b/releases",
+            token="token",
+            params={"per_page": 100, "page": 1},
+            retries=0,
+            stats=stats,
+        )
+        == payload
+    )
+    request = httpx_mock.get_requests()[0]
+    assert request.headers["Accept-Encoding"] == github_releases.accept_encoding()
+    assert stats.downloaded_bytes == len(content)
+    assert stats.decoded_bytes == len(json.dumps(payload))
+    assert stats.compression_ratio > 5
+
+
+@pytest.mark.parametrize(
+    "installed, expected",
+    [
+        (set(), "gzip"),
+        ({"brotlicffi"}, "gzip, br"),
+        ({"brotli", "zstandard"}, "gzip, br, zstd"),
+    ],
+)
+def test_accept_encoding(mocker, installed, expected):
+    mocker.patch("importlib.util.find_spec", side_effect=lambda name: name in installed)
+    github_releases.accept_encoding.cache_clear()
+    try:
+        assert github_releases.accept_encoding() == expected
+    finally:
+        github_releases.accept_encoding.cache_clear()
+
+
+def test_transfer_stats_empty():
+    assert github_releases.TransferStats().compression_ratio == 1
+
+
+def test_retry_policy_wait():
+    wait = github_releases.RetryPolicy(backoff=5, max_backoff=60).wait(
+        rng=lambda low, high: high
+    )
+
+    assert [wait(None) for _ in range(4)] == [15, 45, 60, 60]
+
+
+def test_retry_policy_from_config():
+    config = config_module.ChangelogConfig(
+        connect_timeout=1,
+        read_timeout=2,
+        total_timeout=0,
+        retry_statuses="429, 503",
+        retry_transport_errors=False,
+    )
+
+    assert github_releases.RetryPolicy.from_config(
+        config
+    ) == github_releases.RetryPolicy(
+        connect_timeout=1,
+        read_timeout=2,
+        total_timeout=0,
+        retry_statuses=frozenset({429, 503}),
+        retry_transport_errors=False,
+    )
+
+
+def test_retry_policy_from_config_invalid():
+    config = config_module.ChangelogConfig(retry_statuses="5xx")
+
+    with pytest.raises(
+        exceptions.ChangelogError,
+        match="Invalid sphinx_github_changelog_retry_statuses: '5xx'",
+    ):
+        github_releases.RetryPolicy.from_config(config)
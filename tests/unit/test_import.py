@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import pytest
+
+# Only needed once a changelog is actually built.
+LAZY_MODULES = [
+    "httpx",
+    "tenacity",
+    "myst_parser",
+    "markdown_it",
+    "sqlite3",
+    "cryptography",
+]
+
+
+def imported_modules(statement: str) -> set[str]:
+    """Run the statement in a new interpreter and return the modules it imported,
+    as reported by ``python -X importtime``.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        line.rsplit("|", 1)[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_import_is_lazy(module):
+    modules = imported_modules("import sphinx_github_changelog")
+
+    assert "sphinx_github_changelog.setup" in modules
+    assert module not in modules
+
+
+def test_import_lazy_modules_on_use():
+    modules = imported_modules(
+        "from sphinx_github_changelog import changelog; "
+        "changelog.convert_markdown_to_nodes('*hi*')"
+    )
+
+    assert "myst_parser" in modules
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import pstats
+import types
+
+from sphinx_github_changelog import profiling
+
+
+def work():
+    return sum(range(100))
+
+
+def test_profiled(tmp_path):
+    with profiling.profiled(str(tmp_path), "api/index", 12):
+        work()
+
+    path = tmp_path / "api--index-L12.prof"
+    assert "work" in {name for _, _, name in pstats.Stats(str(path)).stats}
+
+
+def test_profiled_disabled(tmp_path):
+    with profiling.profiled(None, "index", 12):
+        work()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_merge_profiles(tmp_path):
+    for lineno in (1, 2):
+        with profiling.profiled(str(tmp_path), "index", lineno):
+            work()
+
+    path = profiling.merge_profiles(str(tmp_path))
+
+    assert path == tmp_path / "changelog.prof"
+    [calls] = [
+        stat[1]
+        for (_, _, name), stat in pstats.Stats(str(path)).stats.items()
+        if name == "work"
+    ]
+    assert calls == 2
+    # The merged profile isn't merged again.
+    assert profiling.profiles(str(tmp_path)) == [
+        tmp_path / "index-L1.prof",
+        tmp_path / "index-L2.prof",
+    ]
+
+
+def test_merge_profiles_empty(tmp_path):
+    assert profiling.merge_profiles(str(tmp_path)) is None
+
+
+def test_on_builder_inited(tmp_path):
+    with profiling.profiled(str(tmp_path), "index", 1):
+        work()
+    profiling.merge_profiles(str(tmp_path))
+    (tmp_path / "notes.txt").touch()
+    (tmp_path / "other.prof").touch()
+    app = types.SimpleNamespace(
+        config=types.SimpleNamespace(sphinx_github_changelog_profile_dir=str(tmp_path))
+    )
+
+    profiling.on_builder_inited(app)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "notes.txt",
+        "other.prof",
+    ]
+
+
+def test_on_build_finished(tmp_path):
+    with profiling.profiled(str(tmp_path), "index", 1):
+        work()
+    app = types.SimpleNamespace(
+        config=types.SimpleNamespace(sphinx_github_changelog_profile_dir=str(tmp_path))
+    )
+
+    profiling.on_build_finished(app, exception=None)
+
+    assert (tmp_path / "changelog.prof").exists()
+
+
+def test_on_build_finished_no_profiles(tmp_path):
+    app = types.SimpleNamespace(
+        config=types.SimpleNamespace(sphinx_github_changelog_profile_dir=str(tmp_path))
+    )
+
+    profiling.on_build_finished(app, exception=None)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_disabled_hooks():
+    app = types.SimpleNamespace(
+        config=types.SimpleNamespace(sphinx_github_changelog_profile_dir=None)
+    )
+
+    profiling.on_builder_inited(app)
+    profiling.on_build_finished(app, exception=None)
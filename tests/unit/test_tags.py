@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import datetime
+
+import pytest
+
+from sphinx_github_changelog import exceptions, tags
+
+
+@pytest.mark.parametrize(
+    "pattern, tag, expected",
+    [
+        ("pkg-a@*", "pkg-a@1.2.3", "1.2.3"),
+        ("pkg-a@*", "pkg-b@1.2.3", None),
+        ("pkg-a@*", "pkg-a-extra@1.2.3", None),
+        ("pkg-?@v*", "pkg-a@v1.2.3", "1.2.3"),
+        ("*-*", "1.2.3-pkg", "1.2.3"),
+        (r"pkg-a@v(\d.*)", "pkg-a@v1.2.3", "1.2.3"),
+        (r"(?P<package>[^@]+)@(?P<version>.+)", "pkg-a@1.2.3", "1.2.3"),
+        (r"pkg-a@(\d.*)", "pkg-a@next", None),
+    ],
+)
+def test_tag_pattern(pattern, tag, expected):
+    assert tags.TagPattern.from_option(pattern).match(tag) == expected
+
+
+def test_tag_pattern_invalid_regex():
+    with pytest.raises(exceptions.ChangelogError, match=r"^Invalid :tag-pattern:"):
+        tags.TagPattern.from_option("pkg-a@(")
+
+
+def test_tag_pattern_no_version():
+    with pytest.raises(exceptions.ChangelogError, match="doesn't capture the version"):
+        tags.TagPattern.from_option("pkg-a@1.0")
+
+
+def test_default_version():
+    assert tags.default_version("v1.0.0") == "1.0.0"
+    assert tags.default_version("1.0.0") == "1.0.0"
+
+
+def test_sort_key_date():
+    dates = {
+        "1.0.1": datetime.date(2020, 1, 3),
+        "1.9.0": datetime.date(2020, 1, 2),
+        "1.10.0": datetime.date(2020, 1, 2),
+        "2.0.0": datetime.date(2020, 1, 3),
+        "weird": datetime.date(2020, 1, 1),
+    }
+    result = sorted(
+        dates, key=lambda v: tags.sort_key("date", v, dates[v]), reverse=True
+    )
+    assert result == ["2.0.0", "1.0.1", "1.10.0", "1.9.0", "weird"]
+
+
+def test_sort_key_date_same_day():
+    day = datetime.date(2020, 1, 1)
+    versions = ["1.9.0", "1.10.0", "1.10.0rc1", "0.1"]
+    result = sorted(versions, key=lambda v: tags.sort_key("date", v, day))
+    assert result == ["0.1", "1.9.0", "1.10.0rc1", "1.10.0"]
+
+
+def test_sort_key_pep440():
+    day = datetime.date(2020, 1, 1)
+    versions = ["1.0.0", "1.0.0rc1", "1.0.0.post1", "1.0.0.dev1", "nope"]
+    result = sorted(versions, key=lambda v: tags.sort_key("pep440", v, day))
+    assert result == ["nope", "1.0.0.dev1", "1.0.0rc1", "1.0.0", "1.0.0.post1"]
+
+
+def test_sort_key_semver():
+    day = datetime.date(2020, 1, 1)
+    versions = [
+        "1.0.0",
+        "1.0.0-rc.1",
+        "1.0.0-beta.11",
+        "1.0.0-beta.2",
+        "1.0.0-beta",
+        "1.0.0-alpha.beta",
+        "1.0.0-alpha.1",
+        "1.0.0-alpha",
+        "1.0.0+build",
+        "1.0",
+    ]
+    result = sorted(versions, key=lambda v: tags.sort_key("semver", v, day))
+    assert result == [
+        "1.0",
+        "1.0.0-alpha",
+        "1.0.0-alpha.1",
+        "1.0.0-alpha.beta",
+        "1.0.0-beta",
+        "1.0.0-beta.2",
+        "1.0.0-beta.11",
+        "1.0.0-rc.1",
+        "1.0.0",
+        "1.0.0+build",
+    ]
+
+
+def test_parse_caches():
+    assert tags.parse_semver("1.2.3") is tags.parse_semver("1.2.3")
+    assert tags.parse_pep440("1.2.3") is tags.parse_pep440("1.2.3")
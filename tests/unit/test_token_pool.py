@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from sphinx_github_changelog import token_pool
+
+
+@pytest.fixture
+def clock():
+    return [1000.0]
+
+
+@pytest.fixture
+def pool(clock):
+    return token_pool.TokenPool(tokens=("a", "b", "c"), clock=lambda: clock[0])
+
+
+def headers(remaining, reset=2000, **extra):
+    return {
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(reset),
+        **extra,
+    }
+
+
+@pytest.mark.parametrize(
+    "token, expected",
+    [
+        ("a", ("a",)),
+        ("a,b", ("a", "b")),
+        (" a, b\nc ", ("a", "b", "c")),
+    ],
+)
+def test_split_tokens(token, expected):
+    assert token_pool.split_tokens(token) == expected
+
+
+def test_token_pool_pick_unknown_first(pool):
+    assert pool.pick() == "a"
+    pool.record("a", headers(4999))
+    assert pool.pick() == "b"
+    pool.record("b", headers(4999))
+    assert pool.pick() == "c"
+
+
+def test_token_pool_pick_healthiest(pool):
+    pool.record("a", headers(10))
+    pool.record("b", headers(3000))
+    pool.record("c", headers(200))
+
+    assert pool.pick() == "b"
+
+
+def test_token_pool_budget_reset(pool, clock):
+    pool.record("a", headers(0, reset=1500))
+
+    assert pool.remaining("a") == 0
+    clock[0] = 1500
+    assert pool.remaining("a") == math.inf
+
+
+def test_token_pool_resources(pool):
+    pool.record("a", headers(4000))
+    pool.record("b", headers(4500))
+    pool.record("a", headers(0, **{"x-ratelimit-resource": "graphql"}))
+
+    assert pool.remaining("a") == 4000
+    assert pool.remaining("a", "graphql") == 0
+    assert pool.pick() == "c"
+    pool.record("c", headers(100))
+    assert pool.pick() == "b"
+
+
+@pytest.mark.parametrize(
+    "response_headers",
+    [
+        {},
+        {"x-ratelimit-remaining": "12"},
+        {"x-ratelimit-remaining": "many", "x-ratelimit-reset": "2000"},
+    ],
+)
+def test_token_pool_record_invalid_headers(pool, response_headers):
+    pool.record("a", response_headers)
+
+    assert pool.budgets == {}
+
+
+def test_token_pool_should_rotate(pool):
+    pool.record("a", headers(0))
+    pool.record("b", headers(12))
+
+    assert pool.should_rotate("a") is True
+    assert pool.should_rotate("b") is False
+
+    pool.record("b", headers(0))
+    pool.record("c", headers(0))
+    assert pool.should_rotate("a") is False
+
+
+def test_get_token_pool():
+    pool = token_pool.get_token_pool("a,b")
+
+    assert pool.tokens == ("a", "b")
+    assert token_pool.get_token_pool("a,b") is pool
+    assert token_pool.get_token_pool("a") is not pool
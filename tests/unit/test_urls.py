@@ -103,6 +103,18 @@ def test_rest_api_url_enterprise():
     assert params.rest_api_url == "https://github.enterprise.com/api/v3"
 
 
+@pytest.mark.parametrize(
+    "hostname, expected",
+    [
+        ("github.com", "https://api.github.com/graphql"),
+        ("github.enterprise.com", "https://github.enterprise.com/api/graphql"),
+    ],
+)
+def test_graphql_api_url(hostname, expected):
+    params = urls.GitHubParams(hostname=hostname, owner="org", repo="repo")
+    assert params.graphql_api_url == expected
+
+
 def test_releases_api_url_github_com():
     params = urls.GitHubParams(hostname="github.com", owner="org", repo="repo")
     assert params.releases_api_url == "https://api.github.com/repos/org/repo/releases"
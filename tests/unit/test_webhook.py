@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from sphinx_github_changelog import exceptions, webhook
+
+SECRET = "It's a Secret to Everybody"
+
+
+@pytest.fixture
+def event(release_dict):
+    return {
+        "action": "published",
+        "release": {**release_dict, "tag_name": "2.0.0", "id": 1, "author": {}},
+        "repository": {"html_url": "https://github.com/a/b"},
+    }
+
+
+@pytest.fixture
+def application(release_cache):
+    return webhook.make_app(cache=release_cache, secret=SECRET)
+
+
+def call(application, body=b"", method="POST", event_name="release", **environ):
+    environ = {
+        "REQUEST_METHOD": method,
+        "CONTENT_LENGTH": str(len(body)),
+        "HTTP_X_HUB_SIGNATURE_256": webhook.signature(SECRET, body),
+        "HTTP_X_GITHUB_EVENT": event_name,
+        "wsgi.input": io.BytesIO(body),
+        **environ,
+    }
+    statuses = []
+    response = application(environ, lambda status, headers: statuses.append(status))
+    return statuses[0], b"".join(response).decode()
+
+
+def test_signature():
+    # Example from GitHub's documentation.
+    assert (
+        webhook.signature(SECRET, b"Hello, World!")
+        == "sha256=757107ea0eb2509fc211221cce984b8a37570b6d7586c22c46f4379c8b043e17"
+    )
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (webhook.signature(SECRET, b"{}"), True),
+        (webhook.signature("other", b"{}"), False),
+        ("nope", False),
+        (None, False),
+    ],
+)
+def test_is_valid_signature(header, expected):
+    assert webhook.is_valid_signature(SECRET, b"{}", header) is expected
+
+
+def test_handle_release_event(release_cache, github_params, release_dict, event):
+    release_cache.save(github_params, [release_dict])
+
+    assert (
+        webhook.handle_release_event(release_cache, event)
+        == "Updated release 2.0.0 of https://github.com/a/b"
+    )
+    # Stored trimmed, like downloaded releases.
+    assert release_cache.load(github_params).payloads == [
+        {**release_dict, "tag_name": "2.0.0"},
+        release_dict,
+    ]
+
+
+def test_handle_release_event_deleted(release_cache, github_params, release_dict):
+    release_cache.save(github_params, [release_dict])
+    event = {
+        "action": "deleted",
+        "release": release_dict,
+        "repository": {"html_url": "https://github.com/a/b"},
+    }
+
+    assert (
+        webhook.handle_release_event(release_cache, event)
+        == "Removed release 1.0.0 of https://github.com/a/b"
+    )
+    assert release_cache.load(github_params).payloads == []
+
+
+def test_handle_release_event_renamed(release_cache, github_params, release_dict):
+    release_cache.save(github_params, [release_dict])
+    event = {
+        "action": "edited",
+        "release": {**release_dict, "tag_name": "v1.0.0"},
+        "changes": {"tag_name": {"from": "1.0.0"}},
+        "repository": {"html_url": "https://github.com/a/b"},
+    }
+
+    webhook.handle_release_event(release_cache, event)
+
+    assert [
+        payload["tag_name"] for payload in release_cache.load(github_params).payloads
+    ] == ["v1.0.0"]
+
+
+def test_handle_release_event_not_cached(release_cache, github_params, event):
+    assert (
+        webhook.handle_release_event(release_cache, event)
+        == "https://github.com/a/b is not cached"
+    )
+    assert release_cache.load(github_params) is None
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"repository": None},
+        {"repository": {"html_url": "https://github.com/a"}},
+        {"release": {"tag_name": "2.0.0"}},
+        {"action": None, "changes": {"tag_name": "nope"}},
+    ],
+)
+def test_handle_release_event_invalid(release_cache, event, changes):
+    with pytest.raises(exceptions.ChangelogError, match=r"^Invalid release event"):
+        webhook.handle_release_event(release_cache, {**event, **changes})
+
+
+def test_make_app_no_secret(release_cache):
+    with pytest.raises(
+        exceptions.ChangelogError,
+        match=rf"^The webhook needs a secret: set the {webhook.SECRET_ENV_VAR}",
+    ):
+        webhook.make_app(cache=release_cache, secret="")
+
+
+def test_application(application, release_cache, github_params, release_dict, event):
+    release_cache.save(github_params, [release_dict])
+
+    assert call(application, json.dumps(event).encode()) == (
+        "200 OK",
+        "Updated release 2.0.0 of https://github.com/a/b\n",
+    )
+    assert len(release_cache.load(github_params).payloads) == 2
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({"method": "GET"}, ("405 Method Not Allowed", "Only POST is supported\n")),
+        ({"CONTENT_LENGTH": "nope"}, ("400 Bad Request", "Invalid Content-Length\n")),
+        (
+            {"CONTENT_LENGTH": str(webhook.MAX_PAYLOAD_SIZE + 1)},
+            ("400 Bad Request", "Invalid Content-Length\n"),
+        ),
+        (
+            {"HTTP_X_HUB_SIGNATURE_256": webhook.signature("other", b"{}")},
+            ("401 Unauthorized", "Invalid signature\n"),
+        ),
+        ({"event_name": "ping"}, ("200 OK", "pong\n")),
+        ({"event_name": "push"}, ("202 Accepted", "Ignored push event\n")),
+    ],
+)
+def test_application_responses(application, kwargs, expected):
+    assert call(application, b"{}", **kwargs) == expected
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        (b"nope", "Expecting value"),
+        (b"{}", "Invalid release event"),
+    ],
+)
+def test_application_invalid_event(application, body, message):
+    status, response = call(application, body)
+
+    assert status == "400 Bad Request"
+    assert response.startswith(message)